@@ -0,0 +1,526 @@
+"""
+Noyaux de calcul interchangeables des estimateurs.
+
+Trois implémentations d'une même interface :
+- 'python' : référence en Python pur, toujours disponible ;
+- 'numpy'  : noyaux vectorisés (NumPy optionnel) ;
+- 'numba'  : noyaux compilés à la volée (Numba optionnel).
+
+Le backend est choisi à l'exécution par set_backend() ou la variable
+d'environnement TABLE_BACKEND. En mode 'auto' (défaut), le plus rapide des
+backends disponibles est retenu : numba, puis numpy, puis python.
+
+Les noyaux travaillent sur des observations « préparées » : coordonnées
+(x, y) et (cos, sin) du rétro-azimut pour φ = 0 (azimut + 180°). La droite
+d'une observation pour un angle φ s'obtient par rotation de cette direction
+de (cos φ, sin φ), sans autre appel trigonométrique.
+"""
+
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Line = Tuple[Tuple[float, float], Tuple[float, float]]
+
+
+def _base_directions(observations: List[Dict]) -> List[Tuple[float, float, float, float]]:
+    """(x, y, cos, sin) du rétro-azimut de chaque observation pour φ = 0."""
+    out = []
+    for obs in observations:
+        r = math.radians(obs['azimuth_deg'] + 180.0)
+        out.append((obs['x'], obs['y'], math.cos(r), math.sin(r)))
+    return out
+
+
+def _residual_for_phi(rows, cos_phi: float, sin_phi: float) -> Tuple[Tuple[float, float], float]:
+    if not rows:
+        return ((0.0, 0.0), float('inf'))
+    a11 = a12 = a22 = b1 = b2 = 0.0
+    lines = []
+    for qx, qy, ca, sa in rows:
+        dx = ca * cos_phi - sa * sin_phi
+        dy = sa * cos_phi + ca * sin_phi
+        lines.append((qx, qy, dx, dy))
+        a11 += dy * dy
+        a12 -= dy * dx
+        a22 += dx * dx
+        rhs = dy * qx - dx * qy
+        b1 += dy * rhs
+        b2 -= dx * rhs
+
+    det = a11 * a22 - a12 * a12
+    if abs(det) < 1e-12:
+        x0 = sum(line[0] for line in lines) / len(lines)
+        y0 = sum(line[1] for line in lines) / len(lines)
+    else:
+        x0 = (a22 * b1 - a12 * b2) / det
+        y0 = (a11 * b2 - a12 * b1) / det
+
+    total = 0.0
+    for qx, qy, dx, dy in lines:
+        total += abs(dx * (y0 - qy) - dy * (x0 - qx))
+    return ((x0, y0), total / len(lines))
+
+
+def _residuals_for_angles(rows, cos_phis: Sequence[float],
+                          sin_phis: Sequence[float]) -> Tuple[List[Tuple[float, float]], List[float]]:
+    origins, residuals = [], []
+    for cp, sp in zip(cos_phis, sin_phis):
+        origin, residual = _residual_for_phi(rows, cp, sp)
+        origins.append(origin)
+        residuals.append(residual)
+    return origins, residuals
+
+
+def _residuals_for_angles_batch(tables, cos_phis: Sequence[float],
+                                sin_phis: Sequence[float]) -> List[Tuple[List[Tuple[float, float]], List[float]]]:
+    return [_residuals_for_angles(rows, cos_phis, sin_phis) for rows in tables]
+
+
+def _line_distances(rows, origin: Tuple[float, float], cos_phi: float, sin_phi: float) -> List[float]:
+    x0, y0 = origin
+    out = []
+    for qx, qy, ca, sa in rows:
+        dx = ca * cos_phi - sa * sin_phi
+        dy = sa * cos_phi + ca * sin_phi
+        out.append(abs(dx * (y0 - qy) - dy * (x0 - qx)))
+    return out
+
+
+class PythonBackend:
+    """Implémentation de référence en Python pur."""
+
+    name = 'python'
+
+    def prepare(self, observations: List[Dict]):
+        return _base_directions(observations)
+
+    def least_squares_origin(self, lines: List[Line],
+                             weights: Optional[Sequence[float]] = None) -> Tuple[float, float]:
+        """
+        Origine minimisant la somme (pondérée si weights est fourni) des
+        carrés des distances aux droites.
+        """
+        if len(lines) == 0:
+            return (0.0, 0.0)
+
+        # Construction de la matrice normale A et du vecteur b
+        a11, a12, a22 = 0.0, 0.0, 0.0
+        b1, b2 = 0.0, 0.0
+
+        for k, ((qx, qy), (dx, dy)) in enumerate(lines):
+            # Normalisation de la direction
+            norm = math.hypot(dx, dy)
+            if norm < 1e-12:
+                continue
+            dx, dy = dx / norm, dy / norm
+            w = 1.0 if weights is None else weights[k]
+
+            # Contributions au système normal
+            # Équation de droite: dy*x - dx*y = dy*qx - dx*qy
+            a11 += w * dy * dy
+            a12 -= w * dy * dx
+            a22 += w * dx * dx
+
+            rhs = dy * qx - dx * qy
+            b1 += w * dy * rhs
+            b2 -= w * dx * rhs
+
+        # Résolution du système 2x2
+        det = a11 * a22 - a12 * a12
+        if abs(det) < 1e-12:
+            # Système singulier, on retourne le barycentre des points q
+            xs = [q[0] for q, d in lines]
+            ys = [q[1] for q, d in lines]
+            return (sum(xs) / len(xs), sum(ys) / len(ys))
+
+        x0 = (a22 * b1 - a12 * b2) / det
+        y0 = (a11 * b2 - a12 * b1) / det
+
+        return (x0, y0)
+
+    def residual_for_phi(self, prepared, cos_phi: float, sin_phi: float) -> Tuple[Tuple[float, float], float]:
+        """Origine optimale et résiduel moyen pour un angle φ."""
+        return _residual_for_phi(prepared, cos_phi, sin_phi)
+
+    def residuals_for_angles(self, prepared, cos_phis: Sequence[float],
+                             sin_phis: Sequence[float]) -> Tuple[List[Tuple[float, float]], List[float]]:
+        """Origines et résiduels pour une suite d'angles (cos φ, sin φ)."""
+        return _residuals_for_angles(prepared, cos_phis, sin_phis)
+
+    def residuals_for_angles_batch(self, prepared_tables: Sequence, cos_phis: Sequence[float],
+                                   sin_phis: Sequence[float]) -> List[Tuple[List[Tuple[float, float]], List[float]]]:
+        """
+        residuals_for_angles pour plusieurs tables et une même suite d'angles.
+
+        Retourne un couple (origins, residuals) par table, dans l'ordre.
+        """
+        return _residuals_for_angles_batch(prepared_tables, cos_phis, sin_phis)
+
+    def line_distances(self, prepared, origin: Tuple[float, float],
+                       cos_phi: float, sin_phi: float) -> List[float]:
+        """Distance de origin à la droite de chaque observation pour l'angle φ."""
+        return _line_distances(prepared, origin, cos_phi, sin_phi)
+
+
+class _Prepared:
+    """Observations préparées : lignes Python et, à la demande, colonnes NumPy."""
+
+    __slots__ = ('rows', '_columns', '_np')
+
+    def __init__(self, rows: List[Tuple[float, float, float, float]], np):
+        self.rows = rows
+        self._columns = None
+        self._np = np
+
+    @property
+    def columns(self):
+        """(qx, qy, cos, sin) sous forme de tableaux contigus."""
+        if self._columns is None:
+            data = self._np.array(self.rows, dtype=float).reshape(-1, 4)
+            self._columns = tuple(self._np.ascontiguousarray(data[:, k]) for k in range(4))
+        return self._columns
+
+
+class NumpyBackend(PythonBackend):
+    """
+    Noyaux vectorisés : un balayage d'angles est une seule opération matricielle.
+
+    En dessous de MIN_VECTOR_WORK (angles × observations), le coût d'appel
+    dépasse le gain et les noyaux Python de référence sont utilisés.
+
+    Un lot de tables est complété par des observations nulles (direction
+    (0, 0), sans effet sur le système normal ni sur les distances) jusqu'à
+    la plus grande table, puis traité comme un tableau tables × angles ×
+    observations, par blocs d'au plus BATCH_CELLS cellules.
+    """
+
+    name = 'numpy'
+    MIN_VECTOR_WORK = 256
+    BATCH_CELLS = 1 << 21
+
+    def __init__(self):
+        import numpy
+        self.np = numpy
+
+    def prepare(self, observations: List[Dict]):
+        return _Prepared(_base_directions(observations), self.np)
+
+    def least_squares_origin(self, lines: List[Line],
+                             weights: Optional[Sequence[float]] = None) -> Tuple[float, float]:
+        np = self.np
+        if len(lines) < self.MIN_VECTOR_WORK:
+            return PythonBackend.least_squares_origin(self, lines, weights)
+        data = np.array([(q[0], q[1], d[0], d[1]) for q, d in lines], dtype=float)
+        qx, qy, dx, dy = data.T
+        w = 1.0 if weights is None else np.asarray(weights, dtype=float)
+        norm = np.hypot(dx, dy)
+        keep = norm >= 1e-12
+        dx = np.where(keep, dx / np.where(keep, norm, 1.0), 0.0)
+        dy = np.where(keep, dy / np.where(keep, norm, 1.0), 0.0)
+        rhs = dy * qx - dx * qy
+        a11, a12, a22 = (w * dy * dy).sum(), -(w * dy * dx).sum(), (w * dx * dx).sum()
+        b1, b2 = (w * dy * rhs).sum(), -(w * dx * rhs).sum()
+        det = a11 * a22 - a12 * a12
+        if abs(det) < 1e-12:
+            return (float(qx.mean()), float(qy.mean()))
+        return (float((a22 * b1 - a12 * b2) / det), float((a11 * b2 - a12 * b1) / det))
+
+    def residual_for_phi(self, prepared, cos_phi: float, sin_phi: float) -> Tuple[Tuple[float, float], float]:
+        if len(prepared.rows) < self.MIN_VECTOR_WORK:
+            return _residual_for_phi(prepared.rows, cos_phi, sin_phi)
+        origins, residuals = self.residuals_for_angles(prepared, [cos_phi], [sin_phi])
+        return (origins[0], residuals[0])
+
+    def residuals_for_angles(self, prepared, cos_phis: Sequence[float],
+                             sin_phis: Sequence[float]) -> Tuple[List[Tuple[float, float]], List[float]]:
+        np = self.np
+        n_angles = len(cos_phis)
+        if not prepared.rows:
+            return [(0.0, 0.0)] * n_angles, [float('inf')] * n_angles
+        if n_angles * len(prepared.rows) < self.MIN_VECTOR_WORK:
+            return _residuals_for_angles(prepared.rows, cos_phis, sin_phis)
+        qx, qy, ca, sa = prepared.columns
+        cp = np.asarray(cos_phis, dtype=float)[:, None]
+        sp = np.asarray(sin_phis, dtype=float)[:, None]
+        # Une ligne par angle, une colonne par observation
+        dx = ca * cp - sa * sp
+        dy = sa * cp + ca * sp
+        rhs = dy * qx - dx * qy
+        a11 = (dy * dy).sum(axis=1)
+        a12 = -(dy * dx).sum(axis=1)
+        a22 = (dx * dx).sum(axis=1)
+        b1 = (dy * rhs).sum(axis=1)
+        b2 = -(dx * rhs).sum(axis=1)
+        det = a11 * a22 - a12 * a12
+        singular = np.abs(det) < 1e-12
+        safe_det = np.where(singular, 1.0, det)
+        x0 = np.where(singular, qx.mean(), (a22 * b1 - a12 * b2) / safe_det)
+        y0 = np.where(singular, qy.mean(), (a11 * b2 - a12 * b1) / safe_det)
+        residuals = np.abs(dx * (y0[:, None] - qy) - dy * (x0[:, None] - qx)).mean(axis=1)
+        return list(zip(x0.tolist(), y0.tolist())), residuals.tolist()
+
+    def residuals_for_angles_batch(self, prepared_tables: Sequence, cos_phis: Sequence[float],
+                                   sin_phis: Sequence[float]) -> List[Tuple[List[Tuple[float, float]], List[float]]]:
+        sizes = [len(prepared.rows) for prepared in prepared_tables]
+        if len(cos_phis) * sum(sizes) < self.MIN_VECTOR_WORK:
+            return _residuals_for_angles_batch([p.rows for p in prepared_tables], cos_phis, sin_phis)
+        out = []
+        width = max(max(sizes), 1)
+        block = max(1, self.BATCH_CELLS // (len(cos_phis) * width))
+        for start in range(0, len(prepared_tables), block):
+            out.extend(self._batch_block(prepared_tables[start:start + block],
+                                         sizes[start:start + block], cos_phis, sin_phis))
+        return out
+
+    def _batch_block(self, prepared_tables: Sequence, sizes: List[int], cos_phis: Sequence[float],
+                     sin_phis: Sequence[float]) -> List[Tuple[List[Tuple[float, float]], List[float]]]:
+        np = self.np
+        n_angles = len(cos_phis)
+        # (tables, observations) complétés par des zéros
+        data = np.zeros((4, len(sizes), max(max(sizes), 1)))
+        for t, prepared in enumerate(prepared_tables):
+            if sizes[t]:
+                data[:, t, :sizes[t]] = prepared.columns
+        qx, qy, ca, sa = (column[:, None, :] for column in data)
+        cp = np.asarray(cos_phis, dtype=float)[None, :, None]
+        sp = np.asarray(sin_phis, dtype=float)[None, :, None]
+        # Tableau tables × angles × observations
+        dx = ca * cp - sa * sp
+        dy = sa * cp + ca * sp
+        rhs = dy * qx - dx * qy
+        a11 = (dy * dy).sum(axis=2)
+        a12 = -(dy * dx).sum(axis=2)
+        a22 = (dx * dx).sum(axis=2)
+        b1 = (dy * rhs).sum(axis=2)
+        b2 = -(dx * rhs).sum(axis=2)
+        det = a11 * a22 - a12 * a12
+        count = np.maximum(np.asarray(sizes, dtype=float), 1.0)[:, None]
+        singular = np.abs(det) < 1e-12
+        safe_det = np.where(singular, 1.0, det)
+        x0 = np.where(singular, qx.sum(axis=2) / count, (a22 * b1 - a12 * b2) / safe_det)
+        y0 = np.where(singular, qy.sum(axis=2) / count, (a11 * b2 - a12 * b1) / safe_det)
+        residuals = np.abs(dx * (y0[:, :, None] - qy) - dy * (x0[:, :, None] - qx)).sum(axis=2) / count
+        out = []
+        for t, size in enumerate(sizes):
+            if size == 0:
+                out.append(([(0.0, 0.0)] * n_angles, [float('inf')] * n_angles))
+            else:
+                out.append((list(zip(x0[t].tolist(), y0[t].tolist())), residuals[t].tolist()))
+        return out
+
+    def line_distances(self, prepared, origin: Tuple[float, float],
+                       cos_phi: float, sin_phi: float) -> List[float]:
+        if len(prepared.rows) < self.MIN_VECTOR_WORK:
+            return _line_distances(prepared.rows, origin, cos_phi, sin_phi)
+        qx, qy, ca, sa = prepared.columns
+        dx = ca * cos_phi - sa * sin_phi
+        dy = sa * cos_phi + ca * sin_phi
+        return self.np.abs(dx * (origin[1] - qy) - dy * (origin[0] - qx)).tolist()
+
+
+def _build_numba_kernels():
+    """Compile (à la première utilisation) les noyaux Numba."""
+    import numba
+    import numpy as np
+
+    @numba.njit(cache=True)
+    def residuals_for_angles(qx, qy, ca, sa, cos_phis, sin_phis):
+        n = qx.shape[0]
+        m = cos_phis.shape[0]
+        x_out = np.empty(m)
+        y_out = np.empty(m)
+        r_out = np.empty(m)
+        for k in range(m):
+            cp = cos_phis[k]
+            sp = sin_phis[k]
+            a11 = a12 = a22 = b1 = b2 = 0.0
+            for i in range(n):
+                dx = ca[i] * cp - sa[i] * sp
+                dy = sa[i] * cp + ca[i] * sp
+                rhs = dy * qx[i] - dx * qy[i]
+                a11 += dy * dy
+                a12 -= dy * dx
+                a22 += dx * dx
+                b1 += dy * rhs
+                b2 -= dx * rhs
+            det = a11 * a22 - a12 * a12
+            if abs(det) < 1e-12:
+                x0 = qx.mean()
+                y0 = qy.mean()
+            else:
+                x0 = (a22 * b1 - a12 * b2) / det
+                y0 = (a11 * b2 - a12 * b1) / det
+            total = 0.0
+            for i in range(n):
+                dx = ca[i] * cp - sa[i] * sp
+                dy = sa[i] * cp + ca[i] * sp
+                total += abs(dx * (y0 - qy[i]) - dy * (x0 - qx[i]))
+            x_out[k] = x0
+            y_out[k] = y0
+            r_out[k] = total / n
+        return x_out, y_out, r_out
+
+    @numba.njit(cache=True)
+    def residuals_for_angles_batch(qx, qy, ca, sa, offsets, cos_phis, sin_phis):
+        # Table t : observations offsets[t] à offsets[t + 1] des colonnes concaténées
+        n_tables = offsets.shape[0] - 1
+        m = cos_phis.shape[0]
+        x_out = np.zeros((n_tables, m))
+        y_out = np.zeros((n_tables, m))
+        r_out = np.full((n_tables, m), np.inf)
+        for t in range(n_tables):
+            lo = offsets[t]
+            hi = offsets[t + 1]
+            if hi == lo:
+                continue
+            for k in range(m):
+                cp = cos_phis[k]
+                sp = sin_phis[k]
+                a11 = a12 = a22 = b1 = b2 = 0.0
+                for i in range(lo, hi):
+                    dx = ca[i] * cp - sa[i] * sp
+                    dy = sa[i] * cp + ca[i] * sp
+                    rhs = dy * qx[i] - dx * qy[i]
+                    a11 += dy * dy
+                    a12 -= dy * dx
+                    a22 += dx * dx
+                    b1 += dy * rhs
+                    b2 -= dx * rhs
+                det = a11 * a22 - a12 * a12
+                if abs(det) < 1e-12:
+                    x0 = qx[lo:hi].mean()
+                    y0 = qy[lo:hi].mean()
+                else:
+                    x0 = (a22 * b1 - a12 * b2) / det
+                    y0 = (a11 * b2 - a12 * b1) / det
+                total = 0.0
+                for i in range(lo, hi):
+                    dx = ca[i] * cp - sa[i] * sp
+                    dy = sa[i] * cp + ca[i] * sp
+                    total += abs(dx * (y0 - qy[i]) - dy * (x0 - qx[i]))
+                x_out[t, k] = x0
+                y_out[t, k] = y0
+                r_out[t, k] = total / (hi - lo)
+        return x_out, y_out, r_out
+
+    @numba.njit(cache=True)
+    def line_distances(qx, qy, ca, sa, x0, y0, cp, sp):
+        out = np.empty(qx.shape[0])
+        for i in range(qx.shape[0]):
+            dx = ca[i] * cp - sa[i] * sp
+            dy = sa[i] * cp + ca[i] * sp
+            out[i] = abs(dx * (y0 - qy[i]) - dy * (x0 - qx[i]))
+        return out
+
+    return residuals_for_angles, residuals_for_angles_batch, line_distances
+
+
+class NumbaBackend(NumpyBackend):
+    """Noyaux compilés par Numba (boucles explicites, sans tableaux intermédiaires)."""
+
+    name = 'numba'
+    MIN_VECTOR_WORK = 32
+
+    def __init__(self):
+        super().__init__()
+        self._residuals, self._residuals_batch, self._distances = _build_numba_kernels()
+
+    def residuals_for_angles(self, prepared, cos_phis: Sequence[float],
+                             sin_phis: Sequence[float]) -> Tuple[List[Tuple[float, float]], List[float]]:
+        np = self.np
+        if not prepared.rows:
+            return [(0.0, 0.0)] * len(cos_phis), [float('inf')] * len(cos_phis)
+        if len(cos_phis) * len(prepared.rows) < self.MIN_VECTOR_WORK:
+            return _residuals_for_angles(prepared.rows, cos_phis, sin_phis)
+        qx, qy, ca, sa = prepared.columns
+        x0, y0, residuals = self._residuals(qx, qy, ca, sa,
+                                            np.asarray(cos_phis, dtype=float),
+                                            np.asarray(sin_phis, dtype=float))
+        return list(zip(x0.tolist(), y0.tolist())), residuals.tolist()
+
+    def residuals_for_angles_batch(self, prepared_tables: Sequence, cos_phis: Sequence[float],
+                                   sin_phis: Sequence[float]) -> List[Tuple[List[Tuple[float, float]], List[float]]]:
+        np = self.np
+        sizes = [len(prepared.rows) for prepared in prepared_tables]
+        if len(cos_phis) * sum(sizes) < self.MIN_VECTOR_WORK:
+            return _residuals_for_angles_batch([p.rows for p in prepared_tables], cos_phis, sin_phis)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(sizes)
+        columns = [p.columns for p in prepared_tables if p.rows]
+        qx, qy, ca, sa = (np.concatenate([c[k] for c in columns]) for k in range(4))
+        x0, y0, residuals = self._residuals_batch(qx, qy, ca, sa, offsets,
+                                                  np.asarray(cos_phis, dtype=float),
+                                                  np.asarray(sin_phis, dtype=float))
+        return [(list(zip(x0[t].tolist(), y0[t].tolist())), residuals[t].tolist())
+                for t in range(len(sizes))]
+
+    def line_distances(self, prepared, origin: Tuple[float, float],
+                       cos_phi: float, sin_phi: float) -> List[float]:
+        if len(prepared.rows) < self.MIN_VECTOR_WORK:
+            return _line_distances(prepared.rows, origin, cos_phi, sin_phi)
+        qx, qy, ca, sa = prepared.columns
+        return self._distances(qx, qy, ca, sa, float(origin[0]), float(origin[1]),
+                               cos_phi, sin_phi).tolist()
+
+
+BACKENDS = {
+    'python': PythonBackend,
+    'numpy': NumpyBackend,
+    'numba': NumbaBackend,
+}
+
+# Ordre de préférence du mode 'auto'
+AUTO_ORDER = ('numba', 'numpy', 'python')
+
+_instances: Dict[str, PythonBackend] = {}
+_current: Optional[PythonBackend] = None
+
+
+def load_backend(name: str) -> PythonBackend:
+    """Instancie (une fois) le backend demandé. Lève ImportError si sa dépendance manque."""
+    if name not in BACKENDS:
+        raise ValueError(f"Backend inconnu : {name!r} (choix : {', '.join(BACKENDS)}, auto)")
+    backend = _instances.get(name)
+    if backend is None:
+        backend = _instances[name] = BACKENDS[name]()
+    return backend
+
+
+def available_backends() -> List[str]:
+    """Noms des backends utilisables dans cet environnement."""
+    names = []
+    for name in BACKENDS:
+        try:
+            load_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name: str = 'auto') -> PythonBackend:
+    """
+    Sélectionne le backend utilisé par table.py.
+
+    'auto' retient le premier backend disponible dans AUTO_ORDER. Un backend
+    nommé explicitement lève ImportError si sa dépendance est absente.
+    """
+    global _current
+    if name == 'auto':
+        for candidate in AUTO_ORDER:
+            try:
+                _current = load_backend(candidate)
+                break
+            except ImportError:
+                continue
+    else:
+        _current = load_backend(name)
+    return _current
+
+
+def get_backend() -> PythonBackend:
+    """Backend courant (initialisé depuis TABLE_BACKEND, 'auto' par défaut)."""
+    if _current is None:
+        return set_backend(os.environ.get('TABLE_BACKEND', 'auto'))
+    return _current
@@ -0,0 +1,163 @@
+"""
+Suite de benchmarks des méthodes de estimate_origin_and_phi.
+
+Chaque méthode est chronométrée sur des tables synthétiques paramétrées
+(nombre de curiosités, bruit de gravure, proportion d'outliers), avec
+échauffement, répétitions et statistiques. Les résultats sont enregistrés
+en JSON et peuvent être comparés à une référence pour détecter les
+régressions de performance.
+
+Exemples :
+    python benchmark.py --sizes 3 10 100 --repeat 5 --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import backends
+from scenario_generator import LAYOUTS, generate_table
+from table import estimate_origin_and_phi
+
+METHODS = ['ransac', 'irls', 'adaptive', 'ternary', 'multi-start', 'gradient', 'legacy']
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Statistiques d'une série de temps (en ms)."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(math.ceil(0.95 * len(ordered))) - 1)
+    return {
+        'min': ordered[0],
+        'median': statistics.median(ordered),
+        'mean': statistics.fmean(ordered),
+        'stdev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'p95': ordered[p95_index],
+        'runs': len(ordered),
+    }
+
+
+def time_method(observations: List[Dict], method: str, repeat: int, warmup: int) -> Tuple[Dict[str, float], float]:
+    """Chronomètre une méthode. Retourne (statistiques en ms, résiduel obtenu)."""
+    residual = float('nan')
+    samples = []
+    for run in range(warmup + repeat):
+        random.seed(run)
+        t0 = time.perf_counter()
+        residual = estimate_origin_and_phi(observations, method=method).residual
+        elapsed = time.perf_counter() - t0
+        if run >= warmup:
+            samples.append(elapsed * 1000.0)
+    return summarize(samples), residual
+
+
+def run_suite(methods: List[str], sizes: List[int], noises: List[float], outliers: List[float],
+              repeat: int, warmup: int, seed: int, layout: str = 'ring') -> Dict:
+    """Exécute toutes les combinaisons et retourne le rapport JSON."""
+    results = []
+    for n in sizes:
+        for noise in noises:
+            for outlier_ratio in outliers:
+                observations = generate_table(n, layout, noise, outlier_ratio, seed=seed)['observations']
+                for method in methods:
+                    stats, residual = time_method(observations, method, repeat, warmup)
+                    results.append({
+                        'method': method,
+                        'n': n,
+                        'noise_deg': noise,
+                        'outlier_ratio': outlier_ratio,
+                        'time_ms': stats,
+                        'residual': residual,
+                    })
+                    print(f"   {method:<12} n={n:<6} bruit={noise:<5} outliers={outlier_ratio:<5} "
+                          f"médiane={stats['median']:9.2f} ms  p95={stats['p95']:9.2f} ms")
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'warmup': warmup,
+            'seed': seed,
+            'layout': layout,
+            'backend': backends.get_backend().name,
+        },
+        'results': results,
+    }
+
+
+def _case_key(entry: Dict) -> Tuple:
+    return (entry['method'], entry['n'], entry['noise_deg'], entry['outlier_ratio'])
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Compare les médianes à une référence.
+
+    Returns:
+        Liste des régressions (médiane > référence * (1 + tolerance))
+    """
+    reference = {_case_key(e): e for e in baseline['results']}
+    regressions = []
+    for entry in report['results']:
+        ref = reference.get(_case_key(entry))
+        if ref is None:
+            continue
+        ratio = entry['time_ms']['median'] / max(ref['time_ms']['median'], 1e-9)
+        if ratio > 1.0 + tolerance:
+            regressions.append({'case': _case_key(entry), 'ratio': ratio,
+                                'median_ms': entry['time_ms']['median'],
+                                'baseline_ms': ref['time_ms']['median']})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark des méthodes d'estimation")
+    parser.add_argument('--methods', nargs='+', default=METHODS, choices=METHODS)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[3, 10, 100, 1000],
+                        help="Nombres de curiosités (jusqu'à 10000)")
+    parser.add_argument('--noise', nargs='+', type=float, default=[0.0, 0.5],
+                        help="Écart-type du bruit de gravure (degrés)")
+    parser.add_argument('--outliers', nargs='+', type=float, default=[0.0, 0.2],
+                        help="Proportions d'outliers")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--layout', default='ring', choices=LAYOUTS,
+                        help="Disposition des curiosités")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help="Fichier JSON de référence")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Ralentissement relatif toléré avant régression")
+    parser.add_argument('--backend', default='auto', choices=['auto', *backends.BACKENDS],
+                        help="Backend de calcul (voir backends.py)")
+    args = parser.parse_args()
+    backends.set_backend(args.backend)
+
+    print("=" * 60)
+    print("Benchmark des méthodes d'estimation")
+    print("=" * 60)
+    report = run_suite(args.methods, args.sizes, args.noise, args.outliers,
+                       args.repeat, args.warmup, args.seed, args.layout)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Résultats enregistrés dans : {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} régression(s) de performance :")
+            for r in regressions:
+                print(f"   {r['case']}: {r['median_ms']:.2f} ms vs {r['baseline_ms']:.2f} ms (x{r['ratio']:.2f})")
+            sys.exit(1)
+        print("\n✅ Aucune régression par rapport à la référence.")
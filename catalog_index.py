@@ -0,0 +1,420 @@
+"""
+Index spatial d'un catalogue de curiosités et appariement automatique.
+
+Pour restaurer une table, on ne dispose souvent que des inscriptions
+gravées (libellé, azimut) et d'un grand catalogue de sommets et de points
+remarquables ({'name', 'x', 'y'} en mètres, plan du site). Ce module
+retrouve quelle entrée du catalogue correspond à chaque azimut gravé, puis
+estime la table sur les meilleures associations.
+
+Principe :
+1. Un arbre k-d sur le catalogue limite la recherche aux entrées visibles
+   depuis la zone où se trouve la table (rayon max_distance).
+2. Chaque couple (gravure i, entrée j) vote pour l'orientation
+   φ = relèvement(site → j) - azimut_i, avec une tolérance angulaire qui
+   tient compte de l'incertitude sur la position de la table. Une gravure
+   ne vote qu'une fois par classe de φ : le score d'une classe est le
+   nombre de gravures compatibles. Les libellés reconnus restreignent les
+   candidats de leur gravure.
+3. Pour les meilleures classes de φ, les entrées candidates sont rangées
+   par tranches de relèvement (1°) : chaque gravure ne compare que les
+   entrées de la tranche visée au lieu de tout le catalogue.
+4. Un premier ajustement au voisinage de φ (sur les gravures à libellé
+   reconnu quand il y en a au moins deux) donne une origine ; les gravures
+   sont réassociées depuis cette origine puis réajustées (REFINE_ROUNDS
+   tours au plus). Le résultat passe par resolve, qui relance la recherche
+   globale de method si l'ajustement local est dégradé. L'hypothèse gardée
+   est celle qui a le plus d'inliers puis le plus petit résiduel.
+
+Exemple :
+    catalog = CuriosityCatalog(sommets)
+    match = match_engravings(gravures, catalog, site=(x0, y0), site_radius=2000)
+    print(match.result.origin, match.result.phi, match.assignments)
+"""
+
+import math
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from table import (EstimationResult, ResidualMemo, gradient_descent_phi,
+                   local_search_around_phi, normalize_deg, resolve)
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+# Nombre maximal de points d'une feuille de l'arbre k-d
+LEAF_SIZE = 16
+
+# Largeur des tranches de relèvement de l'étape d'appariement
+BEARING_BIN_DEG = 1.0
+
+# Nombre maximal de tours réassociation / ajustement par hypothèse
+REFINE_ROUNDS = 3
+
+
+def normalize_label(label: str) -> str:
+    """Forme canonique d'un nom : minuscules, sans accents ni ponctuation."""
+    decomposed = unicodedata.normalize('NFKD', label)
+    return ''.join(c for c in decomposed.lower() if c.isalnum())
+
+
+class KDTree:
+    """
+    Arbre k-d implicite (2D) sur une liste de points.
+
+    Les points sont permutés en place dans self.order : le nœud couvrant
+    [lo, hi[ est coupé à mid = (lo + hi) // 2 selon x aux profondeurs
+    paires, y aux profondeurs impaires. Aucun objet nœud n'est créé.
+    """
+
+    def __init__(self, xs: Sequence[float], ys: Sequence[float]):
+        self.xs = list(xs)
+        self.ys = list(ys)
+        self.order = list(range(len(self.xs)))
+        # Construction itérative : (lo, hi, profondeur)
+        stack = [(0, len(self.order), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            coords = self.xs if depth % 2 == 0 else self.ys
+            self.order[lo:hi] = sorted(self.order[lo:hi], key=coords.__getitem__)
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid, hi, depth + 1))
+
+    def query_radius(self, x: float, y: float, radius: float) -> List[int]:
+        """Indices des points à moins de radius de (x, y)."""
+        xs, ys, order = self.xs, self.ys, self.order
+        r2 = radius * radius
+        found = []
+        stack = [(0, len(order), 0)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                for k in order[lo:hi]:
+                    dx, dy = xs[k] - x, ys[k] - y
+                    if dx * dx + dy * dy <= r2:
+                        found.append(k)
+                continue
+            mid = (lo + hi) // 2
+            split = (xs if depth % 2 == 0 else ys)[order[mid]]
+            delta = (x if depth % 2 == 0 else y) - split
+            # Gauche : coordonnées <= split ; droite : >= split
+            if delta - radius <= 0.0:
+                stack.append((lo, mid, depth + 1))
+            if delta + radius >= 0.0:
+                stack.append((mid, hi, depth + 1))
+        return found
+
+
+class CuriosityCatalog:
+    """
+    Catalogue indexé de curiosités.
+
+    Args:
+        entries: Liste de dict {'name', 'x', 'y'} (mètres, plan du site) ;
+            les autres champs sont conservés
+    """
+
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        self.tree = KDTree([e['x'] for e in entries], [e['y'] for e in entries])
+        self.by_label: Dict[str, List[int]] = {}
+        for i, entry in enumerate(entries):
+            if entry.get('name'):
+                self.by_label.setdefault(normalize_label(entry['name']), []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def within(self, x: float, y: float, radius: float) -> List[int]:
+        return self.tree.query_radius(x, y, radius)
+
+    def lookup(self, label: str) -> List[int]:
+        """Entrées dont le nom canonique est celui de label."""
+        return self.by_label.get(normalize_label(label), [])
+
+
+@dataclass
+class CatalogMatch:
+    """
+    Résultat d'un appariement.
+
+    Attributes:
+        assignments: Indice de l'entrée du catalogue retenue pour chaque
+            gravure (None si aucune entrée compatible)
+        observations: Observations transmises à l'estimateur (gravures appariées)
+        result: Estimation sur ces observations (None si moins de 2 appariements)
+        phi_hint: Orientation de la classe de vote retenue (degrés)
+        votes: Nombre de gravures compatibles avec phi_hint
+        timings: Temps par étape ('index', 'vote', 'assign', 'solve', 'total')
+    """
+    assignments: List[Optional[int]]
+    observations: List[Dict]
+    result: Optional[EstimationResult]
+    phi_hint: float
+    votes: int
+    timings: Dict[str, float] = field(default_factory=dict)
+
+
+def _vote(bearings: List[float], slacks: List[float], options: List[List[int]],
+          azimuths: List[float], bin_deg: float) -> List[int]:
+    """
+    Histogramme des orientations compatibles : score[b] = nombre de gravures
+    ayant au moins un candidat dans la classe b.
+    """
+    n_bins = int(round(360.0 / bin_deg))
+    scores = [0] * n_bins
+    if np is not None:
+        bearings_a, slacks_a = np.asarray(bearings), np.asarray(slacks)
+    for azimuth, candidates in zip(azimuths, options):
+        if not candidates:
+            continue
+        if np is not None and len(candidates) >= 64:
+            idx = np.asarray(candidates)
+            center = (bearings_a[idx] - azimuth) % 360.0
+            slack = slacks_a[idx]
+            first = np.floor((center - slack) / bin_deg).astype(int)
+            last = np.floor((center + slack) / bin_deg).astype(int)
+            width = int((last - first).max()) + 1
+            covered = (first[:, None] + np.arange(width)[None, :])
+            covered = covered[covered <= last[:, None]] % n_bins
+            for b in np.unique(covered).tolist():
+                scores[b] += 1
+        else:
+            covered = set()
+            for j in candidates:
+                center = (bearings[j] - azimuth) % 360.0
+                first = math.floor((center - slacks[j]) / bin_deg)
+                last = math.floor((center + slacks[j]) / bin_deg)
+                covered.update(b % n_bins for b in range(first, last + 1))
+            for b in covered:
+                scores[b] += 1
+    return scores
+
+
+def match_engravings(engravings: List[Dict], catalog: CuriosityCatalog,
+                     site: Tuple[float, float], site_radius: float = 2000.0,
+                     max_distance: float = 200000.0, min_distance: float = 200.0,
+                     tolerance_deg: float = 1.0, phi_bin_deg: float = 1.0,
+                     hypotheses: int = 3, method: str = 'ransac') -> CatalogMatch:
+    """
+    Apparie des azimuts gravés aux entrées d'un catalogue et estime la table.
+
+    Args:
+        engravings: Liste de dict {'azimuth_deg', 'label' (opt)}
+        catalog: Catalogue indexé
+        site: Position approximative de la table (x, y) en mètres
+        site_radius: Incertitude sur cette position (mètres)
+        max_distance: Portée maximale des visées (mètres)
+        min_distance: Distance minimale d'une curiosité à la table (mètres)
+        tolerance_deg: Erreur tolérée sur un azimut gravé (degrés)
+        phi_bin_deg: Largeur des classes de vote sur φ (degrés)
+        hypotheses: Nombre de meilleures classes de φ essayées
+        method: Méthode de la recherche globale de repli (voir resolve)
+
+    Returns:
+        CatalogMatch
+    """
+    t0 = time.perf_counter()
+    x0, y0 = site
+    pool = catalog.within(x0, y0, max_distance + site_radius)
+
+    # Relèvement de chaque entrée depuis le site et tolérance angulaire
+    # (incertitude de position vue sous l'angle atan(site_radius / distance))
+    bearings, slacks, distances = {}, {}, {}
+    for j in pool:
+        entry = catalog.entries[j]
+        dx, dy = entry['x'] - x0, entry['y'] - y0
+        dist = math.hypot(dx, dy)
+        if dist < min_distance:
+            continue
+        bearings[j] = math.degrees(math.atan2(dy, dx)) % 360.0
+        slacks[j] = tolerance_deg + math.degrees(math.atan2(site_radius, dist))
+        distances[j] = dist
+    visible = list(bearings)
+
+    # Candidats de chaque gravure : ceux de son libellé s'il est reconnu
+    options = []
+    for engraving in engravings:
+        labelled = [j for j in catalog.lookup(engraving.get('label') or '') if j in bearings]
+        options.append(labelled if labelled else visible)
+    t1 = time.perf_counter()
+
+    # Vote sur φ (tableaux denses indexés par position dans visible)
+    position = {j: k for k, j in enumerate(visible)}
+    scores = _vote([bearings[j] for j in visible], [slacks[j] for j in visible],
+                   [[position[j] for j in cands] for cands in options],
+                   [e['azimuth_deg'] for e in engravings], phi_bin_deg)
+    n_bins = len(scores)
+    # Classes retenues : maxima locaux, les meilleurs d'abord
+    peaks = sorted((b for b in range(n_bins) if scores[b] > 0
+                    and scores[b] >= scores[(b - 1) % n_bins] and scores[b] >= scores[(b + 1) % n_bins]),
+                   key=lambda b: -scores[b])[:hypotheses]
+    t2 = time.perf_counter()
+
+    # Tranches de relèvement : comparaison limitée aux entrées de la direction visée
+    n_slices = int(round(360.0 / BEARING_BIN_DEG))
+    slices: List[List[int]] = [[] for _ in range(n_slices)]
+    for j in visible:
+        slices[int(bearings[j] / BEARING_BIN_DEG) % n_slices].append(j)
+    max_slack = max(slacks.values(), default=tolerance_deg)
+
+    reach = int(math.ceil((max_slack + phi_bin_deg) / BEARING_BIN_DEG))
+
+    def nearby(candidates: List[int], target: float) -> List[int]:
+        if candidates is not visible:
+            return candidates
+        center = int(target / BEARING_BIN_DEG)
+        return [j for s in range(center - reach, center + reach + 1) for j in slices[s % n_slices]]
+
+    def observations_for(assignments: List[Optional[int]]) -> List[Dict]:
+        return [
+            {'x': catalog.entries[j]['x'], 'y': catalog.entries[j]['y'],
+             'azimuth_deg': engraving['azimuth_deg'],
+             'name': catalog.entries[j].get('name', engraving.get('label', ''))}
+            for engraving, j in zip(engravings, assignments) if j is not None
+        ]
+
+    best: Optional[CatalogMatch] = None
+    solve_seconds = 0.0
+    for peak in peaks:
+        phi_hint = (peak + 0.5) * phi_bin_deg
+        # Première association, vue depuis le site
+        assignments: List[Optional[int]] = []
+        for engraving, candidates in zip(engravings, options):
+            target = (engraving['azimuth_deg'] + phi_hint) % 360.0
+            chosen, chosen_score = None, None
+            for j in nearby(candidates, target):
+                error = abs((bearings[j] - target + 180.0) % 360.0 - 180.0)
+                if error > slacks[j] + phi_bin_deg:
+                    continue
+                # Écart rapporté à la tolérance, puis préférence aux visées lointaines (plus précises)
+                score = (error / slacks[j], -distances[j])
+                if chosen_score is None or score < chosen_score:
+                    chosen, chosen_score = j, score
+            assignments.append(chosen)
+
+        # Amorce : les gravures à libellé reconnu si elles suffisent, sinon toutes
+        anchored = [a if options[i] is not visible else None for i, a in enumerate(assignments)]
+        seed = observations_for(anchored if sum(a is not None for a in anchored) >= 2 else assignments)
+        if len(seed) < 2:
+            candidate = CatalogMatch(assignments, observations_for(assignments), None,
+                                     normalize_deg(phi_hint), scores[peak])
+            if best is None or _better(candidate, best):
+                best = candidate
+            continue
+
+        ts = time.perf_counter()
+        memo = ResidualMemo()
+        origin, phi, resid = _fit_near(seed, phi_hint, phi_bin_deg + max_slack, memo)
+        # Réassociation depuis l'origine estimée : écart angulaire réel, sans
+        # l'incertitude du site, puis nouvel ajustement
+        for _ in range(REFINE_ROUNDS):
+            updated: List[Optional[int]] = []
+            for engraving, candidates in zip(engravings, options):
+                target = (engraving['azimuth_deg'] + phi) % 360.0
+                chosen, chosen_score = None, None
+                for j in nearby(candidates, target):
+                    entry = catalog.entries[j]
+                    dx, dy = entry['x'] - origin[0], entry['y'] - origin[1]
+                    dist = math.hypot(dx, dy)
+                    if dist < min_distance:
+                        continue
+                    error = abs((math.degrees(math.atan2(dy, dx)) - target + 180.0) % 360.0 - 180.0)
+                    if error > tolerance_deg:
+                        continue
+                    score = (error, -dist)
+                    if chosen_score is None or score < chosen_score:
+                        chosen, chosen_score = j, score
+                updated.append(chosen)
+            if updated == assignments or sum(a is not None for a in updated) < 2:
+                break
+            assignments = updated
+            origin, phi, resid = _fit_near(observations_for(assignments), phi, tolerance_deg, memo)
+
+        observations = observations_for(assignments)
+        previous = EstimationResult(origin=origin, phi=phi, residual=resid,
+                                    inlier_mask=[True] * len(observations), method=method)
+        result = resolve(previous, observations, range_deg=tolerance_deg)
+        solve_seconds += time.perf_counter() - ts
+        candidate = CatalogMatch(assignments, observations, result, normalize_deg(phi_hint), scores[peak])
+        if best is None or _better(candidate, best):
+            best = candidate
+    t3 = time.perf_counter()
+
+    if best is None:
+        best = CatalogMatch([None] * len(engravings), [], None, 0.0, 0)
+    best.timings = {'index': t1 - t0, 'vote': t2 - t1, 'assign': t3 - t2 - solve_seconds,
+                    'solve': solve_seconds, 'total': t3 - t0}
+    return best
+
+
+def _fit_near(observations: List[Dict], phi_center: float, range_deg: float,
+              memo: ResidualMemo) -> Tuple[Tuple[float, float], float, float]:
+    """Ajustement au voisinage d'une orientation connue : balayage local puis gradient."""
+    origin, phi, resid = local_search_around_phi(observations, phi_center, range_deg=range_deg,
+                                                 step_deg=0.05, memo=memo)
+    phi_g, origin_g, resid_g = gradient_descent_phi(observations, phi, learning_rate=0.1,
+                                                    max_iter=50, memo=memo)
+    if resid_g < resid:
+        return origin_g, phi_g, resid_g
+    return origin, phi, resid
+
+
+def _better(a: CatalogMatch, b: CatalogMatch) -> bool:
+    """a est-il meilleur que b : plus d'inliers, puis plus petit résiduel."""
+    if b.result is None:
+        return a.result is not None
+    if a.result is None:
+        return False
+    a_key = (-len(a.result.inliers), a.result.residual)
+    b_key = (-len(b.result.inliers), b.result.residual)
+    return a_key < b_key
+
+
+def _demo():
+    import random
+
+    print("=" * 60)
+    print("Appariement automatique d'azimuts gravés à un catalogue")
+    print("=" * 60 + "\n")
+
+    rng = random.Random(5)
+    size = 200000
+    start = time.perf_counter()
+    entries = [{'name': f"Sommet {k}", 'x': rng.uniform(-1000e3, 1000e3), 'y': rng.uniform(-1000e3, 1000e3)}
+               for k in range(size)]
+    catalog = CuriosityCatalog(entries)
+    print(f"🗂️  Catalogue de {size} entrées indexé en {time.perf_counter() - start:.2f} s")
+
+    true_origin, true_phi = (12000.0, -8000.0), 63.0
+    visible = catalog.within(*true_origin, 80000.0)
+    targets = rng.sample(visible, 10)
+    engravings = []
+    for k, j in enumerate(targets):
+        e = entries[j]
+        theta = math.degrees(math.atan2(e['y'] - true_origin[1], e['x'] - true_origin[0]))
+        engraving = {'azimuth_deg': normalize_deg(theta - true_phi + rng.gauss(0.0, 0.1))}
+        if k % 2 == 0:
+            engraving['label'] = e['name'].upper()  # Libellé gravé pour une gravure sur deux
+        engravings.append(engraving)
+
+    site = (true_origin[0] + 900.0, true_origin[1] - 700.0)
+    match = match_engravings(engravings, catalog, site, site_radius=2000.0, max_distance=100000.0)
+    correct = sum(a == t for a, t in zip(match.assignments, targets))
+    print(f"🔍 φ voté ≈ {match.phi_hint:.1f}° ({match.votes}/{len(engravings)} gravures compatibles)")
+    print(f"✅ {correct}/{len(targets)} appariements corrects")
+    if match.result is not None:
+        error = math.hypot(match.result.origin[0] - true_origin[0], match.result.origin[1] - true_origin[1])
+        print(f"✅ Origine à {error:.1f} m de la vérité, φ = {match.result.phi:.2f}° (vrai {true_phi}°)")
+    print("⏱️  " + ", ".join(f"{k} {v * 1000:.0f} ms" for k, v in match.timings.items()))
+
+
+if __name__ == "__main__":
+    _demo()
@@ -0,0 +1,241 @@
+"""
+Micro-service local d'estimation (HTTP/JSON sur TCP ou socket Unix).
+
+Un processus « chaud » partagé par plusieurs clients : pas de coût de
+démarrage Python ni d'import à chaque estimation. Les requêtes arrivant dans
+une courte fenêtre sont regroupées, par méthode, en un lot passé à
+estimate_origin_and_phi_batch : doublons résolus une seule fois et
+balayage initial de φ de toutes les tables en un passage vectorisé ; les
+affinages restent propres à chaque table. Les réponses sont ensuite
+redistribuées. L'échec d'une requête n'affecte pas les autres requêtes du
+lot.
+
+Requête :  POST /estimate  {"observations": [{"x", "y", "azimuth_deg"}, ...],
+                            "method": "ransac"}
+Réponse :  {"origin": [x, y], "phi": ..., "residual": ..., "inliers": [...],
+            "complete": true}   (valeurs non finies → null)
+
+Si la file d'attente est pleine, le serveur répond 503 (Retry-After).
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from table import METHODS, estimate_origin_and_phi_batch
+
+# Nombre minimal d'observations d'une requête (deux visées pour une intersection)
+MIN_OBSERVATIONS = 2
+
+
+class _PendingRequest:
+    """Requête en attente de son résultat."""
+
+    def __init__(self, observations: List[Dict], method: str):
+        self.observations = observations
+        self.method = method
+        self.result = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Regroupe les requêtes concurrentes en lots.
+
+    Args:
+        max_batch_size: Nombre maximal de requêtes par lot
+        batch_window: Durée maximale (s) d'attente pour compléter un lot
+        max_queue: Taille de la file ; au-delà, les requêtes sont refusées
+        solve_time_limit: Temps limite optionnel par table (s)
+    """
+
+    def __init__(self, max_batch_size: int = 32, batch_window: float = 0.005,
+                 max_queue: int = 256, solve_time_limit: Optional[float] = None):
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.solve_time_limit = solve_time_limit
+        self.queue: "queue.Queue[_PendingRequest]" = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, observations: List[Dict], method: str) -> _PendingRequest:
+        """Ajoute une requête à la file. Lève queue.Full si elle est pleine."""
+        pending = _PendingRequest(observations, method)
+        self.queue.put_nowait(pending)
+        return pending
+
+    def _collect(self) -> List[_PendingRequest]:
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            by_method: Dict[str, List[_PendingRequest]] = {}
+            for pending in batch:
+                by_method.setdefault(pending.method, []).append(pending)
+            for method, group in by_method.items():
+                try:
+                    results = estimate_origin_and_phi_batch(
+                        [p.observations for p in group], method=method,
+                        time_limit=self.solve_time_limit, return_exceptions=True
+                    )
+                except Exception as exc:
+                    results = [exc] * len(group)
+                # Erreur attachée à la seule requête fautive
+                for pending, result in zip(group, results):
+                    if isinstance(result, Exception):
+                        pending.error = str(result)
+                    else:
+                        pending.result = result
+                    pending.done.set()
+
+
+class EstimationRequestHandler(BaseHTTPRequestHandler):
+    """Gestionnaire HTTP : POST /estimate et GET /health."""
+
+    server_version = "TableEstimation/1.0"
+
+    def address_string(self) -> str:
+        # Sur socket Unix, client_address est une chaîne vide
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+        body = json.dumps(payload, allow_nan=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "queued": self.server.batcher.queue.qsize()})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path != "/estimate":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            observations = [
+                {'x': float(o['x']), 'y': float(o['y']), 'azimuth_deg': float(o['azimuth_deg'])}
+                for o in request['observations']
+            ]
+            method = request.get('method', 'ransac')
+            if method not in METHODS:
+                raise ValueError(f"méthode inconnue {method!r}")
+            if len(observations) < MIN_OBSERVATIONS:
+                raise ValueError(f"au moins {MIN_OBSERVATIONS} observations attendues")
+            if not all(math.isfinite(v) for o in observations for v in o.values()):
+                raise ValueError("valeurs non finies dans les observations")
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send_json(400, {"error": f"requête invalide : {exc}"})
+            return
+
+        try:
+            pending = self.server.batcher.submit(observations, method)
+        except queue.Full:
+            self._send_json(503, {"error": "file d'attente pleine"}, {"Retry-After": "1"})
+            return
+
+        if not pending.done.wait(self.server.request_timeout):
+            self._send_json(504, {"error": "délai dépassé"})
+            return
+        if pending.error is not None:
+            self._send_json(500, {"error": pending.error})
+            return
+
+        result = pending.result
+        origin = result.origin if result.origin is not None else (None, None)
+        self._send_json(200, {
+            "origin": [_json_number(v) for v in origin],
+            "phi": _json_number(result.phi),
+            "residual": _json_number(result.residual),
+            "inliers": result.inliers,
+            "complete": result.complete,
+        })
+
+
+def _json_number(value: Optional[float]) -> Optional[float]:
+    """Nombre JSON valide : les valeurs non finies (inf, NaN) deviennent null."""
+    if value is None or not math.isfinite(value):
+        return None
+    return value
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8765, unix_socket: Optional[str] = None,
+                  max_batch_size: int = 32, batch_window: float = 0.005, max_queue: int = 256,
+                  solve_time_limit: Optional[float] = None, request_timeout: float = 30.0,
+                  verbose: bool = False):
+    """
+    Crée le serveur (sans le démarrer). Appeler serve_forever() ensuite.
+
+    Si unix_socket est fourni, le serveur écoute sur ce chemin au lieu de TCP.
+    """
+    if unix_socket is not None:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        server = _UnixHTTPServer(unix_socket, EstimationRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), EstimationRequestHandler)
+    server.batcher = MicroBatcher(max_batch_size, batch_window, max_queue, solve_time_limit)
+    server.request_timeout = request_timeout
+    server.verbose = verbose
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-service local d'estimation de tables d'orientation")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", default=None, help="Chemin d'un socket Unix (remplace TCP)")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--solve-time-limit", type=float, default=None, help="Temps limite par table (s)")
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.unix_socket, args.max_batch_size,
+                           args.batch_window_ms / 1000.0, args.max_queue,
+                           args.solve_time_limit, args.request_timeout, args.verbose)
+    where = args.unix_socket or f"http://{args.host}:{args.port}"
+    print(f"🚀 Serveur d'estimation à l'écoute sur {where}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
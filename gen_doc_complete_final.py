@@ -562,13 +562,14 @@ story.append(Spacer(1, 0.3*cm))
 main_explanation = """
 <b>★ POINT D'ENTRÉE UNIFIÉ ★</b>
 <br/><br/><b>SIGNATURE:</b>
-<br/>def estimate_origin_and_phi(observations, method='ransac', return_inliers=False)
+<br/>def estimate_origin_and_phi(observations, method='ransac', return_stats=False)
 <br/><br/><b>PARAMÈTRES:</b>
 <br/>• <b>observations</b>: Liste de dict avec clés 'x', 'y', 'azimuth_deg'
-<br/>• <b>method</b>: 'ransac' | 'adaptive' | 'ternary' | 'multi-start' | 'gradient' | 'legacy'
-<br/>• <b>return_inliers</b>: Si True, retourne aussi les indices des inliers
+<br/>• <b>method</b>: 'ransac' | 'irls' | 'adaptive' | 'ternary' | 'multi-start' | 'gradient' | 'legacy'
+<br/>• <b>return_stats</b>: Si True, joint les compteurs d'instrumentation au résultat
 <br/><br/><b>RETOUR:</b>
-<br/>(origin, phi, residual) ou (origin, phi, residual, inlier_indices)
+<br/>EstimationResult : origin, phi, residual, inlier_mask, method, timings,
+iterations, complete (et stats si demandé, weights pour 'irls')
 <br/><br/><b>MODES DISPONIBLES:</b>
 <br/><br/><b>1. 'ransac'</b> (RECOMMANDÉ PAR DÉFAUT)
 <br/>   ✓ Robuste aux outliers
@@ -596,6 +597,12 @@ main_explanation = """
 <br/>   ✓ Balayage complet
 <br/>   ✗ TRÈS LENT
 <br/>   → Seulement pour benchmark
+<br/><br/><b>7. 'irls'</b>
+<br/>   ✓ M-estimateur Huber puis Tukey, déterministe
+<br/>   ✓ Quelques résolutions pondérées au lieu de 100 hypothèses
+<br/>   ✓ Poids par observation (result.weights)
+<br/>   ✗ Moins robuste que RANSAC au-delà d'environ 30 % d'outliers
+<br/>   → Alternative rapide à RANSAC
 <br/><br/><b>RECOMMANDATIONS:</b>
 <br/>• Si n = 3: method='ternary'
 <br/>• Si n ≥ 4: method='ransac' (par défaut)
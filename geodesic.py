@@ -0,0 +1,298 @@
+"""
+Estimation en mode géodésique pour les visées lointaines.
+
+Les curiosités d'une table sont souvent des sommets à 50–200 km. À ces
+distances, les droites du modèle plan de table.py s'écartent des visées
+réelles : le plan tangent ne suit plus la courbure de l'ellipsoïde et les
+méridiens convergent.
+
+Ici la visée est modélisée par la section normale de l'ellipsoïde WGS84
+depuis la table : la direction de la curiosité est celle de son vecteur
+ECEF exprimé dans le repère local (Est, Nord) de la table, comme le voit
+un instrument posé sur la table (réfraction négligée). Même convention que
+table.py : azimut + φ = atan2(Nord, Est), à 180° près.
+
+Le résiduel d'une curiosité est sa distance à la visée dans le plan
+horizontal de la table ; c'est le résiduel en mètres du modèle plan, qui
+sert de départ : la solution plane (dans le plan tangent du site) fournit
+les inliers, puis quelques itérations de Gauss-Newton sur (x, y, φ) ajustent
+la solution géodésique.
+
+Précalcul par site (GeodesicSite) : positions ECEF et cos/sin des azimuts
+des curiosités, une fois pour toutes ; chaque évaluation n'est plus qu'une
+rotation et quelques opérations par point, vectorisées avec numpy pour les
+grands lots.
+
+Observations : {'x': longitude, 'y': latitude, 'azimuth_deg'} (convention
+use_latlon de visualize_map). L'origine retournée est (longitude, latitude).
+"""
+
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import metrics
+from projection import (MIN_VECTOR_POINTS, WGS84_A, WGS84_E2, LocalTangentPlane, get_projection,
+                        np, project_observations)
+from result_cache import ResultCache
+from table import (EstimationResult, SolveBudget, _exhausted, _tick, compute_residual_for_phi,
+                   estimate_origin_and_phi, normalize_deg)
+
+# Pas des différences finies du jacobien : mètres (x, y) et radians (φ)
+_STEPS = (0.01, 0.01, 1e-7)
+
+# Arrêt de Gauss-Newton : déplacement sous 0,1 mm et 1e-9 rad
+_TOLERANCES = (1e-4, 1e-4, 1e-9)
+MAX_ITERATIONS = 20
+
+
+def _ecef(lat_deg: float, lon_deg: float) -> Tuple[float, float, float]:
+    """Position ECEF d'un point de l'ellipsoïde (altitude nulle)."""
+    phi, lam = math.radians(lat_deg), math.radians(lon_deg)
+    n = WGS84_A / math.sqrt(1.0 - WGS84_E2 * math.sin(phi) ** 2)
+    return (n * math.cos(phi) * math.cos(lam), n * math.cos(phi) * math.sin(lam),
+            n * (1.0 - WGS84_E2) * math.sin(phi))
+
+
+def _local_en(tx, ty, tz, station: Tuple):
+    """
+    Composantes (Est, Nord) des curiosités dans le repère local de la table.
+
+    tx, ty, tz sont des scalaires ou des tableaux numpy (seules des
+    opérations arithmétiques sont utilisées).
+
+    Args:
+        station: (X, Y, Z, sin lat, cos lat, sin lon, cos lon) de la table
+    """
+    px, py, pz, s_lat, c_lat, s_lon, c_lon = station
+    dx, dy, dz = tx - px, ty - py, tz - pz
+    east = -s_lon * dx + c_lon * dy
+    north = -s_lat * (c_lon * dx + s_lon * dy) + c_lat * dz
+    return east, north
+
+
+def _station(lat_deg: float, lon_deg: float) -> Tuple:
+    """Position ECEF et rotation locale d'une table en (lat, lon)."""
+    lat, lon = math.radians(lat_deg), math.radians(lon_deg)
+    return _ecef(lat_deg, lon_deg) + (math.sin(lat), math.cos(lat), math.sin(lon), math.cos(lon))
+
+
+def _cross_track(tx, ty, tz, ca, sa, station: Tuple, cos_phi: float, sin_phi: float):
+    """Distances signées (mètres) des curiosités à leurs visées depuis station."""
+    east, north = _local_en(tx, ty, tz, station)
+    # Direction de visée : angle azimut + φ (les droites n'ont pas de sens)
+    cb = ca * cos_phi - sa * sin_phi
+    sb = sa * cos_phi + ca * sin_phi
+    return east * sb - north * cb
+
+
+class GeodesicSite:
+    """
+    Précalcul d'un jeu d'observations en longitude/latitude.
+
+    Args:
+        observations: Liste de dict {'x': lon, 'y': lat, 'azimuth_deg'}
+    """
+
+    def __init__(self, observations: List[Dict]):
+        n = len(observations)
+        self.projection: LocalTangentPlane = get_projection(
+            sum(o['y'] for o in observations) / n, sum(o['x'] for o in observations) / n)
+        self.metric = project_observations(observations, self.projection)
+        self._targets = [
+            _ecef(o['y'], o['x']) + (math.cos(math.radians(o['azimuth_deg'])),
+                                     math.sin(math.radians(o['azimuth_deg'])))
+            for o in observations
+        ]
+        self.evaluations = 0
+
+    def columns(self, indices: Sequence[int]):
+        """Colonnes (tx, ty, tz, ca, sa) des observations retenues : tableaux numpy ou lignes."""
+        rows = [self._targets[i] for i in indices]
+        if np is not None and len(rows) >= MIN_VECTOR_POINTS:
+            return tuple(np.array(column) for column in zip(*rows))
+        return rows
+
+    def residuals(self, columns, x: float, y: float, phi_rad: float) -> List[float]:
+        """Distances signées (mètres) aux visées pour la table en (x, y) du plan du site."""
+        self.evaluations += 1
+        lats, lons = self.projection.inverse([x], [y])
+        station = _station(lats[0], lons[0])
+        cos_phi, sin_phi = math.cos(phi_rad), math.sin(phi_rad)
+        if isinstance(columns, tuple):
+            return _cross_track(*columns, station, cos_phi, sin_phi).tolist()
+        return [_cross_track(*row, station, cos_phi, sin_phi) for row in columns]
+
+    def to_lonlat(self, x: float, y: float) -> Tuple[float, float]:
+        lats, lons = self.projection.inverse([x], [y])
+        return (lons[0], lats[0])
+
+
+def _solve3(a: List[List[float]], b: List[float]) -> Optional[List[float]]:
+    """Résout le système 3x3 a·x = b (None si singulier)."""
+    det = (a[0][0] * (a[1][1] * a[2][2] - a[1][2] * a[2][1])
+           - a[0][1] * (a[1][0] * a[2][2] - a[1][2] * a[2][0])
+           + a[0][2] * (a[1][0] * a[2][1] - a[1][1] * a[2][0]))
+    if abs(det) < 1e-18:
+        return None
+    solution = []
+    for k in range(3):
+        m = [row[:] for row in a]
+        for r in range(3):
+            m[r][k] = b[r]
+        solution.append((m[0][0] * (m[1][1] * m[2][2] - m[1][2] * m[2][1])
+                         - m[0][1] * (m[1][0] * m[2][2] - m[1][2] * m[2][0])
+                         + m[0][2] * (m[1][0] * m[2][1] - m[1][1] * m[2][0])) / det)
+    return solution
+
+
+def refine_geodesic(site: GeodesicSite, origin: Tuple[float, float], phi: float,
+                    indices: Sequence[int],
+                    budget: Optional[SolveBudget] = None) -> Tuple[Tuple[float, float], float, float, int]:
+    """
+    Gauss-Newton amorti (Levenberg-Marquardt) sur (x, y, φ) à partir d'une solution du plan du site.
+
+    L'amortissement garde la convergence quand le départ plan est loin
+    (visées de plus de 100 km, φ du départ à quelques degrés près).
+
+    Chaque évaluation des résiduels consomme une unité de budget (3 pour la
+    jacobienne) ; budget épuisé, la boucle s'arrête sur le meilleur point
+    accepté.
+
+    Returns:
+        (origine (x, y) dans le plan du site, φ en degrés, résiduel moyen, itérations)
+    """
+    columns = site.columns(indices)
+    params = [origin[0], origin[1], math.radians(phi)]
+    residuals = site.residuals(columns, *params)
+    cost = sum(r * r for r in residuals)
+    damping = 1e-3
+    iterations = 0
+    while iterations < MAX_ITERATIONS and not _exhausted(budget):
+        iterations += 1
+        jacobian = []
+        for k in range(3):
+            shifted = params[:]
+            shifted[k] += _STEPS[k]
+            jacobian.append([(r1 - r0) / _STEPS[k]
+                             for r1, r0 in zip(site.residuals(columns, *shifted), residuals)])
+        _tick(budget, 3)
+        normal = [[sum(a * b for a, b in zip(jacobian[r], jacobian[c])) for c in range(3)] for r in range(3)]
+        gradient = [-sum(a * b for a, b in zip(jacobian[r], residuals)) for r in range(3)]
+
+        # Augmente l'amortissement jusqu'à ce que le pas fasse baisser le coût
+        step = None
+        while damping < 1e12 and not _exhausted(budget):
+            damped = [[normal[r][c] * (1.0 + damping if r == c else 1.0) for c in range(3)] for r in range(3)]
+            step = _solve3(damped, gradient)
+            if step is None:
+                break
+            candidate = [p + s for p, s in zip(params, step)]
+            candidate_residuals = site.residuals(columns, *candidate)
+            candidate_cost = sum(r * r for r in candidate_residuals)
+            _tick(budget)
+            if candidate_cost <= cost:
+                params, residuals, cost = candidate, candidate_residuals, candidate_cost
+                damping = max(damping / 10.0, 1e-9)
+                if budget is not None:
+                    budget.report('geodesic', normalize_deg(math.degrees(params[2])),
+                                  sum(abs(r) for r in residuals) / len(residuals))
+                break
+            damping *= 10.0
+            step = None
+        if step is None or all(abs(s) < tol for s, tol in zip(step, _TOLERANCES)):
+            break
+    mean = sum(abs(r) for r in residuals) / len(residuals) if residuals else float('inf')
+    return (params[0], params[1]), normalize_deg(math.degrees(params[2])), mean, iterations
+
+
+def estimate_geodesic(observations: List[Dict], method: str = 'ransac',
+                      budget: Optional[SolveBudget] = None,
+                      cache: Optional[ResultCache] = None) -> EstimationResult:
+    """
+    Estime une table en longitude/latitude avec des visées géodésiques.
+
+    La solution plane de method (dans le plan tangent du site) sert de
+    départ et fixe les inliers ; le raffinement géodésique coûte quelques
+    évaluations vectorisées.
+
+    Args:
+        observations: Liste de dict {'x': lon, 'y': lat, 'azimuth_deg'}
+        method: Méthode de table.py pour le départ plan
+        budget: Budget partagé par la résolution plane et le raffinement
+            géodésique ; épuisé, le résultat a complete=False
+        cache: Cache des résultats de la résolution plane
+
+    Returns:
+        EstimationResult avec origin = (lon, lat), residual en mètres et
+        timings 'planar', 'geodesic', 'total'
+    """
+    t0 = time.perf_counter()
+    site = GeodesicSite(observations)
+    planar = estimate_origin_and_phi(site.metric, method=method, budget=budget, cache=cache)
+    t1 = time.perf_counter()
+
+    indices = planar.inliers or list(range(len(observations)))
+    origin, phi, resid, _ = refine_geodesic(site, planar.origin, planar.phi, indices, budget=budget)
+    t2 = time.perf_counter()
+
+    metrics.record_solve('geodesic', t2 - t0, planar.iterations + site.evaluations,
+                         len(observations), len(indices), resid)
+    return EstimationResult(
+        origin=site.to_lonlat(*origin),
+        phi=phi,
+        residual=resid,
+        inlier_mask=list(planar.inlier_mask),
+        method='geodesic',
+        timings={'planar': t1 - t0, 'geodesic': t2 - t1, 'total': t2 - t0},
+        iterations=planar.iterations + site.evaluations,
+        complete=planar.complete and (budget is None or budget.complete),
+    )
+
+
+def _demo():
+    import random
+
+    from projection import UTMProjection
+
+    print("=" * 60)
+    print("Visées lointaines : modèle plan et modèle géodésique")
+    print("=" * 60 + "\n")
+
+    rng = random.Random(4)
+    table_lat, table_lon, true_phi = 45.1885, 5.7245, 37.0
+    station = _station(table_lat, table_lon)
+    utm = UTMProjection.for_site(table_lat, table_lon)
+
+    for max_km in (5, 50, 200):
+        # Curiosités, azimuts gravés = direction vraie - φ + bruit
+        observations = []
+        for _ in range(12):
+            x0, y0 = utm.forward([table_lat], [table_lon])
+            bearing = rng.uniform(0.0, 2 * math.pi)
+            dist = rng.uniform(max_km * 250.0, max_km * 1000.0)
+            lats, lons = utm.inverse([x0[0] + dist * math.cos(bearing)], [y0[0] + dist * math.sin(bearing)])
+            # Angle vrai : direction de la curiosité dans le repère local de la table
+            east, north = _local_en(*_ecef(lats[0], lons[0]), station)
+            theta = math.degrees(math.atan2(north, east))
+            observations.append({'x': lons[0], 'y': lats[0],
+                                 'azimuth_deg': normalize_deg(theta - true_phi + rng.gauss(0.0, 0.01))})
+
+        site = GeodesicSite(observations)
+        planar = estimate_origin_and_phi(site.metric, method='adaptive')
+        geodesic = estimate_geodesic(observations, method='adaptive')
+        truth = site.projection.forward([table_lat], [table_lon])
+        # Erreur propre au modèle plan : meilleure origine plane pour le φ exact
+        model_origin, _ = compute_residual_for_phi(true_phi, site.metric)
+        model_error = math.hypot(model_origin[0] - truth[0][0], model_origin[1] - truth[1][0])
+        planar_error = math.hypot(planar.origin[0] - truth[0][0], planar.origin[1] - truth[1][0])
+        gx, gy = site.projection.forward([geodesic.origin[1]], [geodesic.origin[0]])
+        geodesic_error = math.hypot(gx[0] - truth[0][0], gy[0] - truth[1][0])
+        print(f"📏 Curiosités jusqu'à {max_km:>3} km : erreur du départ plan {planar_error:8.1f} m "
+              f"(modèle plan à φ exact {model_error:6.1f} m), géodésique {geodesic_error:6.2f} m")
+        print(f"   raffinement {geodesic.timings['geodesic'] * 1000:.1f} ms "
+              f"pour {geodesic.timings['planar'] * 1000:.1f} ms de résolution plane")
+
+
+if __name__ == "__main__":
+    _demo()
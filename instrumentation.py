@@ -0,0 +1,130 @@
+"""
+Instrumentation optionnelle du chemin critique des estimateurs.
+
+Compteurs d'appels (compute_residual_for_phi, least_squares_origin,
+distance_point_to_line...) et chronomètres par étape (étapes de
+adaptive_multi_scale_search, phases de RANSAC). Désactivée par défaut :
+le coût se limite alors à la lecture du booléen ENABLED.
+
+Utilisation :
+    with collect_stats() as stats:
+        estimate_origin_and_phi(observations)
+    print(stats.as_dict())
+
+Les statistiques sont propres à chaque thread / tâche asyncio (ContextVar).
+"""
+
+import cProfile
+import contextlib
+import io
+import pstats
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+# Nombre de collectes actives ; lu par le code instrumenté avant tout travail
+ENABLED = 0
+# Protège les mises à jour de ENABLED par des collectes concurrentes
+_ENABLED_LOCK = threading.Lock()
+
+_current: ContextVar[Optional['SolveStats']] = ContextVar('solve_stats', default=None)
+
+
+class SolveStats:
+    """Compteurs d'évaluations et temps cumulés par étape d'une résolution."""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = {}
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    def as_dict(self) -> Dict[str, Dict]:
+        """Représentation sérialisable (JSON) des statistiques."""
+        return {
+            'counters': dict(self.counters),
+            'stages': {
+                name: {'seconds': seconds, 'calls': self.stage_calls[name]}
+                for name, seconds in self.stage_seconds.items()
+            },
+        }
+
+    def __repr__(self) -> str:
+        return f"SolveStats(counters={self.counters}, stage_seconds={self.stage_seconds})"
+
+
+def count(name: str, n: int = 1) -> None:
+    """Incrémente un compteur de la collecte courante (à appeler si ENABLED)."""
+    stats = _current.get()
+    if stats is not None:
+        stats.count(name, n)
+
+
+class _Stage:
+    __slots__ = ('name', 'stats', 't0')
+
+    def __init__(self, name: str, stats: SolveStats):
+        self.name = name
+        self.stats = stats
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_stage(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def stage(name: str):
+    """Chronomètre un bloc `with stage('ransac.scoring'):` si la collecte est active."""
+    if ENABLED:
+        stats = _current.get()
+        if stats is not None:
+            return _Stage(name, stats)
+    return _NULL_STAGE
+
+
+@contextlib.contextmanager
+def collect_stats() -> Iterator[SolveStats]:
+    """Active l'instrumentation pour le bloc et fournit l'objet SolveStats."""
+    global ENABLED
+    stats = SolveStats()
+    token = _current.set(stats)
+    with _ENABLED_LOCK:
+        ENABLED += 1
+    try:
+        yield stats
+    finally:
+        with _ENABLED_LOCK:
+            ENABLED -= 1
+        _current.reset(token)
+
+
+def run_profiled(func: Callable[[], object], output_path: str, top: int = 25) -> object:
+    """
+    Exécute func sous cProfile.
+
+    Le profil brut est écrit dans output_path (format pstats, lisible par
+    snakeviz, flameprof ou gprof2dot pour un flamegraph) et un résumé des
+    fonctions les plus coûteuses est affiché.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(output_path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(top)
+        print(summary.getvalue())
+        print(f"📈 Profil enregistré dans : {output_path}")
@@ -0,0 +1,341 @@
+"""
+Carte d'ensemble de l'inventaire des tables d'orientation.
+
+Une page unique affiche un marqueur léger par table (regroupés côté client).
+Le détail de chaque table (curiosités, lignes de visée, rétro-azimuts,
+tableau de données) est écrit dans un fichier JSON séparé que la page ne
+télécharge qu'au clic sur la table : le chargement initial ne dépend pas
+du volume de détail de l'inventaire.
+
+Arborescence produite :
+    <dossier>/index.html
+    <dossier>/tables/<clé>.json   (clé dérivée de l'id par detail_key)
+
+Les navigateurs refusent fetch() sur file:// : servir le dossier en HTTP,
+par exemple avec `python inventory_map.py --serve`.
+
+Format d'une table en entrée (compatible scenario_generator) :
+    {'id': ..., 'name': str (opt), 'observations': [{'x', 'y', 'azimuth_deg', 'name' (opt)}, ...],
+     'center_lat': float (opt), 'center_lon': float (opt)}
+Les coordonnées x/y sont en mètres autour de (center_lat, center_lon).
+"""
+
+import hashlib
+import html
+import json
+import logging
+import math
+import os
+import random
+import re
+from typing import Dict, Iterable, Optional
+
+import folium
+from folium import plugins
+
+from result_cache import ResultCache, get_default_cache
+from table import estimate_origin_and_phi
+from projection import get_projection
+from visualize_map import observation_geometries
+
+logger = logging.getLogger(__name__)
+
+# Marqueur d'une table : [lat, lon, clé du détail, nom (HTML échappé), nombre de curiosités,
+# résiduel (null si la table n'est pas résolue)]
+_TABLE_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {
+        icon: L.divIcon({html: '<div class="table-icon">🧭</div>', className: '', iconSize: [26, 26]})
+    });
+    marker.bindTooltip(row[3] + ' (' + row[4] + ' curiosités, ' +
+                       (row[5] === null ? 'non résolue' : row[5].toFixed(1) + ' m') + ')');
+    marker.on('click', function () { loadTableDetail(row[2]); });
+    return marker;
+}
+"""
+
+_DETAIL_CSS = """
+<style>
+.table-icon { font-size: 18px; line-height: 26px; text-align: center; background: white;
+              border: 2px solid #0066cc; border-radius: 50%; width: 26px; height: 26px;
+              box-sizing: border-box; }
+.curiosite-icon { font-size: 12px; font-weight: bold; color: white; border-radius: 50%;
+                  width: 24px; height: 24px; display: flex; align-items: center;
+                  justify-content: center; border: 2px solid white;
+                  box-shadow: 0 0 4px rgba(0,0,0,0.5); box-sizing: border-box; }
+#table-detail { position: fixed; top: 70px; right: 10px; width: 350px; background-color: white;
+                border: 2px solid #0066cc; z-index: 9999; font-size: 12px; padding: 15px;
+                border-radius: 8px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+                max-height: 80vh; overflow-y: auto; }
+#table-detail table { width: 100%; border-collapse: collapse; font-size: 11px; }
+#table-detail th { background-color: #f0f0f0; border-bottom: 2px solid #0066cc; padding: 5px; }
+#table-detail td { padding: 5px; border-bottom: 1px solid #ddd; }
+</style>
+"""
+
+_DETAIL_PANEL = """
+<div id="table-detail">
+    <h4 style="margin: 0 0 10px 0; color: #0066cc;">📊 Inventaire</h4>
+    <p>{count} tables. Cliquer sur une table pour charger son détail.</p>
+</div>
+"""
+
+# Chargement et dessin du détail d'une table ; {map} est la variable Leaflet
+_DETAIL_SCRIPT = """
+var tableDetailLayer = null;
+var tableDetailCache = {};
+
+function escapeHtml(text) {
+    var div = document.createElement('div');
+    div.textContent = String(text);
+    return div.innerHTML;
+}
+
+function drawTableDetail(detail) {
+    var map = {map};
+    if (tableDetailLayer === null) {
+        tableDetailLayer = L.layerGroup().addTo(map);
+    }
+    tableDetailLayer.clearLayers();
+    // origin, phi et residual valent null pour une table non résolue : curiosités seules
+    var origin = detail.origin;
+    var bounds = [];
+    if (origin !== null) {
+        bounds.push(origin);
+        L.marker(origin, {icon: L.divIcon({html: '<div class="table-icon">🧭</div>', className: '', iconSize: [26, 26]})})
+            .bindTooltip(escapeHtml(detail.name)).addTo(tableDetailLayer);
+    }
+    var rows = [];
+    detail.observations.forEach(function (obs, i) {
+        var color = obs.inlier ? obs.color : '#999';
+        L.marker([obs.lat, obs.lon], {icon: L.divIcon({
+            html: '<div class="curiosite-icon" style="background-color: ' + color + ';">' + (i + 1) + '</div>',
+            className: '', iconSize: [24, 24]
+        })}).bindTooltip('#' + (i + 1) + ' ' + escapeHtml(obs.name) + (obs.inlier ? ' ✓' : ' ✗'))
+            .addTo(tableDetailLayer);
+        if (origin === null) {
+            // Pas de solution : aucune ligne de visée
+        } else if (obs.inlier) {
+            L.polyline([origin, obs.sight_end], {color: 'green', weight: 2.5, opacity: 0.7})
+                .bindTooltip('Visée → ' + escapeHtml(obs.name)).addTo(tableDetailLayer);
+            L.polyline([[obs.lat, obs.lon], obs.back_end], {color: 'orange', weight: 2, opacity: 0.6, dashArray: '10, 5'})
+                .bindTooltip('Rétro ← ' + escapeHtml(obs.name)).addTo(tableDetailLayer);
+        } else {
+            L.polyline([origin, obs.sight_end], {color: 'gray', weight: 1, opacity: 0.3, dashArray: '5, 5'})
+                .bindTooltip('✗ Outlier : ' + escapeHtml(obs.name)).addTo(tableDetailLayer);
+        }
+        bounds.push([obs.lat, obs.lon]);
+        rows.push('<tr><td style="text-align: center; font-weight: bold;">' + (i + 1) + '</td><td>' +
+                  escapeHtml(obs.name) + '</td><td style="text-align: right;">' + obs.azimuth.toFixed(1) +
+                  '°</td><td style="text-align: center; font-weight: bold; color: ' +
+                  (obs.inlier ? 'green' : 'red') + ';">' + (obs.inlier ? '✓' : '✗') + '</td></tr>');
+    });
+    document.getElementById('table-detail').innerHTML =
+        '<h4 style="margin: 0 0 10px 0; color: #0066cc;">📊 ' + escapeHtml(detail.name) + '</h4>' +
+        '<table><thead><tr><th>#</th><th>Nom</th><th>Azimut</th><th>Statut</th></tr></thead><tbody>' +
+        rows.join('') + '</tbody></table>' +
+        '<div style="margin-top: 10px; padding: 8px; background-color: #e6f2ff; border-radius: 4px;">' +
+        '<p style="margin: 3px 0;"><b>Orientation φ:</b> ' +
+        (detail.phi === null ? 'non résolue' : detail.phi.toFixed(2) + '°') + '</p>' +
+        '<p style="margin: 3px 0;"><b>Résiduel:</b> ' +
+        (detail.residual === null ? '—' : detail.residual.toFixed(3) + ' m') + '</p>' +
+        '<p style="margin: 3px 0; color: green;"><b>Inliers:</b> ' + detail.n_inliers + '/' +
+        detail.observations.length + '</p></div>';
+    map.fitBounds(bounds, {padding: [50, 50]});
+}
+
+function loadTableDetail(key) {
+    if (tableDetailCache[key]) {
+        drawTableDetail(tableDetailCache[key]);
+        return;
+    }
+    fetch('tables/' + encodeURIComponent(key) + '.json')
+        .then(function (response) { return response.json(); })
+        .then(function (detail) { tableDetailCache[key] = detail; drawTableDetail(detail); })
+        .catch(function (error) {
+            document.getElementById('table-detail').innerHTML =
+                '<p style="color: red;">Détail indisponible (' + escapeHtml(error) + ').<br>' +
+                'Servir le dossier en HTTP : python inventory_map.py --serve</p>';
+        });
+}
+"""
+
+_COLORS = ['red', 'darkred', 'orange', 'purple', 'darkviolet', 'deeppink', 'cadetblue', 'darkgreen']
+
+
+def detail_key(table_id) -> str:
+    """
+    Nom de fichier sûr du détail d'une table (sans extension).
+
+    Les ids faits de lettres, chiffres, '-' et '_' sont gardés tels quels ;
+    les autres caractères (dont '/', '.', '\\') sont remplacés et un
+    condensé de l'id d'origine est ajouté pour éviter les collisions.
+    """
+    text = str(table_id)
+    key = re.sub(r'[^A-Za-z0-9_-]', '_', text)[:64]
+    if key != text or not key:
+        key = f"{key}-{hashlib.sha1(text.encode('utf-8')).hexdigest()[:10]}"
+    return key
+
+
+def _finite_or_none(value: Optional[float]) -> Optional[float]:
+    """Valeur JSON stricte : les non-finis (résiduel infini d'une table non résolue) deviennent null."""
+    return value if value is not None and math.isfinite(value) else None
+
+
+def table_detail(table: Dict, center_lat: float, center_lon: float,
+                 cache: Optional[ResultCache] = None) -> Dict:
+    """
+    Estime une table et retourne son détail sérialisable (coordonnées en lat/lon).
+
+    Une table sans solution a origin, phi et residual à None et ses
+    curiosités n'ont pas de lignes (sight_end et back_end à None). Le
+    détail ne contient aucune valeur non finie (JSON strict).
+    """
+    observations = table['observations']
+    result = estimate_origin_and_phi(observations, method='ransac',
+                                     cache=cache if cache is not None else get_default_cache())
+    solved = result.origin is not None and result.phi is not None
+    projection = get_projection(center_lat, center_lon)
+    # Table et curiosités converties en un seul lot (l'origine en dernier)
+    origin_xy = [result.origin] if solved else []
+    lats, lons = projection.inverse([o['x'] for o in observations] + [xy[0] for xy in origin_xy],
+                                    [o['y'] for o in observations] + [xy[1] for xy in origin_xy])
+    origin = [round(lats.pop(), 7), round(lons.pop(), 7)] if solved else None
+    if solved:
+        geometries = observation_geometries(observations, result.origin, result.phi, projection)
+    else:
+        geometries = [None] * len(observations)
+
+    detail_obs = []
+    for i, (obs, geo) in enumerate(zip(observations, geometries)):
+        detail_obs.append({
+            'name': obs.get('name', f"Point {i+1}"),
+            'lat': round(lats[i], 7),
+            'lon': round(lons[i], 7),
+            'azimuth': round(obs['azimuth_deg'], 3),
+            'corrected': round(geo['azimuth_corrected'], 3) if geo else None,
+            'dist': round(geo['dist'], 1) if geo else None,
+            'inlier': bool(solved and result.inlier_mask[i]),
+            'color': _COLORS[i % len(_COLORS)],
+            'sight_end': [round(v, 7) for v in geo['sight_end']] if geo else None,
+            'back_end': [round(v, 7) for v in geo['back_end']] if geo else None,
+        })
+
+    return {
+        'id': table['id'],
+        'name': table.get('name', f"Table {table['id']}"),
+        'origin': origin,
+        'phi': _finite_or_none(result.phi),
+        'residual': _finite_or_none(result.residual),
+        'n_inliers': len(result.inliers),
+        'observations': detail_obs,
+    }
+
+
+def create_inventory_map(tables: Iterable[Dict], output_dir: str = "inventory_map",
+                         center_lat: float = 45.0, center_lon: float = 6.0,
+                         cache: Optional[ResultCache] = None) -> str:
+    """
+    Génère la carte d'ensemble d'un inventaire de tables.
+
+    Les tables sont traitées une par une (un itérable de scenario_generator
+    ou de read_tables convient) : seul le marqueur de chaque table est gardé
+    en mémoire, son détail est écrit aussitôt dans tables/<detail_key(id)>.json.
+
+    Args:
+        tables: Tables à afficher (voir le format en tête de module)
+        output_dir: Dossier de sortie (créé si besoin)
+        center_lat: Latitude par défaut des tables sans center_lat
+        center_lon: Longitude par défaut des tables sans center_lon
+        cache: Cache des résultats d'estimation (par défaut, le cache du processus)
+
+    Returns:
+        Chemin de index.html
+    """
+    detail_dir = os.path.join(output_dir, "tables")
+    os.makedirs(detail_dir, exist_ok=True)
+
+    rows = []
+    for table in tables:
+        lat0 = table.get('center_lat', center_lat)
+        lon0 = table.get('center_lon', center_lon)
+        detail = table_detail(table, lat0, lon0, cache)
+        key = detail_key(detail['id'])
+        with open(os.path.join(detail_dir, f"{key}.json"), 'w') as f:
+            json.dump(detail, f, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+        # Table non résolue : marqueur au centre de la table
+        lat, lon = detail['origin'] or (lat0, lon0)
+        residual = detail['residual']
+        # Le nom est inséré tel quel dans l'infobulle Leaflet : échappé ici
+        rows.append([lat, lon, key, html.escape(str(detail['name'])),
+                     len(detail['observations']), None if residual is None else round(residual, 1)])
+    logger.info("🧭 %d tables estimées, détails écrits dans %s", len(rows), detail_dir)
+
+    if rows:
+        lats = [row[0] for row in rows]
+        lons = [row[1] for row in rows]
+        location = [sum(lats) / len(lats), sum(lons) / len(lons)]
+    else:
+        lats, lons, location = [center_lat], [center_lon], [center_lat, center_lon]
+
+    m = folium.Map(location=location, zoom_start=9, tiles='OpenStreetMap', control_scale=True)
+    if len(rows) > 1:
+        m.fit_bounds([[min(lats), min(lons)], [max(lats), max(lons)]], padding=(50, 50))
+    plugins.FastMarkerCluster(rows, callback=_TABLE_CALLBACK, name='Tables').add_to(m)
+
+    root = m.get_root()
+    root.header.add_child(folium.Element(_DETAIL_CSS))
+    root.html.add_child(folium.Element(_DETAIL_PANEL.replace('{count}', str(len(rows)))))
+    root.script.add_child(folium.Element(_DETAIL_SCRIPT.replace('{map}', m.get_name())))
+    plugins.Fullscreen(position='topright', title='Plein écran', title_cancel='Quitter plein écran').add_to(m)
+
+    index_path = os.path.join(output_dir, "index.html")
+    m.save(index_path)
+    logger.info("✅ Carte d'ensemble sauvegardée dans : %s", index_path)
+    return index_path
+
+
+def _demo_tables(count: int, seed: int = 0) -> Iterable[Dict]:
+    """Tables synthétiques réparties autour de Grenoble."""
+    from scenario_generator import stream_tables
+
+    rng = random.Random(seed)
+    for table in stream_tables(count, n=[5, 8, 12], layouts=('ring', 'cone', 'clustered'),
+                               outlier_ratio=0.15, seed=seed):
+        table['name'] = f"Table {table['id'] + 1}"
+        table['center_lat'] = 45.1885 + rng.uniform(-0.4, 0.4)
+        table['center_lon'] = 5.7245 + rng.uniform(-0.6, 0.6)
+        yield table
+
+
+if __name__ == "__main__":
+    import argparse
+    import functools
+    import http.server
+
+    parser = argparse.ArgumentParser(description="Carte d'ensemble de l'inventaire des tables")
+    parser.add_argument('--input', default=None,
+                        help="Fichier de tables (JSONL, éventuellement .gz) ; sinon tables synthétiques")
+    parser.add_argument('--count', type=int, default=200, help="Nombre de tables synthétiques")
+    parser.add_argument('--output', default='inventory_map', help="Dossier de sortie")
+    parser.add_argument('--serve', action='store_true', help="Servir le dossier en HTTP après génération")
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.input:
+        from scenario_generator import read_tables
+        source = read_tables(args.input)
+    else:
+        source = _demo_tables(args.count)
+    index = create_inventory_map(source, args.output)
+
+    if args.serve:
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=args.output)
+        with http.server.ThreadingHTTPServer(('127.0.0.1', args.port), handler) as server:
+            print(f"🌐 http://127.0.0.1:{args.port}/index.html (Ctrl+C pour arrêter)")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
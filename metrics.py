@@ -0,0 +1,255 @@
+"""
+Registre de métriques des estimateurs (format texte Prometheus).
+
+Les estimateurs mettent à jour des compteurs et histogrammes par méthode :
+latence, nombre d'évaluations du résiduel, proportion d'inliers et
+distribution des résiduels. Le registre peut être exposé sur un point
+d'accès HTTP local (/metrics) ou écrit dans un fichier.
+
+Les mises à jour ne prennent pas de verrou : chaque thread écrit dans ses
+propres cellules, qui ne sont additionnées qu'à la lecture.
+"""
+
+import bisect
+import math
+import os
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _format_value(value: float) -> str:
+    """
+    Valeur d'un échantillon au format texte Prometheus.
+
+    Les non-finis s'écrivent +Inf, -Inf et NaN ; les entiers sans exposant,
+    pour que les grands compteurs gardent tous leurs chiffres.
+    """
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CellsHolder:
+    """Porte les cellules d'un thread ; sa destruction signale la fin du thread."""
+
+    __slots__ = ('cells', '__weakref__')
+
+    def __init__(self, cells: List[float]):
+        self.cells = cells
+
+
+class _ThreadCells:
+    """
+    Cellules numériques réparties par thread, agrégées à la lecture.
+
+    Quand un thread se termine, son stockage local est libéré : un
+    finaliseur reporte alors ses cellules dans l'accumulateur des threads
+    terminés et les retire de la liste. La mémoire et le coût d'une lecture
+    restent proportionnels au nombre de threads vivants, même avec un
+    renouvellement continu des threads (serveur HTTP, pools d'exécuteurs).
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._all: List[List[float]] = []
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def mine(self) -> List[float]:
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            cells = [0.0] * self._size
+            holder = _CellsHolder(cells)
+            with self._lock:
+                self._all.append(cells)
+            weakref.finalize(holder, self._retire, cells)
+            self._local.holder = holder
+        return holder.cells
+
+    def _retire(self, cells: List[float]) -> None:
+        with self._lock:
+            for k, value in enumerate(cells):
+                self._retired[k] += value
+            for k, shard in enumerate(self._all):
+                if shard is cells:
+                    del self._all[k]
+                    break
+
+    def total(self) -> List[float]:
+        with self._lock:
+            shards = [list(self._retired)] + [list(shard) for shard in self._all]
+        return [sum(column) for column in zip(*shards)]
+
+
+class Counter:
+    """Compteur monotone, éventuellement étiqueté."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _ThreadCells] = {}
+        self._lock = threading.Lock()
+
+    def _cells(self, labels: Tuple[str, ...]) -> _ThreadCells:
+        cells = self._children.get(labels)
+        if cells is None:
+            with self._lock:
+                cells = self._children.setdefault(labels, _ThreadCells(1))
+        return cells
+
+    def inc(self, amount: float = 1.0, *labels: str) -> None:
+        self._cells(labels).mine()[0] += amount
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        return [(self.name, labels, cells.total()[0]) for labels, cells in sorted(self._children.items())]
+
+
+class Histogram:
+    """Histogramme cumulatif à seaux fixes, éventuellement étiqueté."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = sorted(buckets)
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], _ThreadCells] = {}
+        self._lock = threading.Lock()
+
+    def _cells(self, labels: Tuple[str, ...]) -> _ThreadCells:
+        cells = self._children.get(labels)
+        if cells is None:
+            with self._lock:
+                # Un seau par borne + +Inf, puis somme et nombre
+                cells = self._children.setdefault(labels, _ThreadCells(len(self.buckets) + 3))
+        return cells
+
+    def observe(self, value: float, *labels: str) -> None:
+        cells = self._cells(labels).mine()
+        cells[bisect.bisect_left(self.buckets, value)] += 1
+        cells[-2] += value
+        cells[-1] += 1
+
+    def samples(self) -> List[Tuple[str, Tuple[str, ...], float]]:
+        out = []
+        for labels, cells in sorted(self._children.items()):
+            values = cells.total()
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + [float('inf')], values):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                out.append((self.name + '_bucket', labels + (le,), cumulative))
+            out.append((self.name + '_sum', labels, values[-2]))
+            out.append((self.name + '_count', labels, values[-1]))
+        return out
+
+
+class MetricsRegistry:
+    """Ensemble de métriques exportables au format texte Prometheus."""
+
+    def __init__(self):
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float],
+                  labelnames: Sequence[str] = ()) -> Histogram:
+        metric = Histogram(name, help, buckets, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Exposition au format texte Prometheus 0.0.4."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            names = metric.labelnames
+            if metric.kind == 'histogram':
+                names = names + ('le',)
+            for sample_name, labels, value in metric.samples():
+                if sample_name.endswith(('_sum', '_count')) and metric.kind == 'histogram':
+                    label_names = metric.labelnames
+                else:
+                    label_names = names
+                label_text = ','.join(f'{k}="{v}"' for k, v in zip(label_names, labels))
+                lines.append(f"{sample_name}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{sample_name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Écrit l'exposition dans un fichier (remplacement atomique)."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9108, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Expose /metrics sur un serveur HTTP local (thread démon). Retourne le serveur."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+
+REGISTRY = MetricsRegistry()
+
+SOLVES = REGISTRY.counter(
+    'table_estimate_total', "Nombre d'estimations effectuées", ['method'])
+SOLVE_SECONDS = REGISTRY.histogram(
+    'table_estimate_duration_seconds', "Durée des estimations",
+    [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0], ['method'])
+EVALUATIONS = REGISTRY.counter(
+    'table_residual_evaluations_total', "Évaluations de compute_residual_for_phi demandées", ['method'])
+INLIER_RATIO = REGISTRY.histogram(
+    'table_inlier_ratio', "Proportion d'observations retenues comme inliers",
+    [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0], ['method'])
+RESIDUAL_METERS = REGISTRY.histogram(
+    'table_residual_meters', "Résiduel moyen des solutions (mètres)",
+    [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000], ['method'])
+
+
+def record_solve(method: str, seconds: float, evaluations: int, n_observations: int,
+                 n_inliers: int, residual: float) -> None:
+    """Enregistre une estimation terminée (appelé par estimate_origin_and_phi)."""
+    SOLVES.inc(1, method)
+    SOLVE_SECONDS.observe(seconds, method)
+    EVALUATIONS.inc(evaluations, method)
+    if n_observations:
+        INLIER_RATIO.observe(n_inliers / n_observations, method)
+    RESIDUAL_METERS.observe(residual, method)
+
+
+def dump(path: str, registry: Optional[MetricsRegistry] = None) -> None:
+    """Écrit les métriques (registre par défaut) dans un fichier texte Prometheus."""
+    (registry or REGISTRY).write(path)
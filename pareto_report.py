@@ -0,0 +1,221 @@
+"""
+Rapport précision / temps (front de Pareto) des méthodes et de leurs paramètres.
+
+Chaque configuration (méthode + paramètres : seuil RANSAC, pas de
+local_search_around_phi, taux d'apprentissage de gradient_descent_phi...)
+est évaluée sur des tables synthétiques de vérité terrain. On mesure
+l'erreur de position, l'erreur sur φ, la précision/rappel de la détection
+d'outliers et le temps de calcul, puis on extrait le front de Pareto
+(temps, erreur de position).
+
+Remarque : une droite n'ayant pas de sens, φ et φ + 180° donnent le même
+résiduel ; l'erreur sur φ est donc mesurée modulo 180°.
+
+Exemple :
+    python pareto_report.py --tables 20 --n 8 --outliers 0.2 --target 10
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scenario_generator import LAYOUTS, stream_tables
+from table import (dense_search_phi, estimate_origin_and_phi,
+                   gradient_descent_phi, local_search_around_phi, ransac_estimate)
+
+Solver = Callable[[List[Dict]], Tuple[Tuple[float, float], float, float, List[int]]]
+
+
+def _all_inliers(observations: List[Dict]) -> List[int]:
+    return list(range(len(observations)))
+
+
+def _ransac(n_iterations: int, threshold: float) -> Solver:
+    return lambda obs: ransac_estimate(obs, n_iterations=n_iterations, threshold=threshold)
+
+
+def _coarse_then_local(range_deg: float, step_deg: float) -> Solver:
+    def solve(obs):
+        origin, phi, resid = dense_search_phi(obs, step_deg=1.0)
+        origin, phi, resid = local_search_around_phi(obs, phi, range_deg=range_deg, step_deg=step_deg)
+        return (origin, phi, resid, _all_inliers(obs))
+    return solve
+
+
+def _multi_start(learning_rate: float, max_iter: int) -> Solver:
+    def solve(obs):
+        best = (None, None, float('inf'))
+        for phi_start in range(0, 360, 45):
+            phi, origin, resid = gradient_descent_phi(obs, float(phi_start), learning_rate, max_iter)
+            if resid < best[2]:
+                best = (origin, phi, resid)
+        return (*best, _all_inliers(obs))
+    return solve
+
+
+def _method(method: str) -> Solver:
+    def solve(obs):
+        result = estimate_origin_and_phi(obs, method=method)
+        return (result.origin, result.phi, result.residual, result.inliers)
+    return solve
+
+
+def default_configurations() -> List[Tuple[str, Dict, Solver]]:
+    """Grille de configurations balayée par défaut : (méthode, paramètres, solveur)."""
+    configs = []
+    for n_iterations in (25, 50, 100):
+        for threshold in (10.0, 25.0, 50.0, 100.0):
+            configs.append(('ransac', {'n_iterations': n_iterations, 'threshold': threshold},
+                            _ransac(n_iterations, threshold)))
+    for range_deg in (1.0, 2.0):
+        for step_deg in (0.01, 0.05, 0.1):
+            configs.append(('coarse+local', {'range_deg': range_deg, 'step_deg': step_deg},
+                            _coarse_then_local(range_deg, step_deg)))
+    for learning_rate in (0.1, 0.5, 1.0):
+        for max_iter in (50, 100):
+            configs.append(('multi-start', {'learning_rate': learning_rate, 'max_iter': max_iter},
+                            _multi_start(learning_rate, max_iter)))
+    for method in ('irls', 'adaptive', 'ternary', 'legacy'):
+        configs.append((method, {}, _method(method)))
+    return configs
+
+
+def phi_error_deg(phi: float, true_phi: float) -> float:
+    """Écart angulaire modulo 180° (φ et φ + 180° sont équivalents)."""
+    diff = (phi - true_phi) % 180.0
+    return min(diff, 180.0 - diff)
+
+
+def evaluate_configuration(solver: Solver, tables: List[Dict], seed: int = 0) -> Dict:
+    """Évalue un solveur sur des tables de vérité terrain."""
+    position_errors, phi_errors, times = [], [], []
+    true_pos = false_pos = false_neg = 0
+    for k, table in enumerate(tables):
+        observations = table['observations']
+        random.seed(seed + k)
+        t0 = time.perf_counter()
+        origin, phi, _, inliers = solver(observations)
+        times.append((time.perf_counter() - t0) * 1000.0)
+        position_errors.append(math.dist(origin, table['origin']))
+        phi_errors.append(phi_error_deg(phi, table['phi']))
+
+        inlier_set = set(inliers)
+        for i, is_outlier in enumerate(table['outliers']):
+            detected = i not in inlier_set
+            true_pos += detected and is_outlier
+            false_pos += detected and not is_outlier
+            false_neg += (not detected) and is_outlier
+
+    return {
+        'time_ms': statistics.median(times),
+        'position_error_m': statistics.median(position_errors),
+        'position_error_p90_m': sorted(position_errors)[int(0.9 * (len(position_errors) - 1))],
+        'phi_error_deg': statistics.median(phi_errors),
+        'outlier_precision': true_pos / (true_pos + false_pos) if true_pos + false_pos else None,
+        'outlier_recall': true_pos / (true_pos + false_neg) if true_pos + false_neg else None,
+    }
+
+
+def pareto_front(entries: List[Dict], x: str = 'time_ms', y: str = 'position_error_m') -> List[Dict]:
+    """Entrées non dominées (minimisation de x et y), triées par x."""
+    front = []
+    best_y = float('inf')
+    for entry in sorted(entries, key=lambda e: (e[x], e[y])):
+        if entry[y] < best_y:
+            front.append(entry)
+            best_y = entry[y]
+    return front
+
+
+def plot_front(entries: List[Dict], front: List[Dict], path: str) -> bool:
+    """Trace le nuage et le front (matplotlib optionnel). Retourne False si indisponible."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+
+    fig, ax = plt.subplots(figsize=(9, 6))
+    ax.scatter([e['time_ms'] for e in entries], [e['position_error_m'] for e in entries],
+               c='lightgray', label='Configurations')
+    ax.plot([e['time_ms'] for e in front], [e['position_error_m'] for e in front],
+            'o-', color='#0066cc', label='Front de Pareto')
+    for e in front:
+        ax.annotate(e['label'], (e['time_ms'], e['position_error_m']), fontsize=7,
+                    xytext=(4, 4), textcoords='offset points')
+    ax.set_xscale('log')
+    ax.set_xlabel('Temps médian (ms)')
+    ax.set_ylabel('Erreur de position médiane (m)')
+    ax.set_title('Précision / temps des méthodes d\'estimation')
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return True
+
+
+def run_sweep(tables: List[Dict], configs: List[Tuple[str, Dict, Solver]], seed: int = 0) -> List[Dict]:
+    """Évalue toutes les configurations sur le même jeu de tables."""
+    entries = []
+    for method, params, solver in configs:
+        label = method + ''.join(f" {k}={v}" for k, v in params.items())
+        metrics = evaluate_configuration(solver, tables, seed)
+        entries.append({'label': label, 'method': method, 'params': params, **metrics})
+        print(f"   {label:<45} {metrics['time_ms']:9.2f} ms  "
+              f"pos={metrics['position_error_m']:9.2f} m  φ={metrics['phi_error_deg']:.3f}°")
+    return entries
+
+
+def cheapest_meeting_target(entries: List[Dict], target_position_error: float) -> Optional[Dict]:
+    """Configuration la plus rapide dont l'erreur de position médiane respecte la cible."""
+    ok = [e for e in entries if e['position_error_m'] <= target_position_error]
+    return min(ok, key=lambda e: e['time_ms']) if ok else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Front de Pareto précision / temps")
+    parser.add_argument('--tables', type=int, default=20, help="Nombre de tables synthétiques")
+    parser.add_argument('--n', type=int, default=8, help="Curiosités par table")
+    parser.add_argument('--layout', nargs='+', default=['ring'], choices=LAYOUTS)
+    parser.add_argument('--noise', type=float, default=0.5)
+    parser.add_argument('--outliers', type=float, default=0.2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--target', type=float, default=None,
+                        help="Erreur de position visée (m) : affiche la config la moins chère")
+    parser.add_argument('--output', default='pareto_report.json')
+    parser.add_argument('--plot', default='pareto_report.png')
+    args = parser.parse_args()
+
+    tables = list(stream_tables(args.tables, args.n, args.layout, args.noise, args.outliers, seed=args.seed))
+    print("=" * 60)
+    print(f"Balayage sur {len(tables)} tables de {args.n} curiosités")
+    print("=" * 60)
+    entries = run_sweep(tables, default_configurations(), args.seed)
+    front = pareto_front(entries)
+    for entry in entries:
+        entry['pareto'] = entry in front
+
+    with open(args.output, 'w') as f:
+        json.dump({'tables': args.tables, 'n': args.n, 'layout': args.layout, 'noise_deg': args.noise,
+                   'outlier_ratio': args.outliers, 'seed': args.seed, 'entries': entries}, f, indent=2)
+    print(f"\n✅ Rapport enregistré dans : {args.output}")
+    if plot_front(entries, front, args.plot):
+        print(f"✅ Graphique enregistré dans : {args.plot}")
+    else:
+        print("ℹ️  matplotlib absent : graphique non généré")
+
+    print("\nFront de Pareto :")
+    for entry in front:
+        print(f"   {entry['label']:<45} {entry['time_ms']:9.2f} ms  pos={entry['position_error_m']:.2f} m")
+
+    if args.target is not None:
+        choice = cheapest_meeting_target(entries, args.target)
+        if choice is None:
+            print(f"\n⚠️  Aucune configuration n'atteint {args.target} m")
+        else:
+            print(f"\n🏆 Moins chère sous {args.target} m : {choice['label']} ({choice['time_ms']:.2f} ms)")
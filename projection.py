@@ -0,0 +1,290 @@
+"""
+Projections WGS84 ↔ plan métrique, par lots.
+
+Les estimateurs de table.py travaillent dans un plan en mètres. Ce module
+fournit les conversions exactes entre coordonnées géographiques (degrés)
+et ce plan :
+- LocalTangentPlane : plan tangent local (Est, Nord) centré sur le site,
+  via les coordonnées ECEF de l'ellipsoïde WGS84 ;
+- UTMProjection : Mercator transverse universelle (série de Krüger,
+  précision millimétrique dans la zone).
+
+Chaque conversion traite un lot de points d'un seul appel. Avec numpy, les
+formules s'appliquent aux tableaux entiers ; sans numpy (ou pour les petits
+lots), les mêmes formules sont évaluées point par point avec math.
+
+get_projection garde une projection par site : les constantes (matrice de
+rotation ECEF→ENU, zone UTM) ne sont calculées qu'une fois.
+
+Exemple :
+    proj = get_projection(45.1885, 5.7245)
+    xs, ys = proj.forward(lats, lons)      # mètres (Est, Nord)
+    lats, lons = proj.inverse(xs, ys)
+"""
+
+import math
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+# Ellipsoïde WGS84
+WGS84_A = 6378137.0
+WGS84_F = 1.0 / 298.257223563
+WGS84_E2 = WGS84_F * (2.0 - WGS84_F)
+
+# En dessous de ce nombre de points, la boucle Python est plus rapide que numpy
+MIN_VECTOR_POINTS = 64
+
+# Itérations de l'inverse du plan tangent (convergence < 1 µm à 100 km)
+_ENU_INVERSE_ITERATIONS = 4
+
+# Fonctions élémentaires sous les noms numpy, pour évaluer les formules sur des scalaires
+_SCALAR = SimpleNamespace(
+    sin=math.sin, cos=math.cos, tan=math.tan, sqrt=math.sqrt, hypot=math.hypot,
+    sinh=math.sinh, cosh=math.cosh, arctan=math.atan, arctan2=math.atan2,
+    arcsin=math.asin, arctanh=math.atanh, radians=math.radians, degrees=math.degrees,
+)
+
+
+def _apply(kernel, a: Sequence[float], b: Sequence[float]) -> Tuple:
+    """
+    Applique kernel(a, b, xp) au lot : en une fois avec numpy, sinon point par point.
+
+    Le type du résultat suit celui de l'entrée : tableaux numpy pour des
+    tableaux numpy, listes sinon.
+    """
+    is_array = np is not None and isinstance(a, np.ndarray)
+    if np is not None and (is_array or len(a) >= MIN_VECTOR_POINTS):
+        u, v = kernel(np.asarray(a, dtype=float), np.asarray(b, dtype=float), np)
+        return (u, v) if is_array else (u.tolist(), v.tolist())
+    us, vs = [], []
+    for x, y in zip(a, b):
+        u, v = kernel(x, y, _SCALAR)
+        us.append(u)
+        vs.append(v)
+    return us, vs
+
+
+class LocalTangentPlane:
+    """
+    Plan tangent local (Est, Nord) à l'ellipsoïde WGS84 au point (lat0, lon0).
+
+    forward projette orthogonalement sur le plan tangent le point de
+    l'ellipsoïde (altitude nulle) ; inverse retrouve ce point par quelques
+    itérations. Adapté aux sites de quelques dizaines de kilomètres.
+    """
+
+    kind = 'enu'
+
+    def __init__(self, lat0: float, lon0: float):
+        self.lat0 = lat0
+        self.lon0 = lon0
+        phi, lam = math.radians(lat0), math.radians(lon0)
+        self._sin_phi, self._cos_phi = math.sin(phi), math.cos(phi)
+        self._sin_lam, self._cos_lam = math.sin(lam), math.cos(lam)
+        self._origin = self._ecef(phi, lam, _SCALAR)
+
+    @staticmethod
+    def _ecef(phi, lam, xp) -> Tuple:
+        sin_phi = xp.sin(phi)
+        n = WGS84_A / xp.sqrt(1.0 - WGS84_E2 * sin_phi * sin_phi)
+        return (n * xp.cos(phi) * xp.cos(lam), n * xp.cos(phi) * xp.sin(lam), n * (1.0 - WGS84_E2) * sin_phi)
+
+    def _enu(self, lat, lon, xp) -> Tuple:
+        """(Est, Nord, Haut) d'un point de l'ellipsoïde."""
+        x, y, z = self._ecef(xp.radians(lat), xp.radians(lon), xp)
+        dx, dy, dz = x - self._origin[0], y - self._origin[1], z - self._origin[2]
+        east = -self._sin_lam * dx + self._cos_lam * dy
+        t = self._cos_lam * dx + self._sin_lam * dy
+        north = -self._sin_phi * t + self._cos_phi * dz
+        up = self._cos_phi * t + self._sin_phi * dz
+        return east, north, up
+
+    def _forward(self, lat, lon, xp) -> Tuple:
+        east, north, _ = self._enu(lat, lon, xp)
+        return east, north
+
+    def _inverse(self, east, north, xp) -> Tuple:
+        up = 0.0 * east
+        for _ in range(_ENU_INVERSE_ITERATIONS):
+            # ENU → ECEF → géodésique, puis hauteur de l'ellipsoïde sous ce point
+            t = -self._sin_phi * north + self._cos_phi * up
+            x = self._origin[0] - self._sin_lam * east + self._cos_lam * t
+            y = self._origin[1] + self._cos_lam * east + self._sin_lam * t
+            z = self._origin[2] + self._cos_phi * north + self._sin_phi * up
+            lon = xp.arctan2(y, x)
+            p = xp.hypot(x, y)
+            phi = xp.arctan2(z, p * (1.0 - WGS84_E2))
+            for _ in range(3):
+                sin_phi = xp.sin(phi)
+                n = WGS84_A / xp.sqrt(1.0 - WGS84_E2 * sin_phi * sin_phi)
+                phi = xp.arctan2(z + WGS84_E2 * n * sin_phi, p)
+            lat, lon = xp.degrees(phi), xp.degrees(lon)
+            up = self._enu(lat, lon, xp)[2]
+        return lat, lon
+
+    def forward(self, lats: Sequence[float], lons: Sequence[float]) -> Tuple:
+        """(lats, lons) en degrés → (xs, ys) en mètres vers l'Est et le Nord."""
+        return _apply(self._forward, lats, lons)
+
+    def inverse(self, xs: Sequence[float], ys: Sequence[float]) -> Tuple:
+        """(xs, ys) en mètres → (lats, lons) en degrés."""
+        return _apply(self._inverse, xs, ys)
+
+
+class UTMProjection:
+    """
+    Mercator transverse universelle sur WGS84 (série de Krüger à l'ordre n³).
+
+    Args:
+        zone: Numéro de fuseau (1 à 60)
+        north: Hémisphère nord (faux nord nul) ou sud (10 000 km)
+    """
+
+    kind = 'utm'
+    K0 = 0.9996
+    FALSE_EASTING = 500000.0
+
+    def __init__(self, zone: int, north: bool = True):
+        if not 1 <= zone <= 60:
+            raise ValueError(f"Fuseau UTM invalide : {zone}")
+        self.zone = zone
+        self.north = north
+        self.lon0 = zone * 6.0 - 183.0
+        self.false_northing = 0.0 if north else 10000000.0
+        n = WGS84_F / (2.0 - WGS84_F)
+        self._n = n
+        self._scale = self.K0 * WGS84_A / (1.0 + n) * (1.0 + n * n / 4.0 + n ** 4 / 64.0)
+        self._e = 2.0 * math.sqrt(n) / (1.0 + n)
+        self._alpha = (n / 2 - 2 * n ** 2 / 3 + 5 * n ** 3 / 16, 13 * n ** 2 / 48 - 3 * n ** 3 / 5,
+                       61 * n ** 3 / 240)
+        self._beta = (n / 2 - 2 * n ** 2 / 3 + 37 * n ** 3 / 96, n ** 2 / 48 + n ** 3 / 15, 17 * n ** 3 / 480)
+        self._delta = (2 * n - 2 * n ** 2 / 3 - 2 * n ** 3, 7 * n ** 2 / 3 - 8 * n ** 3 / 5, 56 * n ** 3 / 15)
+
+    @classmethod
+    def for_site(cls, lat: float, lon: float) -> 'UTMProjection':
+        """Fuseau standard contenant le point (sans les exceptions norvégiennes)."""
+        return cls(int((lon + 180.0) // 6.0) % 60 + 1, lat >= 0.0)
+
+    def _forward(self, lat, lon, xp) -> Tuple:
+        phi = xp.radians(lat)
+        dlam = xp.radians(lon - self.lon0)
+        sin_phi = xp.sin(phi)
+        t = xp.sinh(xp.arctanh(sin_phi) - self._e * xp.arctanh(self._e * sin_phi))
+        xi = xp.arctan2(t, xp.cos(dlam))
+        eta = xp.arctanh(xp.sin(dlam) / xp.sqrt(1.0 + t * t))
+        east, north = eta, xi
+        for j, a in enumerate(self._alpha, start=1):
+            east = east + a * xp.cos(2 * j * xi) * xp.sinh(2 * j * eta)
+            north = north + a * xp.sin(2 * j * xi) * xp.cosh(2 * j * eta)
+        return self.FALSE_EASTING + self._scale * east, self.false_northing + self._scale * north
+
+    def _inverse(self, x, y, xp) -> Tuple:
+        xi = (y - self.false_northing) / self._scale
+        eta = (x - self.FALSE_EASTING) / self._scale
+        xi_p, eta_p = xi, eta
+        for j, b in enumerate(self._beta, start=1):
+            xi_p = xi_p - b * xp.sin(2 * j * xi) * xp.cosh(2 * j * eta)
+            eta_p = eta_p - b * xp.cos(2 * j * xi) * xp.sinh(2 * j * eta)
+        chi = xp.arcsin(xp.sin(xi_p) / xp.cosh(eta_p))
+        phi = chi
+        for j, d in enumerate(self._delta, start=1):
+            phi = phi + d * xp.sin(2 * j * chi)
+        lon = self.lon0 + xp.degrees(xp.arctan2(xp.sinh(eta_p), xp.cos(xi_p)))
+        return xp.degrees(phi), lon
+
+    def forward(self, lats: Sequence[float], lons: Sequence[float]) -> Tuple:
+        """(lats, lons) en degrés → (easting, northing) UTM en mètres."""
+        return _apply(self._forward, lats, lons)
+
+    def inverse(self, xs: Sequence[float], ys: Sequence[float]) -> Tuple:
+        """(easting, northing) UTM en mètres → (lats, lons) en degrés."""
+        return _apply(self._inverse, xs, ys)
+
+
+PROJECTIONS = {'enu': LocalTangentPlane, 'utm': UTMProjection.for_site}
+
+# Une projection par site ; clé arrondie au micro-degré (~0,1 m)
+_SITE_PROJECTIONS: Dict[Tuple[str, float, float], object] = {}
+_SITE_LOCK = threading.Lock()
+
+
+def get_projection(lat0: float, lon0: float, kind: str = 'enu'):
+    """Projection du site (lat0, lon0), construite une seule fois par site."""
+    if kind not in PROJECTIONS:
+        raise ValueError(f"Projection inconnue : {kind!r} ({', '.join(PROJECTIONS)})")
+    key = (kind, round(lat0, 6), round(lon0, 6))
+    projection = _SITE_PROJECTIONS.get(key)
+    if projection is None:
+        with _SITE_LOCK:
+            projection = _SITE_PROJECTIONS.get(key)
+            if projection is None:
+                projection = PROJECTIONS[kind](key[1], key[2])
+                _SITE_PROJECTIONS[key] = projection
+    return projection
+
+
+def project_observations(observations: List[Dict], projection) -> List[Dict]:
+    """
+    Observations en degrés (x = lon, y = lat) → observations en mètres.
+
+    Les autres champs (azimuth_deg, name...) sont conservés.
+    """
+    xs, ys = projection.forward([o['y'] for o in observations], [o['x'] for o in observations])
+    return [{**o, 'x': x, 'y': y} for o, x, y in zip(observations, xs, ys)]
+
+
+
+def site_plane(observations: List[Dict], origin: Optional[Tuple[float, float]] = None,
+               use_latlon: bool = False, center_lat: float = 45.0,
+               center_lon: float = 6.0) -> Tuple[object, List[Dict], Optional[Tuple[float, float]]]:
+    """
+    Plan métrique du site, commun aux rendus (carte interactive, image statique).
+
+    Si use_latlon, les observations (x = lon, y = lat) et l'origine
+    (lon, lat) sont projetées sur le plan tangent centré sur la moyenne des
+    observations ; sinon elles sont déjà en mètres autour de
+    (center_lat, center_lon).
+
+    Returns:
+        (projection, observations en mètres, origine en mètres ou None)
+    """
+    if not use_latlon:
+        return get_projection(center_lat, center_lon), observations, origin
+    site_lat = sum(o['y'] for o in observations) / len(observations)
+    site_lon = sum(o['x'] for o in observations) / len(observations)
+    projection = get_projection(site_lat, site_lon)
+    if origin is not None:
+        xs, ys = projection.forward([origin[1]], [origin[0]])
+        origin = (xs[0], ys[0])
+    return projection, project_observations(observations, projection), origin
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    print("=" * 60)
+    print("Projections WGS84 ↔ plan métrique")
+    print("=" * 60 + "\n")
+
+    rng = random.Random(0)
+    lat0, lon0 = 45.1885, 5.7245
+    lats = [lat0 + rng.uniform(-0.2, 0.2) for _ in range(100000)]
+    lons = [lon0 + rng.uniform(-0.3, 0.3) for _ in range(100000)]
+    for kind in PROJECTIONS:
+        proj = get_projection(lat0, lon0, kind)
+        start = time.perf_counter()
+        xs, ys = proj.forward(lats, lons)
+        back_lats, back_lons = proj.inverse(xs, ys)
+        elapsed = time.perf_counter() - start
+        error = max(max(abs(a - b) for a, b in zip(lats, back_lats)),
+                    max(abs(a - b) for a, b in zip(lons, back_lons))) * 111000.0
+        print(f"✅ {kind:<4} aller-retour de {len(lats)} points : {elapsed * 1000:.0f} ms, "
+              f"écart max {error * 1000:.4f} mm")
+    print(f"\nnumpy : {'oui' if np is not None else 'non (calcul point par point)'}")
@@ -0,0 +1,185 @@
+"""
+Cache des résultats d'estimation, adressé par le contenu des observations.
+
+La clé est une empreinte SHA-256 des observations quantifiées (coordonnées
+au millimètre, azimuts au micro-degré), de la méthode et des paramètres.
+Deux niveaux :
+- un cache LRU en mémoire (réponse en quelques microsecondes) ;
+- un cache SQLite optionnel sur disque, partagé entre exécutions, avec
+  éviction des entrées les moins récemment utilisées au-delà d'une taille.
+"""
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+XY_QUANTUM = 1e-3       # mètres
+AZIMUTH_QUANTUM = 1e-6  # degrés
+
+
+def observations_key(observations: List[Dict], method: str, params: Optional[Dict] = None) -> str:
+    """Empreinte canonique d'un jeu d'observations, d'une méthode et de ses paramètres."""
+    quantized = [
+        (round(o['x'] / XY_QUANTUM), round(o['y'] / XY_QUANTUM),
+         round(o['azimuth_deg'] / AZIMUTH_QUANTUM))
+        for o in observations
+    ]
+    payload = json.dumps([method, sorted((params or {}).items()), quantized], separators=(',', ':'))
+    return hashlib.sha256(payload.encode('ascii')).hexdigest()
+
+
+class ResultCache:
+    """
+    Cache à deux niveaux des résultats (origin, phi, residual, inliers).
+
+    Args:
+        max_entries: Nombre d'entrées du cache mémoire (LRU)
+        db_path: Chemin de la base SQLite (None = pas de niveau disque)
+        max_db_bytes: Taille maximale des valeurs stockées sur disque
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[str] = None,
+                 max_db_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_db_bytes = max_db_bytes
+        self._memory: "OrderedDict[str, Tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        self._db_bytes = 0
+        if db_path is not None:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results(last_access)")
+            self._db.commit()
+            self._db_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Tuple]:
+        """Retourne (origin, phi, residual, inliers) ou None si absent."""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._unpack(value)
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    origin, phi, residual, inliers = json.loads(row[0])
+                    value = (tuple(origin), phi, residual, tuple(inliers))
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return self._unpack(value)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Tuple) -> None:
+        """
+        Enregistre un résultat (origin, phi, residual, inliers).
+
+        Un résultat sans solution (origine ou φ None, valeurs non finies,
+        cas dégénérés) n'est pas mis en cache : il n'aurait pas de
+        représentation JSON standard sur disque.
+        """
+        origin, phi, residual, inliers = result
+        if origin is None or phi is None or not all(math.isfinite(v) for v in (*origin, phi, residual)):
+            return
+        value = (tuple(origin), phi, residual, tuple(inliers))
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                encoded = json.dumps([list(origin), phi, residual, list(inliers)], allow_nan=False)
+                previous = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                if previous is not None:
+                    self._db_bytes -= previous[0]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, encoded, len(encoded), time.time())
+                )
+                self._db_bytes += len(encoded)
+                self._evict_disk()
+                self._db.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """Statistiques de succès/échecs du cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._db_bytes,
+            }
+
+    def clear(self) -> None:
+        """Vide les deux niveaux du cache et remet les compteurs à zéro."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.disk_hits = self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+                self._db_bytes = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _remember(self, key: str, value: Tuple) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        while self._db_bytes > self.max_db_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM results ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._db_bytes = 0
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (row[0],))
+            self._db_bytes -= row[1]
+
+    @staticmethod
+    def _unpack(value: Tuple) -> Tuple:
+        origin, phi, residual, inliers = value
+        return (origin, phi, residual, list(inliers))
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def get_default_cache() -> ResultCache:
+    """
+    Cache partagé par le processus.
+
+    Le niveau disque est activé si la variable d'environnement
+    TABLE_RESULT_CACHE donne le chemin d'une base SQLite.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache(db_path=os.environ.get('TABLE_RESULT_CACHE'))
+    return _default_cache
@@ -0,0 +1,165 @@
+"""
+Générateur de scénarios synthétiques pour les tests à grande échelle.
+
+Produit des tables de vérité terrain (origine et φ connus), avec différentes
+dispositions de curiosités, un bruit de gravure réaliste et une proportion
+contrôlée d'outliers. Les tables sont produites à la demande (générateurs),
+ce qui permet d'en envoyer des millions aux estimateurs ou sur disque sans
+les garder en mémoire.
+
+Format d'une table :
+    {'id': int, 'origin': (x, y), 'phi': float, 'layout': str,
+     'observations': [{'x', 'y', 'azimuth_deg'}, ...],
+     'outliers': [bool, ...]}
+
+Exemple :
+    python scenario_generator.py --count 1000000 --n 8 --output tables.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+import math
+import random
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from table import normalize_deg
+
+LAYOUTS = ['ring', 'cone', 'clustered', 'near-collinear']
+
+
+def _directions(rng: random.Random, n: int, layout: str) -> List[float]:
+    """Directions (degrés, repère de table.py) de l'origine vers chaque curiosité."""
+    if layout == 'ring':
+        return [rng.uniform(0.0, 360.0) for _ in range(n)]
+    if layout == 'cone':
+        # Table tournée vers une vallée : secteur de 90°
+        center = rng.uniform(0.0, 360.0)
+        return [center + rng.uniform(-45.0, 45.0) for _ in range(n)]
+    if layout == 'clustered':
+        # Quelques massifs, chacun regroupant plusieurs sommets
+        centers = [rng.uniform(0.0, 360.0) for _ in range(rng.randint(2, 4))]
+        return [rng.choice(centers) + rng.gauss(0.0, 4.0) for _ in range(n)]
+    if layout == 'near-collinear':
+        # Visées presque parallèles : géométrie mal conditionnée
+        center = rng.uniform(0.0, 360.0)
+        return [center + rng.choice((0.0, 180.0)) + rng.gauss(0.0, 1.5) for _ in range(n)]
+    raise ValueError(f"Disposition inconnue : {layout}")
+
+
+def generate_table(n: int, layout: str = 'ring', noise_deg: float = 0.5,
+                   outlier_ratio: float = 0.0, engraving_step: Optional[float] = None,
+                   min_distance: float = 500.0, max_distance: float = 5000.0,
+                   seed: int = 0, table_id: int = 0) -> Dict:
+    """
+    Génère une table de vérité terrain.
+
+    Args:
+        n: Nombre de curiosités
+        layout: 'ring', 'cone', 'clustered' ou 'near-collinear'
+        noise_deg: Écart-type du bruit de gravure (degrés)
+        outlier_ratio: Proportion d'observations aberrantes (arrondie à l'entier)
+        engraving_step: Si fourni, azimuts arrondis à ce pas (ex. 1° ou 0.5°)
+        min_distance, max_distance: Distances des curiosités à la table (mètres)
+        seed: Graine ; la table ne dépend que de (seed, table_id)
+        table_id: Identifiant de la table dans un flux
+
+    Returns:
+        Dictionnaire décrivant la table (voir docstring du module)
+    """
+    rng = random.Random(seed * 1_000_003 + table_id)
+    origin = (rng.uniform(-1000.0, 1000.0), rng.uniform(-1000.0, 1000.0))
+    phi = rng.uniform(0.0, 360.0)
+
+    n_outliers = int(round(n * outlier_ratio))
+    outlier_indices = set(rng.sample(range(n), n_outliers)) if n_outliers else set()
+
+    observations = []
+    outliers = []
+    for i, theta in enumerate(_directions(rng, n, layout)):
+        dist = rng.uniform(min_distance, max_distance)
+        x = origin[0] + dist * math.cos(math.radians(theta))
+        y = origin[1] + dist * math.sin(math.radians(theta))
+
+        azimuth = theta - phi + rng.gauss(0.0, noise_deg)
+        if i in outlier_indices:
+            # Mauvaise curiosité gravée : azimut sans rapport
+            azimuth += rng.uniform(20.0, 340.0)
+        if engraving_step:
+            azimuth = round(azimuth / engraving_step) * engraving_step
+
+        observations.append({'x': x, 'y': y, 'azimuth_deg': normalize_deg(azimuth)})
+        outliers.append(i in outlier_indices)
+
+    return {
+        'id': table_id,
+        'origin': origin,
+        'phi': phi,
+        'layout': layout,
+        'observations': observations,
+        'outliers': outliers,
+    }
+
+
+def stream_tables(count: int, n: int | Sequence[int] = 6, layouts: Sequence[str] = ('ring',),
+                  noise_deg: float = 0.5, outlier_ratio: float = 0.0,
+                  engraving_step: Optional[float] = None, seed: int = 0) -> Iterator[Dict]:
+    """
+    Produit `count` tables une par une (mémoire constante).
+
+    Si n est une séquence, la taille de chaque table y est tirée ; les
+    dispositions alternent selon `layouts`.
+    """
+    sizes = [n] if isinstance(n, int) else list(n)
+    for table_id in range(count):
+        size = sizes[table_id % len(sizes)]
+        layout = layouts[table_id % len(layouts)]
+        yield generate_table(size, layout, noise_deg, outlier_ratio, engraving_step,
+                             seed=seed, table_id=table_id)
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def write_tables(tables: Iterable[Dict], path: str) -> int:
+    """Écrit un flux de tables en JSON Lines (compressé si .gz). Retourne le nombre écrit."""
+    count = 0
+    with _open(path, 'w') as f:
+        for table in tables:
+            f.write(json.dumps(table, separators=(',', ':')))
+            f.write('\n')
+            count += 1
+    return count
+
+
+def read_tables(path: str) -> Iterator[Dict]:
+    """Relit un fichier écrit par write_tables, table par table."""
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                table = json.loads(line)
+                table['origin'] = tuple(table['origin'])
+                yield table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Générateur de tables d'orientation synthétiques")
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--n', nargs='+', type=int, default=[6], help="Tailles des tables")
+    parser.add_argument('--layout', nargs='+', default=['ring'], choices=LAYOUTS)
+    parser.add_argument('--noise', type=float, default=0.5, help="Bruit de gravure (degrés)")
+    parser.add_argument('--outliers', type=float, default=0.0, help="Proportion d'outliers")
+    parser.add_argument('--engraving-step', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='synthetic_tables.jsonl.gz')
+    args = parser.parse_args()
+
+    written = write_tables(
+        stream_tables(args.count, args.n, args.layout, args.noise, args.outliers,
+                      args.engraving_step, args.seed),
+        args.output
+    )
+    print(f"✅ {written} tables écrites dans : {args.output}")
@@ -0,0 +1,367 @@
+"""
+Rendu statique (SVG, PNG optionnel) d'une table d'orientation.
+
+Alternative légère à visualize_map.create_interactive_map pour les
+vignettes de rapport et les vérifications en CI : ni navigateur, ni
+tuiles, ni folium. Le dessin reprend les éléments de la carte interactive
+(table, curiosités numérotées, lignes de visée, rétro-azimuts, outliers)
+dans le plan métrique des observations.
+
+Les deux rendus acceptent les mêmes entrées : observations (en mètres, ou
+lon/lat avec use_latlon=True, projetées par projection.site_plane comme
+sur la carte interactive), et soit origin/phi/residual/inliers_mask, soit
+un EstimationResult (result=...), soit rien (estimation RANSAC).
+
+Le PNG nécessite Pillow (pip install pillow) ; le SVG n'a aucune dépendance.
+
+Planche contact : render_contact_sheet répartit l'estimation et le dessin
+de milliers de tables sur plusieurs processus et assemble les vignettes
+dans une seule image.
+"""
+
+import html
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from projection import site_plane
+from result_cache import ResultCache, get_default_cache
+from table import EstimationResult, estimate_origin_and_phi, line_dir_from_angle_deg, normalize_deg
+
+# Couleurs des curiosités (mêmes teintes que la carte interactive, noms CSS)
+COLORS = ['red', 'darkred', 'orange', 'purple', 'darkviolet', 'deeppink', 'cadetblue', 'darkgreen']
+OUTLIER_COLOR = '#999999'
+
+# Motifs de tirets (longueur trait, longueur vide) en pixels
+_DASH_OUTLIER = (5, 5)
+_DASH_BACK = (10, 5)
+
+_RGB = {
+    'red': (255, 0, 0), 'darkred': (139, 0, 0), 'orange': (255, 165, 0), 'purple': (128, 0, 128),
+    'darkviolet': (148, 0, 211), 'deeppink': (255, 20, 147), 'cadetblue': (95, 158, 160),
+    'darkgreen': (0, 100, 0), 'green': (0, 128, 0), 'blue': (0, 102, 204), 'white': (255, 255, 255),
+    'black': (0, 0, 0), 'gray': (128, 128, 128),
+}
+
+
+def solution_for(observations: List[Dict], origin: Optional[Tuple[float, float]] = None,
+                 phi: Optional[float] = None, residual: Optional[float] = None,
+                 inliers_mask: Optional[List[bool]] = None, result: Optional[EstimationResult] = None,
+                 cache: Optional[ResultCache] = None,
+                 method: str = 'ransac') -> Tuple[Tuple[float, float], float, Optional[float], List[bool]]:
+    """
+    Complète (origin, phi, residual, inliers_mask) comme create_interactive_map.
+
+    Les valeurs explicites priment, puis celles de result ; ce qui manque
+    encore est estimé avec method.
+    """
+    if result is None and (origin is None or phi is None):
+        result = estimate_origin_and_phi(observations, method=method,
+                                         cache=cache if cache is not None else get_default_cache())
+    if result is not None:
+        origin = origin if origin is not None else result.origin
+        phi = phi if phi is not None else result.phi
+        residual = residual if residual is not None else result.residual
+        inliers_mask = inliers_mask if inliers_mask is not None else list(result.inlier_mask)
+    if inliers_mask is None:
+        inliers_mask = [True] * len(observations)
+    return origin, phi, residual, inliers_mask
+
+
+def _scene(observations: List[Dict], origin: Tuple[float, float], phi: float,
+           inliers_mask: List[bool], size: int) -> Tuple[List[Tuple], List[Tuple]]:
+    """
+    Primitives de dessin en pixels (y vers le bas), communes au SVG et au PNG.
+
+    Returns:
+        (lignes (x1, y1, x2, y2, couleur, épaisseur, tirets),
+         points (x, y, rayon, couleur, libellé))
+    """
+    xs = [o['x'] for o in observations] + [origin[0]]
+    ys = [o['y'] for o in observations] + [origin[1]]
+    min_x, max_x, min_y, max_y = min(xs), max(xs), min(ys), max(ys)
+    span = max(max_x - min_x, max_y - min_y, 1.0)
+    pad = size * 0.08
+    scale = (size - 2 * pad) / span
+    off_x = pad + ((size - 2 * pad) - (max_x - min_x) * scale) / 2.0
+    off_y = pad + ((size - 2 * pad) - (max_y - min_y) * scale) / 2.0
+
+    def to_px(x: float, y: float) -> Tuple[float, float]:
+        return (round(off_x + (x - min_x) * scale, 1), round(size - off_y - (y - min_y) * scale, 1))
+
+    # Lignes assez longues pour sortir du cadre (découpées au bord)
+    reach = 2.0 * span
+    ox, oy = to_px(*origin)
+    lines, points = [], []
+    for i, obs in enumerate(observations):
+        is_inlier = inliers_mask[i]
+        dx, dy = line_dir_from_angle_deg(normalize_deg(obs['azimuth_deg'] + phi))
+        end = to_px(origin[0] + dx * reach, origin[1] + dy * reach)
+        if is_inlier:
+            lines.append((ox, oy, end[0], end[1], 'green', 2.5, None))
+            bx, by = line_dir_from_angle_deg(normalize_deg(obs['azimuth_deg'] + phi + 180.0))
+            start = to_px(obs['x'], obs['y'])
+            back = to_px(obs['x'] + bx * reach, obs['y'] + by * reach)
+            lines.append((start[0], start[1], back[0], back[1], 'orange', 2.0, _DASH_BACK))
+        else:
+            lines.append((ox, oy, end[0], end[1], OUTLIER_COLOR, 1.0, _DASH_OUTLIER))
+    for i, obs in enumerate(observations):
+        x, y = to_px(obs['x'], obs['y'])
+        points.append((x, y, 9, COLORS[i % len(COLORS)] if inliers_mask[i] else OUTLIER_COLOR, str(i + 1)))
+    points.append((ox, oy, 7, 'blue', ''))
+    return lines, points
+
+
+def _caption(phi: float, residual: Optional[float], inliers_mask: List[bool], title: Optional[str]) -> str:
+    text = f"φ = {phi:.2f}°"
+    if residual is not None:
+        text += f" | résiduel {residual:.1f} m"
+    text += f" | {sum(inliers_mask)}/{len(inliers_mask)} inliers"
+    return f"{title} — {text}" if title else text
+
+
+def _svg_group(observations: List[Dict], origin: Tuple[float, float], phi: float,
+               residual: Optional[float], inliers_mask: List[bool], size: int,
+               title: Optional[str], clip_id: str, dx: float = 0.0, dy: float = 0.0) -> str:
+    """Vignette SVG (<g>) d'une table, translatée en (dx, dy)."""
+    lines, points = _scene(observations, origin, phi, inliers_mask, size)
+    parts = [
+        f'<g transform="translate({dx:g},{dy:g})">',
+        f'<clipPath id="{clip_id}"><rect width="{size}" height="{size}"/></clipPath>',
+        f'<rect width="{size}" height="{size}" fill="white" stroke="#0066cc"/>',
+        f'<g clip-path="url(#{clip_id})">',
+    ]
+    for x1, y1, x2, y2, color, width, dash in lines:
+        dash_attr = f' stroke-dasharray="{dash[0]},{dash[1]}"' if dash else ''
+        opacity = 0.3 if color == OUTLIER_COLOR else 0.7
+        parts.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="{color}" '
+                     f'stroke-width="{width}" stroke-opacity="{opacity}"{dash_attr}/>')
+    for x, y, r, color, label in points:
+        parts.append(f'<circle cx="{x}" cy="{y}" r="{r}" fill="{color}" stroke="white" stroke-width="2"/>')
+        if label:
+            parts.append(f'<text x="{x}" y="{y}" dy="0.35em" text-anchor="middle" font-size="9" '
+                         f'font-weight="bold" fill="white">{label}</text>')
+    parts.append('</g>')
+    parts.append(f'<text x="4" y="{size - 5}" font-size="{max(8, size // 40)}" fill="#333">'
+                 f'{html.escape(_caption(phi, residual, inliers_mask, title))}</text>')
+    parts.append('</g>')
+    return ''.join(parts)
+
+
+def render_svg(observations: List[Dict], origin: Optional[Tuple[float, float]] = None,
+               phi: Optional[float] = None, residual: Optional[float] = None,
+               inliers_mask: Optional[List[bool]] = None, result: Optional[EstimationResult] = None,
+               cache: Optional[ResultCache] = None, size: int = 480, title: Optional[str] = None,
+               use_latlon: bool = False) -> str:
+    """Document SVG d'une table (mêmes entrées que create_interactive_map)."""
+    _, observations, origin = site_plane(observations, origin, use_latlon)
+    origin, phi, residual, inliers_mask = solution_for(observations, origin, phi, residual,
+                                                       inliers_mask, result, cache)
+    body = _svg_group(observations, origin, phi, residual, inliers_mask, size, title, 'cadre')
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+            f'viewBox="0 0 {size} {size}" font-family="Arial, sans-serif">{body}</svg>\n')
+
+
+def _require_pillow():
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError as exc:
+        raise ImportError("Le rendu PNG nécessite Pillow (pip install pillow) ; utiliser un fichier .svg") from exc
+    return Image, ImageDraw
+
+
+def _png_font(size: int):
+    """Police DejaVu (φ, accents) si disponible, sinon la police par défaut de Pillow."""
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        pass
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, ImportError, OSError):
+        return ImageFont.load_default()
+
+
+def _rgb(color: str) -> Tuple[int, int, int]:
+    if color.startswith('#'):
+        return tuple(int(color[k:k + 2], 16) for k in (1, 3, 5))
+    return _RGB[color]
+
+
+def _dashed(draw, x1: float, y1: float, x2: float, y2: float, fill, width: int,
+            dash: Tuple[int, int]) -> None:
+    length = math.hypot(x2 - x1, y2 - y1)
+    if length == 0:
+        return
+    ux, uy = (x2 - x1) / length, (y2 - y1) / length
+    pos = 0.0
+    while pos < length:
+        end = min(pos + dash[0], length)
+        draw.line((x1 + ux * pos, y1 + uy * pos, x1 + ux * end, y1 + uy * end), fill=fill, width=width)
+        pos += dash[0] + dash[1]
+
+
+def _png_image(observations: List[Dict], origin: Tuple[float, float], phi: float,
+               residual: Optional[float], inliers_mask: List[bool], size: int, title: Optional[str]):
+    """Vignette Pillow (mode RGB) d'une table."""
+    Image, ImageDraw = _require_pillow()
+    image = Image.new('RGB', (size, size), 'white')
+    draw = ImageDraw.Draw(image)
+    lines, points = _scene(observations, origin, phi, inliers_mask, size)
+    # Les tracés hors cadre sont découpés par Pillow ; les longueurs de tirets restent bornées
+    limit = 4 * size
+    for x1, y1, x2, y2, color, width, dash in lines:
+        length = math.hypot(x2 - x1, y2 - y1)
+        if length > limit:
+            x2, y2 = x1 + (x2 - x1) * limit / length, y1 + (y2 - y1) * limit / length
+        fill = _rgb(color)
+        if dash:
+            _dashed(draw, x1, y1, x2, y2, fill, max(1, round(width)), dash)
+        else:
+            draw.line((x1, y1, x2, y2), fill=fill, width=max(1, round(width)))
+    label_font = _png_font(9)
+    for x, y, r, color, label in points:
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=_rgb(color), outline='white', width=2)
+        if label:
+            draw.text((x, y), label, fill='white', anchor='mm', font=label_font)
+    draw.rectangle((0, 0, size - 1, size - 1), outline=_rgb('blue'))
+    draw.text((4, size - 4), _caption(phi, residual, inliers_mask, title), fill=(51, 51, 51),
+              anchor='ld', font=_png_font(max(8, size // 40)))
+    return image
+
+
+def create_static_map(observations: List[Dict], origin: Optional[Tuple[float, float]] = None,
+                      phi: Optional[float] = None, residual: Optional[float] = None,
+                      inliers_mask: Optional[List[bool]] = None, result: Optional[EstimationResult] = None,
+                      output_file: str = "table_orientation_map.svg", cache: Optional[ResultCache] = None,
+                      size: int = 480, title: Optional[str] = None, use_latlon: bool = False) -> str:
+    """
+    Génère une image statique d'une table (SVG, ou PNG si output_file finit par .png).
+
+    Args:
+        observations: Liste de dict {'x', 'y', 'azimuth_deg', 'name' (opt)}
+        origin, phi, residual, inliers_mask: Solution (voir create_interactive_map) ;
+            origin est (lon, lat) si use_latlon
+        result: EstimationResult fournissant les valeurs non précisées
+            (origine en mètres dans le plan du site)
+        output_file: Fichier .svg ou .png
+        cache: Cache des résultats d'estimation (par défaut, le cache du processus)
+        size: Côté de l'image en pixels
+        title: Légende optionnelle
+        use_latlon: Si True, x/y sont lon/lat (projetés en mètres sur le plan
+            tangent local, comme create_interactive_map)
+
+    Returns:
+        Chemin du fichier créé
+    """
+    if output_file.lower().endswith('.png'):
+        _, observations, origin = site_plane(observations, origin, use_latlon)
+        origin, phi, residual, inliers_mask = solution_for(observations, origin, phi, residual,
+                                                           inliers_mask, result, cache)
+        _png_image(observations, origin, phi, residual, inliers_mask, size, title).save(output_file)
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(render_svg(observations, origin, phi, residual, inliers_mask, result, cache, size, title,
+                               use_latlon))
+    return output_file
+
+
+def _contact_cell(job: Tuple[int, List[Dict], str, str, int, str, int]):
+    """Estime et dessine une vignette de la planche (exécuté dans un processus de travail)."""
+    index, observations, title, method, cell_size, fmt, columns = job
+    origin, phi, residual, inliers_mask = solution_for(observations, method=method)
+    if fmt == 'png':
+        return _png_image(observations, origin, phi, residual, inliers_mask, cell_size, title).tobytes()
+    dx, dy = (index % columns) * cell_size, (index // columns) * cell_size
+    return _svg_group(observations, origin, phi, residual, inliers_mask, cell_size, title,
+                      f"cadre{index}", dx, dy)
+
+
+def render_contact_sheet(tables: Iterable[Dict], output_file: str = "contact_sheet.svg",
+                         columns: int = 10, cell_size: int = 160, method: str = 'ransac',
+                         workers: Optional[int] = None) -> str:
+    """
+    Planche contact : une vignette par table, calculées en parallèle.
+
+    Args:
+        tables: Tables {'observations', 'name' ou 'id' (opt)} (ex. scenario_generator)
+        output_file: Fichier .svg ou .png (Pillow)
+        columns: Nombre de vignettes par ligne
+        cell_size: Côté d'une vignette en pixels
+        method: Méthode d'estimation des tables
+        workers: Nombre de processus (None = nombre de cœurs, 1 = sans parallélisme)
+
+    Returns:
+        Chemin du fichier créé
+    """
+    fmt = 'png' if output_file.lower().endswith('.png') else 'svg'
+    if fmt == 'png':
+        Image, _ = _require_pillow()
+    jobs = [
+        (i, table['observations'], str(table.get('name', table.get('id', i + 1))), method, cell_size, fmt, columns)
+        for i, table in enumerate(tables)
+    ]
+    rows = max(1, math.ceil(len(jobs) / columns))
+    width, height = min(len(jobs), columns) * cell_size or cell_size, rows * cell_size
+
+    if workers == 1:
+        cells = map(_contact_cell, jobs)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        cells = executor.map(_contact_cell, jobs, chunksize=max(1, len(jobs) // (4 * (os.cpu_count() or 1))))
+    try:
+        if fmt == 'png':
+            sheet = Image.new('RGB', (width, height), 'white')
+            for i, cell in enumerate(cells):
+                sheet.paste(Image.frombytes('RGB', (cell_size, cell_size), cell),
+                            ((i % columns) * cell_size, (i // columns) * cell_size))
+            sheet.save(output_file)
+        else:
+            # Les vignettes sont écrites au fur et à mesure qu'elles arrivent
+            with open(output_file, 'w', encoding='utf-8') as f:
+                f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+                        f'viewBox="0 0 {width} {height}" font-family="Arial, sans-serif">\n')
+                for cell in cells:
+                    f.write(cell)
+                    f.write('\n')
+                f.write('</svg>\n')
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return output_file
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Rendu statique (SVG/PNG) de tables d'orientation")
+    parser.add_argument('--output', default='table_orientation_map.svg', help="Image d'une table (.svg ou .png)")
+    parser.add_argument('--contact-sheet', metavar='FICHIER', default=None,
+                        help="Planche contact de tables synthétiques (.svg ou .png)")
+    parser.add_argument('--count', type=int, default=500, help="Nombre de tables de la planche")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Rendu statique de tables d'orientation")
+    print("=" * 60 + "\n")
+
+    if args.contact_sheet:
+        from scenario_generator import stream_tables
+        start = time.perf_counter()
+        render_contact_sheet(stream_tables(args.count, n=[5, 8, 12], outlier_ratio=0.15),
+                             args.contact_sheet, workers=args.workers)
+        print(f"✅ Planche de {args.count} tables : {args.contact_sheet} ({time.perf_counter() - start:.1f} s)")
+    else:
+        observations = [
+            {'x': 2900.0, 'y': 200.0, 'azimuth_deg': 360.0, 'name': 'Mont Nord'},
+            {'x': 1601.0, 'y': 1001.0, 'azimuth_deg': 30.0, 'name': 'Pic Est'},
+            {'x': 4000.0, 'y': 260.0, 'azimuth_deg': 210.0, 'name': 'Crête Ouest'},
+            {'x': 400.0, 'y': 480.0, 'azimuth_deg': 200.0, 'name': 'Vallée'},
+        ]
+        create_static_map(observations, output_file=args.output, title="Démo")
+        print(f"✅ Image sauvegardée dans : {args.output}")
@@ -1,6 +1,100 @@
+import logging
 import math
 import random
-from typing import List, Tuple, Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Sequence, Tuple, Dict, Optional
+
+import backends
+import instrumentation
+import metrics
+from result_cache import ResultCache, observations_key
+
+logger = logging.getLogger(__name__)
+
+
+class SolveBudget:
+    """
+    Budget de calcul d'une résolution (temps limite et/ou nombre d'évaluations).
+
+    Chaque évaluation de compute_residual_for_phi consomme une unité. Quand le
+    budget est épuisé, les méthodes s'arrêtent et retournent la meilleure
+    solution trouvée jusque-là ; `complete` passe alors à False. Une
+    résolution qui se termine en atteignant tout juste le budget reste
+    complète : seul un arrêt anticipé (`stopped`) la rend incomplète.
+
+    Args:
+        time_limit: Durée maximale en secondes (None = illimitée)
+        max_evaluations: Nombre maximal d'évaluations du résiduel (None = illimité)
+        progress: Callback optionnel progress(stage, phi, residual) appelé à
+            chaque étape et à chaque itération RANSAC
+        cancel_event: Événement optionnel (threading.Event ou Event d'un
+            multiprocessing.Manager) ; s'il est levé, la résolution s'arrête
+    """
+
+    # Intervalle (en évaluations) entre deux lectures de cancel_event
+    CANCEL_CHECK_INTERVAL = 16
+
+    def __init__(self, time_limit: Optional[float] = None,
+                 max_evaluations: Optional[int] = None,
+                 progress: Optional[Callable[[str, float, float], None]] = None,
+                 cancel_event=None):
+        self.deadline = None if time_limit is None else time.monotonic() + time_limit
+        self.max_evaluations = max_evaluations
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.evaluations = 0
+        self.exhausted = False
+        self.stopped = False
+        self.cancelled = False
+        self._next_cancel_check = 0
+
+    def tick(self, n: int = 1) -> bool:
+        """Consomme n évaluations. Retourne True si le budget est épuisé."""
+        self.evaluations += n
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.exhausted = True
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.exhausted = True
+        elif self.cancel_event is not None and self.evaluations >= self._next_cancel_check:
+            self._next_cancel_check = self.evaluations + self.CANCEL_CHECK_INTERVAL
+            if self.cancel_event.is_set():
+                self.cancel()
+        return self.exhausted
+
+    def cancel(self) -> None:
+        """Interrompt la résolution à la prochaine évaluation."""
+        self.cancelled = True
+        self.exhausted = True
+
+    def report(self, stage: str, phi: Optional[float], residual: float) -> None:
+        """Signale la meilleure solution courante au callback de progression."""
+        if self.progress is not None and phi is not None:
+            self.progress(stage, phi, residual)
+
+    @property
+    def complete(self) -> bool:
+        """True si aucune méthode n'a été interrompue par le budget."""
+        return not self.stopped
+
+
+def _exhausted(budget: Optional[SolveBudget]) -> bool:
+    """
+    True si le budget interdit de poursuivre.
+    
+    À appeler avant un travail supplémentaire : un refus marque la
+    résolution comme interrompue (budget.stopped).
+    """
+    if budget is None or not budget.exhausted:
+        return False
+    budget.stopped = True
+    return True
+
+
+def _tick(budget: Optional[SolveBudget], n: int = 1) -> bool:
+    return budget is not None and budget.tick(n)
 
 def normalize_deg(a: float) -> float:
     """Normalise un angle en degrés dans l'intervalle [0, 360[."""
@@ -37,6 +131,8 @@ def intersect_lines(p1: Tuple[float, float], d1: Tuple[float, float],
 
 def distance_point_to_line(p: Tuple[float, float], q: Tuple[float, float], d: Tuple[float, float]) -> float:
     """Calcule la distance d'un point p à une droite passant par q avec direction d."""
+    if instrumentation.ENABLED:
+        instrumentation.count('distance_point_to_line')
     px, py = p
     qx, qy = q
     dx, dy = d
@@ -44,79 +140,327 @@ def distance_point_to_line(p: Tuple[float, float], q: Tuple[float, float], d: Tu
     den = math.hypot(dx, dy)
     return num / den
 
-def least_squares_origin(lines: List[Tuple[Tuple[float, float], Tuple[float, float]]]) -> Tuple[float, float]:
+def least_squares_origin(lines: List[Tuple[Tuple[float, float], Tuple[float, float]]], weights: Optional[List[float]] = None) -> Tuple[float, float]:
     """
     Calcule l'origine optimale par moindres carrés.
     
     Minimise la somme des carrés des distances aux droites en résolvant
-    le système linéaire 2x2 : A * [x0, y0]^T = b
+    le système linéaire 2x2 : A * [x0, y0]^T = b. Avec weights, chaque
+    droite contribue au système avec son poids (moindres carrés pondérés).
     
-    Complexité : O(n) où n est le nombre de droites.
+    Complexité : O(n) où n est le nombre de droites. Le calcul est
+    délégué au backend courant (voir backends.py).
     """
-    if len(lines) == 0:
-        return (0.0, 0.0)
+    if instrumentation.ENABLED:
+        instrumentation.count('least_squares_origin')
+    return backends.get_backend().least_squares_origin(lines, weights)
+
+def _count_kernel_work(solves: int, distances: int) -> None:
+    """
+    Compte le travail fait par les noyaux du backend sous les noms des
+    fonctions de référence : une résolution 2x2 = un least_squares_origin,
+    une distance point-droite = un distance_point_to_line.
+    """
+    instrumentation.count('least_squares_origin', solves)
+    instrumentation.count('distance_point_to_line', distances)
+
+def _line_distances(backend, prepared, n: int, origin: Tuple[float, float], cos_phi: float, sin_phi: float) -> List[float]:
+    """backend.line_distances compté par l'instrumentation (n = nombre d'observations)."""
+    if instrumentation.ENABLED:
+        _count_kernel_work(0, n)
+    return backend.line_distances(prepared, origin, cos_phi, sin_phi)
+
+def compute_residual_for_phi(phi: float, observations: List[Dict], memo: Optional['ResidualMemo'] = None) -> Tuple[Tuple[float, float], float]:
+    """
+    Calcule l'origine optimale et le résiduel pour un angle φ donné.
+    
+    Args:
+        phi: Angle d'orientation de la table en degrés
+        observations: Liste des observations {x, y, azimuth_deg}
+        memo: ResidualMemo optionnel servant les évaluations déjà faites
+    
+    Returns:
+        (origin, residual): Position optimale et résiduel moyen
+    """
+    if memo is not None:
+        return memo.evaluate(phi, observations)
+    if instrumentation.ENABLED:
+        instrumentation.count('compute_residual_for_phi')
+        _count_kernel_work(1, len(observations))
     
-    # Construction de la matrice normale A et du vecteur b
-    a11, a12, a22 = 0.0, 0.0, 0.0
-    b1, b2 = 0.0, 0.0
+    backend = backends.get_backend()
+    cos_phi, sin_phi = line_dir_from_angle_deg(phi)
+    return backend.residual_for_phi(backend.prepare(observations), cos_phi, sin_phi)
+
+# Nombre d'angles confiés au backend en un appel lors d'un balayage
+SCAN_CHUNK = 256
+
+def _scan_angles(observations: List[Dict], phis: List[float], cos_phis: List[float], sin_phis: List[float], budget: Optional[SolveBudget], memo: Optional['ResidualMemo']) -> Iterator[Tuple[float, Tuple[float, float], float]]:
+    """
+    Évalue le résiduel pour chaque angle de phis, par paquets de SCAN_CHUNK.
     
-    for (qx, qy), (dx, dy) in lines:
-        # Normalisation de la direction
-        norm = math.hypot(dx, dy)
-        if norm < 1e-12:
-            continue
-        dx, dy = dx / norm, dy / norm
+    Produit (phi, origin, residual) dans l'ordre ; le budget est consommé
+    angle par angle et le balayage s'arrête dès qu'il est épuisé.
+    """
+    backend = backends.get_backend()
+    prepared = memo.prepared(observations, backend) if memo is not None else None
+    for start in range(0, len(phis), SCAN_CHUNK):
+        stop = min(start + SCAN_CHUNK, len(phis))
         
-        # Contributions au système normal
-        # Équation de droite: dy*x - dx*y = dy*qx - dx*qy
-        a11 += dy * dy
-        a12 -= dy * dx
-        a22 += dx * dx
+        def compute(indices):
+            nonlocal prepared
+            if prepared is None:
+                prepared = backend.prepare(observations)
+            if instrumentation.ENABLED:
+                instrumentation.count('compute_residual_for_phi', len(indices))
+                _count_kernel_work(len(indices), len(indices) * len(observations))
+            return backend.residuals_for_angles(prepared,
+                                                [cos_phis[start + i] for i in indices],
+                                                [sin_phis[start + i] for i in indices])
         
-        rhs = dy * qx - dx * qy
-        b1 += dy * rhs
-        b2 -= dx * rhs
+        if memo is not None:
+            results = memo.evaluate_many(phis[start:stop], observations, compute)
+        else:
+            results = zip(*compute(range(stop - start)))
+        for phi, (origin, residual) in zip(phis[start:stop], results):
+            if _exhausted(budget):
+                return
+            yield (phi, origin, residual)
+            _tick(budget)
+
+# Tables (cos, sin) par pas de grille, construites à la demande
+_TRIG_TABLES: Dict[float, Tuple[Tuple[float, ...], Tuple[float, ...]]] = {}
+_TRIG_LOCK = threading.Lock()
+
+def grid_trig_table(step_deg: float) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+    """
+    Retourne (cos, sin) des angles k * step_deg de la grille [0, 360°[.
     
-    # Résolution du système 2x2
-    det = a11 * a22 - a12 * a12
-    if abs(det) < 1e-12:
-        # Système singulier, on retourne le barycentre des points q
-        xs = [q[0] for q, d in lines]
-        ys = [q[1] for q, d in lines]
-        return (sum(xs) / len(xs), sum(ys) / len(ys))
+    Chaque table est calculée une seule fois par processus puis partagée en
+    lecture seule (tuples immuables) entre threads, tables d'un lot et
+    processus forkés.
+    """
+    table = _TRIG_TABLES.get(step_deg)
+    if table is None:
+        with _TRIG_LOCK:
+            table = _TRIG_TABLES.get(step_deg)
+            if table is None:
+                n = int(math.ceil(360.0 / step_deg - 1e-9))
+                angles = [deg2rad(k * step_deg) for k in range(n)]
+                table = (tuple(math.cos(a) for a in angles), tuple(math.sin(a) for a in angles))
+                _TRIG_TABLES[step_deg] = table
+    return table
+
+def scan_phi_grid(observations: List[Dict], step_deg: float, budget: Optional[SolveBudget] = None, memo: Optional['ResidualMemo'] = None) -> Iterator[Tuple[float, Tuple[float, float], float]]:
+    """
+    Évalue le résiduel pour φ = k * step_deg sur [0, 360°[.
     
-    x0 = (a22 * b1 - a12 * b2) / det
-    y0 = (a11 * b2 - a12 * b1) / det
+    Les directions des droites sont obtenues par rotation du rétro-azimut
+    de chaque observation avec les valeurs de grid_trig_table : aucun appel
+    à math.cos / math.sin par angle.
     
-    return (x0, y0)
+    Produit des triplets (phi, origin, residual) ; s'arrête dès que le
+    budget est épuisé. Un balayage déjà rangé dans memo par
+    scan_phi_grid_batch est relu sans nouvelle évaluation.
+    """
+    cos_table, sin_table = grid_trig_table(step_deg)
+    phis = [k * step_deg for k in range(len(cos_table))]
+    cached = memo.grid(observations, step_deg) if memo is not None else None
+    if cached is not None:
+        return _replay_scan(phis, cached, budget)
+    return _scan_angles(observations, phis, cos_table, sin_table, budget, memo)
+
+def _replay_scan(phis: List[float], results: List[Tuple[Tuple[float, float], float]], budget: Optional[SolveBudget]) -> Iterator[Tuple[float, Tuple[float, float], float]]:
+    for phi, (origin, residual) in zip(phis, results):
+        if _exhausted(budget):
+            return
+        yield (phi, origin, residual)
+        _tick(budget)
 
-def compute_residual_for_phi(phi: float, observations: List[Dict]) -> Tuple[Tuple[float, float], float]:
+def scan_phi_grid_batch(batch: List[List[Dict]], step_deg: float, memos: Optional[Sequence[Optional['ResidualMemo']]] = None) -> List[List[Tuple[float, Tuple[float, float], float]]]:
     """
-    Calcule l'origine optimale et le résiduel pour un angle φ donné.
+    scan_phi_grid pour plusieurs jeux d'observations en un seul passage.
     
-    Args:
-        phi: Angle d'orientation de la table en degrés
-        observations: Liste des observations {x, y, azimuth_deg}
+    Les tables dont le balayage n'est pas déjà dans leur mémo (memos[i],
+    qui peut être partagé entre tables) sont évaluées ensemble par un
+    unique appel à backend.residuals_for_angles_batch ; chaque balayage est
+    rangé dans le mémo (store_grid), où scan_phi_grid le relira. Aucun
+    budget n'est consommé ici : l'appelant le décompte en parcourant les
+    résultats.
     
     Returns:
-        (origin, residual): Position optimale et résiduel moyen
+        Pour chaque table, la liste des (phi, origin, residual) de la grille
+    """
+    cos_table, sin_table = grid_trig_table(step_deg)
+    phis = [k * step_deg for k in range(len(cos_table))]
+    backend = backends.get_backend()
+    memos = memos if memos is not None else [None] * len(batch)
+    scans = [memo.grid(observations, step_deg) if memo is not None else None
+             for observations, memo in zip(batch, memos)]
+    todo = [i for i, scan in enumerate(scans) if scan is None]
+    if todo:
+        prepared = [memos[i].prepared(batch[i], backend) if memos[i] is not None else backend.prepare(batch[i])
+                    for i in todo]
+        if instrumentation.ENABLED:
+            instrumentation.count('compute_residual_for_phi', len(todo) * len(phis))
+            _count_kernel_work(len(todo) * len(phis), len(phis) * sum(len(batch[i]) for i in todo))
+        computed = backend.residuals_for_angles_batch(prepared, cos_table, sin_table)
+        for i, (origins, residuals) in zip(todo, computed):
+            if memos[i] is not None:
+                scans[i] = memos[i].store_grid(batch[i], step_deg, origins, residuals)
+            else:
+                scans[i] = list(zip(origins, residuals))
+    return [[(phi, origin, residual) for phi, (origin, residual) in zip(phis, scan)] for scan in scans]
+
+class ResidualMemo:
     """
-    lines = []
-    for obs in observations:
-        back_bearing = normalize_deg(obs['azimuth_deg'] + phi + 180.0)
-        d = line_dir_from_angle_deg(back_bearing)
-        q = (obs['x'], obs['y'])
-        lines.append((q, d))
+    Mémoïsation de compute_residual_for_phi le temps d'une résolution.
     
-    origin = least_squares_origin(lines)
+    Les étapes de recherche réévaluent souvent les mêmes angles (fenêtres
+    qui se chevauchent, voisins du gradient, triplets RANSAC déjà tirés).
+    La clé est (jeu d'observations, φ quantifié à PHI_QUANTUM près) ; deux
+    listes de même contenu, dans n'importe quel ordre, partagent leurs entrées.
     
-    # Calcul du résiduel
-    residuals = [distance_point_to_line(origin, q, d) for (q, d) in lines]
-    residual = sum(residuals) / len(residuals) if residuals else float('inf')
+    Les balayages complets d'une grille calculés par lot
+    (scan_phi_grid_batch) sont rangés tels quels, par jeu d'observations et
+    pas, et relus d'un bloc par scan_phi_grid.
+    
+    Un mémo gardé d'une résolution à l'autre reste borné : les tables
+    annexes (listes connues, jetons de contenu, observations préparées,
+    balayages) sont elles aussi des LRU, de taille max_lists. Un jeton évincé n'est
+    jamais réattribué ; ses évaluations vieillissent dans le LRU principal.
+    
+    Args:
+        max_entries: Nombre maximal d'évaluations conservées (LRU)
+        max_lists: Nombre maximal de jeux d'observations suivis (LRU)
+    """
+    
+    PHI_QUANTUM = 1e-6  # degrés
+    
+    def __init__(self, max_entries: int = 50000, max_lists: int = 1024):
+        self.max_entries = max_entries
+        self.max_lists = max_lists
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[Tuple[float, float], float]]" = OrderedDict()
+        # id(liste) -> (liste, jeton) ; la référence garde l'id valide
+        self._lists: "OrderedDict[int, Tuple[List[Dict], int]]" = OrderedDict()
+        self._tokens: "OrderedDict[Tuple, int]" = OrderedDict()
+        self._next_token = 0
+        # id(liste) -> (backend, observations préparées pour ce backend) ; évincé avec _lists
+        self._prepared: Dict[int, Tuple[object, object]] = {}
+        # (jeton, pas) -> balayage complet de la grille (scan_phi_grid_batch)
+        self._grids: "OrderedDict[Tuple[int, float], List[Tuple[Tuple[float, float], float]]]" = OrderedDict()
+    
+    def prepared(self, observations: List[Dict], backend) -> object:
+        """Observations préparées par backend.prepare, calculées une fois par liste."""
+        self._token(observations)
+        entry = self._prepared.get(id(observations))
+        if entry is None or entry[0] is not backend:
+            entry = (backend, backend.prepare(observations))
+            self._prepared[id(observations)] = entry
+        return entry[1]
+    
+    def _token(self, observations: List[Dict]) -> int:
+        known = self._lists.get(id(observations))
+        if known is not None:
+            self._lists.move_to_end(id(observations))
+            return known[1]
+        content = tuple(sorted((o['x'], o['y'], o['azimuth_deg']) for o in observations))
+        token = self._tokens.get(content)
+        if token is None:
+            token = self._tokens[content] = self._next_token
+            self._next_token += 1
+            if len(self._tokens) > self.max_lists:
+                self._tokens.popitem(last=False)
+        else:
+            self._tokens.move_to_end(content)
+        self._lists[id(observations)] = (observations, token)
+        if len(self._lists) > self.max_lists:
+            evicted, _ = self._lists.popitem(last=False)
+            self._prepared.pop(evicted, None)
+        return token
+    
+    def evaluate(self, phi: float, observations: List[Dict]) -> Tuple[Tuple[float, float], float]:
+        """Retourne compute_residual_for_phi(phi, observations), depuis le cache si possible."""
+        if not math.isfinite(phi):
+            # φ non fini (résiduel infini dans un gradient) : rien à quantifier ni à mémoriser
+            return compute_residual_for_phi(phi, observations)
+        key = (self._token(observations), round(normalize_deg(phi) / self.PHI_QUANTUM))
+        result = self._entries.get(key)
+        if result is not None:
+            self.hits += 1
+            if instrumentation.ENABLED:
+                instrumentation.count('residual_memo_hits')
+            self._entries.move_to_end(key)
+            return result
+        self.misses += 1
+        if instrumentation.ENABLED:
+            instrumentation.count('compute_residual_for_phi')
+            _count_kernel_work(1, len(observations))
+        backend = backends.get_backend()
+        cos_phi, sin_phi = line_dir_from_angle_deg(phi)
+        result = backend.residual_for_phi(self.prepared(observations, backend), cos_phi, sin_phi)
+        self._entries[key] = result
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return result
     
-    return (origin, residual)
+    def evaluate_many(self, phis: List[float], observations: List[Dict],
+                      compute: Callable[[List[int]], Tuple[List[Tuple[float, float]], List[float]]]) -> List[Tuple[Tuple[float, float], float]]:
+        """
+        Variante par lot de evaluate.
+        
+        compute(indices) calcule en un appel les angles phis[i] absents du
+        cache et retourne (origins, residuals) alignés sur indices.
+        """
+        token = self._token(observations)
+        keys = [(token, round(normalize_deg(phi) / self.PHI_QUANTUM)) for phi in phis]
+        results = [self._entries.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        hits = len(keys) - len(missing)
+        if hits:
+            self.hits += hits
+            if instrumentation.ENABLED:
+                instrumentation.count('residual_memo_hits', hits)
+        if missing:
+            self.misses += len(missing)
+            origins, residuals = compute(missing)
+            for i, origin, residual in zip(missing, origins, residuals):
+                results[i] = (origin, residual)
+                self._entries[keys[i]] = results[i]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+    
+    def grid(self, observations: List[Dict], step_deg: float) -> Optional[List[Tuple[Tuple[float, float], float]]]:
+        """Balayage complet de pas step_deg rangé par store_grid, ou None."""
+        key = (self._token(observations), step_deg)
+        results = self._grids.get(key)
+        if results is not None:
+            self._grids.move_to_end(key)
+            self.hits += len(results)
+            if instrumentation.ENABLED:
+                instrumentation.count('residual_memo_hits', len(results))
+        return results
+    
+    def store_grid(self, observations: List[Dict], step_deg: float, origins: List[Tuple[float, float]],
+                   residuals: List[float]) -> List[Tuple[Tuple[float, float], float]]:
+        """Range le balayage complet (origins, residuals) de pas step_deg et le retourne."""
+        results = list(zip(origins, residuals))
+        self.misses += len(results)
+        self._grids[(self._token(observations), step_deg)] = results
+        if len(self._grids) > self.max_lists:
+            self._grids.popitem(last=False)
+        return results
+    
+    @property
+    def saved_evaluations(self) -> int:
+        """Nombre d'évaluations évitées grâce au cache."""
+        return self.hits
+
 
-def ternary_search_phi(observations: List[Dict], epsilon: float = 0.01) -> Tuple[float, Tuple[float, float], float]:
+def ternary_search_phi(observations: List[Dict], epsilon: float = 0.01, budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None) -> Tuple[float, Tuple[float, float], float]:
     """
     Recherche ternaire pour trouver l'angle φ optimal.
     
@@ -130,24 +474,26 @@ def ternary_search_phi(observations: List[Dict], epsilon: float = 0.01) -> Tuple
     """
     left, right = 0.0, 360.0
     
-    while right - left > epsilon:
+    while right - left > epsilon and not _exhausted(budget):
         mid1 = left + (right - left) / 3.0
         mid2 = right - (right - left) / 3.0
         
-        origin1, res1 = compute_residual_for_phi(mid1, observations)
-        origin2, res2 = compute_residual_for_phi(mid2, observations)
+        origin1, res1 = compute_residual_for_phi(mid1, observations, memo=memo)
+        origin2, res2 = compute_residual_for_phi(mid2, observations, memo=memo)
         
         if res1 > res2:
             left = mid1
         else:
             right = mid2
+        _tick(budget, 2)
     
     phi_opt = (left + right) / 2.0
-    origin_opt, residual_opt = compute_residual_for_phi(phi_opt, observations)
+    origin_opt, residual_opt = compute_residual_for_phi(phi_opt, observations, memo=memo)
+    _tick(budget)
     
     return (phi_opt, origin_opt, residual_opt)
 
-def gradient_descent_phi(observations: List[Dict], phi_init: float, learning_rate: float = 0.1, max_iter: int = 100) -> Tuple[float, Tuple[float, float], float]:
+def gradient_descent_phi(observations: List[Dict], phi_init: float, learning_rate: float = 0.1, max_iter: int = 100, budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None) -> Tuple[float, Tuple[float, float], float]:
     """
     Affine φ par descente de gradient avec dérivée numérique.
     
@@ -160,8 +506,11 @@ def gradient_descent_phi(observations: List[Dict], phi_init: float, learning_rat
     h = 0.01  # Pas pour la dérivée numérique
     
     for _ in range(max_iter):
-        origin_minus, res_minus = compute_residual_for_phi(normalize_deg(phi - h), observations)
-        origin_plus, res_plus = compute_residual_for_phi(normalize_deg(phi + h), observations)
+        if _exhausted(budget):
+            break
+        origin_minus, res_minus = compute_residual_for_phi(normalize_deg(phi - h), observations, memo=memo)
+        origin_plus, res_plus = compute_residual_for_phi(normalize_deg(phi + h), observations, memo=memo)
+        _tick(budget, 2)
         
         # Gradient numérique
         gradient = (res_plus - res_minus) / (2.0 * h)
@@ -175,38 +524,42 @@ def gradient_descent_phi(observations: List[Dict], phi_init: float, learning_rat
         
         phi = phi_new
     
-    origin_final, residual_final = compute_residual_for_phi(phi, observations)
+    origin_final, residual_final = compute_residual_for_phi(phi, observations, memo=memo)
+    _tick(budget)
     return (phi, origin_final, residual_final)
 
-def dense_search_phi(observations: List[Dict], step_deg: float = 0.1) -> Tuple[float, Tuple[float, float], float]:
+def dense_search_phi(observations: List[Dict], step_deg: float = 0.1, budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None) -> Tuple[float, Tuple[float, float], float]:
     """Balayage dense sur [0, 360°] avec un pas configurable."""
     best = (None, None, float('inf'))
-    phi = 0.0
-    while phi < 360.0:
-        origin, residual = compute_residual_for_phi(phi, observations)
+    for phi, origin, residual in scan_phi_grid(observations, step_deg, budget, memo):
         if residual < best[2]:
             best = (origin, phi, residual)
-        phi += step_deg
     return best
 
-def local_search_around_phi(observations: List[Dict], phi_center: float, range_deg: float = 5.0, step_deg: float = 0.01) -> Tuple[Tuple[float, float], float, float]:
+def local_search_around_phi(observations: List[Dict], phi_center: float, range_deg: float = 5.0, step_deg: float = 0.01, budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None) -> Tuple[Tuple[float, float], float, float]:
     """Recherche locale fine autour d'un angle φ dans un intervalle donné."""
     best_origin = None
     best_phi = None
     best_resid = float('inf')
     
+    phis = []
     phi = phi_center - range_deg
     while phi <= phi_center + range_deg:
-        origin, residual = compute_residual_for_phi(normalize_deg(phi), observations)
+        phis.append(normalize_deg(phi))
+        phi += step_deg
+    directions = [line_dir_from_angle_deg(p) for p in phis]
+    cos_phis = [d[0] for d in directions]
+    sin_phis = [d[1] for d in directions]
+    
+    for phi, origin, residual in _scan_angles(observations, phis, cos_phis, sin_phis, budget, memo):
         if residual < best_resid:
             best_origin = origin
-            best_phi = normalize_deg(phi)
+            best_phi = phi
             best_resid = residual
-        phi += step_deg
     
     return (best_origin, best_phi, best_resid)
 
-def adaptive_multi_scale_search(observations: List[Dict]) -> Tuple[Tuple[float, float], float, float]:
+def adaptive_multi_scale_search(observations: List[Dict], budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None) -> Tuple[Tuple[float, float], float, float]:
     """
     Recherche multi-échelle adaptative (coarse-to-fine).
     
@@ -217,44 +570,66 @@ def adaptive_multi_scale_search(observations: List[Dict]) -> Tuple[Tuple[float,
     4. Affinage par gradient
     
     Plus robuste que multi-start pour données difficiles.
+    
+    Si le budget s'épuise, chaque étape s'interrompt et la meilleure
+    solution des étapes déjà effectuées est retournée.
     """
     # Étape 1: Balayage grossier
-    candidates = []
-    phi = 0.0
-    while phi < 360.0:
-        origin, residual = compute_residual_for_phi(phi, observations)
-        candidates.append((phi, origin, residual))
-        phi += 1.0
+    with instrumentation.stage('adaptive.coarse'):
+        candidates = list(scan_phi_grid(observations, 1.0, budget, memo))
     
     # Trier par résiduel et garder les 5 meilleures zones
     candidates.sort(key=lambda x: x[2])
     top_candidates = candidates[:5]
+    origin_best, phi_best, resid_best = top_candidates[0][1], top_candidates[0][0], top_candidates[0][2]
+    if budget is not None:
+        budget.report('coarse', phi_best, resid_best)
     
     # Étape 2: Balayage fin sur les meilleures zones
-    refined_candidates = []
-    for phi_coarse, _, _ in top_candidates:
-        best_origin, best_phi, best_resid = local_search_around_phi(
-            observations, phi_coarse, range_deg=2.0, step_deg=0.1
-        )
-        refined_candidates.append((best_origin, best_phi, best_resid))
+    with instrumentation.stage('adaptive.fine'):
+        refined_candidates = [(origin_best, phi_best, resid_best)]
+        for phi_coarse, _, _ in top_candidates:
+            if _exhausted(budget):
+                break
+            best_origin, best_phi, best_resid = local_search_around_phi(
+                observations, phi_coarse, range_deg=2.0, step_deg=0.1, budget=budget, memo=memo
+            )
+            refined_candidates.append((best_origin, best_phi, best_resid))
     
     # Trouver le meilleur
     refined_candidates.sort(key=lambda x: x[2])
     origin_best, phi_best, resid_best = refined_candidates[0]
+    if budget is not None:
+        budget.report('fine', phi_best, resid_best)
+    if _exhausted(budget):
+        return (origin_best, phi_best, resid_best)
     
     # Étape 3: Recherche ultra-fine
-    origin_ultrafine, phi_ultrafine, resid_ultrafine = local_search_around_phi(
-        observations, phi_best, range_deg=0.5, step_deg=0.01
-    )
+    with instrumentation.stage('adaptive.ultrafine'):
+        origin_ultrafine, phi_ultrafine, resid_ultrafine = local_search_around_phi(
+            observations, phi_best, range_deg=0.5, step_deg=0.01, budget=budget, memo=memo
+        )
+    if resid_ultrafine > resid_best:
+        origin_ultrafine, phi_ultrafine, resid_ultrafine = origin_best, phi_best, resid_best
+    if budget is not None:
+        budget.report('ultrafine', phi_ultrafine, resid_ultrafine)
+    if _exhausted(budget):
+        return (origin_ultrafine, phi_ultrafine, resid_ultrafine)
     
     # Étape 4: Affinage par gradient
-    phi_final, origin_final, resid_final = gradient_descent_phi(
-        observations, phi_ultrafine, learning_rate=0.1, max_iter=50
-    )
+    with instrumentation.stage('adaptive.gradient'):
+        phi_final, origin_final, resid_final = gradient_descent_phi(
+            observations, phi_ultrafine, learning_rate=0.1, max_iter=50, budget=budget, memo=memo
+        )
+    if budget is not None:
+        budget.report('gradient', phi_final, resid_final)
     
     return (origin_final, phi_final, resid_final)
 
-def ransac_estimate(observations: List[Dict], n_iterations: int = 100, threshold: float = 50.0) -> Tuple[Tuple[float, float], float, float, List[int]]:
+# Nombre d'itérations RANSAC dont les hypothèses sont évaluées en un passage
+RANSAC_CHUNK = 16
+
+def ransac_estimate(observations: List[Dict], n_iterations: int = 100, threshold: float = 50.0, budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None, weights: Optional[List[float]] = None) -> Tuple[Tuple[float, float], float, float, List[int]]:
     """
     RANSAC (Random Sample Consensus) pour éliminer les outliers.
     
@@ -266,78 +641,297 @@ def ransac_estimate(observations: List[Dict], n_iterations: int = 100, threshold
     2. Garder le modèle avec le plus d'inliers
     3. Recalculer le modèle final avec tous les inliers
     
+    Les échantillons sont tirés par paquets de RANSAC_CHUNK itérations dont
+    les balayages sont évalués en un passage (scan_phi_grid_batch).
+    
     Args:
         observations: Liste des observations
         n_iterations: Nombre d'itérations RANSAC
         threshold: Seuil de distance pour considérer un point comme inlier (mètres)
+        budget: Budget de calcul optionnel ; s'il s'épuise, les itérations
+            s'arrêtent et le meilleur modèle est retourné sans affinage final
+        weights: Poids a priori des observations (probabilité d'être un
+            inlier, ex. visibilité depuis la table). Les échantillons sont
+            tirés proportionnellement aux poids et un modèle est noté par la
+            somme des poids de ses inliers. None = tirage uniforme.
     
     Returns:
         (origin, phi, residual, inlier_indices)
+    
+    Raises:
+        ValueError: si weights n'a pas un poids fini >= 0 par observation
     """
+    _check_prior_weights(weights, len(observations))
     if len(observations) < 3:
         # Pas assez de points pour RANSAC
-        origin, phi, resid = estimate_origin_and_phi(observations, method='multi-start')
+        origin, phi, resid = _solve_method(observations, 'multi-start', budget, memo)[:3]
         return (origin, phi, resid, list(range(len(observations))))
     
     best_inliers = []
     best_model = None
+    backend = backends.get_backend()
+    prepared = backend.prepare(observations)
+    best_score = 0.0
+    # Tirage pondéré seulement s'il reste au moins 3 observations de poids non nul
+    weighted = weights is not None and sum(1 for w in weights if w > 0) >= 3
     
-    for _ in range(n_iterations):
-        # Échantillonner 3 observations au hasard
-        if len(observations) == 3:
-            sample_indices = [0, 1, 2]
-        else:
-            sample_indices = random.sample(range(len(observations)), 3)
+    iteration = 0
+    while iteration < n_iterations and not _exhausted(budget):
+        # Échantillonner 3 observations au hasard, pour RANSAC_CHUNK itérations à la fois
+        samples = []
+        for _ in range(min(RANSAC_CHUNK, n_iterations - iteration)):
+            if len(observations) == 3:
+                samples.append([0, 1, 2])
+            elif weighted:
+                samples.append(_weighted_sample(weights, 3))
+            else:
+                samples.append(random.sample(range(len(observations)), 3))
+        iteration += len(samples)
         
-        sample_obs = [observations[i] for i in sample_indices]
+        # Modèles des échantillons (méthode RAPIDE: legacy avec pas de 2°), en un seul passage
+        with instrumentation.stage('ransac.hypothesis'):
+            scans = scan_phi_grid_batch([[observations[i] for i in sample] for sample in samples],
+                                        2.0, [memo] * len(samples))
         
-        # Calculer le modèle sur l'échantillon (méthode RAPIDE: legacy avec pas de 2°)
-        try:
+        for scan in scans:
+            if _exhausted(budget):
+                break
             best_origin_sample = None
             best_phi_sample = None
             best_resid_sample = float('inf')
-            
-            phi = 0.0
-            while phi < 360.0:
-                origin, residual = compute_residual_for_phi(phi, sample_obs)
+            for phi, origin, residual in scan:
+                if _exhausted(budget):
+                    break
                 if residual < best_resid_sample:
                     best_origin_sample = origin
                     best_phi_sample = phi
                     best_resid_sample = residual
-                phi += 2.0  # Pas grossier pour aller vite
+                _tick(budget)
             
             if best_origin_sample is None:
                 continue
-                
             origin, phi = best_origin_sample, best_phi_sample
-        except:
-            continue
-        
-        # Tester tous les points
-        inliers = []
-        for i, obs in enumerate(observations):
-            d = line_dir_from_angle_deg(normalize_deg(obs['azimuth_deg'] + phi + 180.0))
-            q = (obs['x'], obs['y'])
-            dist = distance_point_to_line(origin, q, d)
-            if dist < threshold:
-                inliers.append(i)
-        
-        # Garder le meilleur modèle (celui avec le plus d'inliers)
-        if len(inliers) > len(best_inliers):
-            best_inliers = inliers
-            best_model = (origin, phi)
+            
+            # Tester tous les points
+            with instrumentation.stage('ransac.scoring'):
+                cos_phi, sin_phi = line_dir_from_angle_deg(phi)
+                distances = _line_distances(backend, prepared, len(observations), origin, cos_phi, sin_phi)
+                inliers = [i for i, dist in enumerate(distances) if dist < threshold]
+                score = float(len(inliers)) if weights is None else sum(weights[i] for i in inliers)
+            
+            # Garder le meilleur modèle (celui avec le plus d'inliers, pondérés s'il y a lieu)
+            if score > best_score:
+                best_score = score
+                best_inliers = inliers
+                best_model = (origin, phi)
+                if budget is not None:
+                    budget.report('ransac', phi, best_resid_sample)
     
-    # Recalculer le modèle final avec tous les inliers (méthode PRÉCISE)
-    if len(best_inliers) >= 3:
+    # Budget épuisé : pas d'affinage multi-start, on évalue le meilleur modèle
+    if _exhausted(budget):
+        if best_model is None:
+            best_inliers = list(range(len(observations)))
+            best_model = (None, 0.0)
         inlier_obs = [observations[i] for i in best_inliers]
-        origin_final, phi_final, resid_final = estimate_origin_and_phi(inlier_obs, method='multi-start')
-        return (origin_final, phi_final, resid_final, best_inliers)
-    else:
-        # Pas assez d'inliers, utiliser toutes les données
-        origin, phi, resid = estimate_origin_and_phi(observations, method='multi-start')
+        origin, resid = compute_residual_for_phi(best_model[1], inlier_obs, memo=memo)
+        return (origin, best_model[1], resid, best_inliers)
+    
+    # Recalculer le modèle final avec tous les inliers (méthode PRÉCISE)
+    with instrumentation.stage('ransac.refit'):
+        if len(best_inliers) >= 3:
+            inlier_obs = [observations[i] for i in best_inliers]
+            origin_final, phi_final, resid_final = _solve_method(inlier_obs, 'multi-start', budget, memo)[:3]
+            return (origin_final, phi_final, resid_final, best_inliers)
+        else:
+            # Pas assez d'inliers, utiliser toutes les données
+            origin, phi, resid = _solve_method(observations, 'multi-start', budget, memo)[:3]
+            return (origin, phi, resid, list(range(len(observations))))
+
+def _check_prior_weights(weights: Optional[List[float]], n: int) -> None:
+    """Lève ValueError si les poids a priori ne correspondent pas aux n observations."""
+    if weights is None:
+        return
+    if len(weights) != n:
+        raise ValueError(f"prior_weights : {len(weights)} poids pour {n} observations")
+    if not all(isinstance(w, (int, float)) and math.isfinite(w) and w >= 0 for w in weights):
+        raise ValueError("prior_weights : poids finis et positifs ou nuls attendus")
+
+def _weighted_sample(weights: List[float], k: int) -> List[int]:
+    """k indices distincts tirés proportionnellement à weights (poids > 0 uniquement)."""
+    pool = [i for i, w in enumerate(weights) if w > 0]
+    chosen = []
+    for _ in range(k):
+        pick = random.choices(range(len(pool)), weights=[weights[i] for i in pool])[0]
+        chosen.append(pool.pop(pick))
+    return chosen
+
+# Constantes d'efficacité à 95 % (loi normale) des fonctions de perte robustes
+HUBER_C = 1.345
+TUKEY_C = 4.685
+# Échelle minimale des distances (mètres) : évite des poids dégénérés sur données parfaites
+IRLS_MIN_SCALE = 1.0
+# Poids au-dessus duquel une observation IRLS compte comme inlier
+IRLS_INLIER_WEIGHT = 0.5
+# Pas de dérivation (degrés) et pas maximal de Newton sur φ
+IRLS_PHI_H = 0.05
+IRLS_MAX_STEP_DEG = 1.0
+
+# Fonctions de perte acceptées par irls_estimate / irls_weights
+LOSSES = ('huber', 'tukey')
+
+def irls_weights(observations: List[Dict], origin: Tuple[float, float], phi: float, loss: str = 'tukey') -> List[float]:
+    """
+    Poids robustes des observations pour le modèle (origin, φ).
+    
+    L'échelle est l'écart absolu médian des distances aux droites (×1.4826,
+    au moins IRLS_MIN_SCALE mètres) :
+    - 'huber' : 1 jusqu'à HUBER_C·échelle, puis décroissance en 1/distance
+    - 'tukey' : (1 - (d / TUKEY_C·échelle)²)², nul au-delà (rejet franc)
+    """
+    _check_loss(loss)
+    backend = backends.get_backend()
+    cos_phi, sin_phi = line_dir_from_angle_deg(phi)
+    distances = _line_distances(backend, backend.prepare(observations), len(observations), origin, cos_phi, sin_phi)
+    return _robust_weights(distances, loss)
+
+def _check_loss(loss: str) -> None:
+    if loss not in LOSSES:
+        raise ValueError(f"Perte inconnue : {loss!r} ('huber' ou 'tukey')")
+
+def _robust_weights(distances: List[float], loss: str) -> List[float]:
+    ordered = sorted(distances)
+    mid = len(ordered) // 2
+    median = ordered[mid] if len(ordered) % 2 else 0.5 * (ordered[mid - 1] + ordered[mid])
+    scale = max(1.4826 * median, IRLS_MIN_SCALE)
+    if loss == 'huber':
+        c = HUBER_C * scale
+        return [1.0 if d <= c else c / d for d in distances]
+    c = TUKEY_C * scale
+    return [(1.0 - (d / c) ** 2) ** 2 if d < c else 0.0 for d in distances]
+
+def irls_estimate(observations: List[Dict], loss: str = 'tukey', max_iter: int = 20, seed_step_deg: float = 2.0, tol_deg: float = 1e-3, budget: Optional[SolveBudget] = None, memo: Optional[ResidualMemo] = None) -> Tuple[Tuple[float, float], float, float, List[int]]:
+    """
+    M-estimateur robuste par moindres carrés itérativement repondérés (IRLS).
+    
+    Algorithme déterministe :
+    1. φ initial : balayage grossier (pas seed_step_deg) du résiduel moyen
+    2. À chaque itération :
+       - poids robustes des distances au modèle courant (irls_weights)
+       - pas de Newton sur φ de Σ w·d², l'origine étant pour chaque φ la
+         solution de least_squares_origin pondéré ; 4 résolutions 2x2 par
+         itération (φ - h, φ, φ + h, puis l'origine au nouveau φ), chacune
+         comptée comme une évaluation du budget
+    3. Itérations Huber jusqu'à convergence, puis, pour loss='tukey',
+       itérations Tukey qui annulent le poids des outliers francs
+    
+    Args:
+        observations: Liste des observations
+        loss: 'tukey' (Huber puis Tukey) ou 'huber'
+        max_iter: Nombre maximal d'itérations par étape
+        seed_step_deg: Pas du balayage initial (degrés)
+        tol_deg: Convergence quand le pas sur φ passe sous tol_deg
+        budget: Budget de calcul optionnel ; s'il s'épuise, le modèle
+            courant est retourné
+    
+    Returns:
+        (origin, phi, residual, inlier_indices) ; residual est la distance
+        moyenne des observations de poids >= IRLS_INLIER_WEIGHT. Les poids
+        eux-mêmes s'obtiennent par irls_weights.
+    """
+    _check_loss(loss)
+    if len(observations) < 3:
+        origin, phi, resid = _solve_method(observations, 'multi-start', budget, memo)[:3]
         return (origin, phi, resid, list(range(len(observations))))
+    
+    with instrumentation.stage('irls.seed'):
+        best = (None, None, float('inf'))
+        for phi, origin, residual in scan_phi_grid(observations, seed_step_deg, budget, memo):
+            if residual < best[2]:
+                best = (origin, phi, residual)
+        origin, phi = best[0], best[1]
+    
+    # Rétro-azimut de chaque observation pour φ = 0, tourné de φ à chaque résolution
+    base = [(o['x'], o['y'], *line_dir_from_angle_deg(o['azimuth_deg'] + 180.0)) for o in observations]
+    backend = backends.get_backend()
+    prepared = backend.prepare(observations)
+    
+    def weighted_fit(phi: float, weights: List[float]) -> Tuple[Tuple[float, float], float]:
+        cp, sp = line_dir_from_angle_deg(phi)
+        lines = [((qx, qy), (ca * cp - sa * sp, sa * cp + ca * sp)) for qx, qy, ca, sa in base]
+        fitted = least_squares_origin(lines, weights)
+        distances = _line_distances(backend, prepared, len(base), fitted, cp, sp)
+        return fitted, sum(w * d * d for w, d in zip(weights, distances))
+    
+    with instrumentation.stage('irls.iterations'):
+        for stage in (('huber',) if loss == 'huber' else ('huber', loss)):
+            for _ in range(max_iter):
+                if _exhausted(budget):
+                    break
+                cos_phi, sin_phi = line_dir_from_angle_deg(phi)
+                weights = _robust_weights(_line_distances(backend, prepared, len(base), origin, cos_phi, sin_phi), stage)
+                _, f_minus = weighted_fit(phi - IRLS_PHI_H, weights)
+                _, f_center = weighted_fit(phi, weights)
+                _, f_plus = weighted_fit(phi + IRLS_PHI_H, weights)
+                curvature = f_plus - 2.0 * f_center + f_minus
+                if curvature > 0:
+                    step = -IRLS_PHI_H * (f_plus - f_minus) / (2.0 * curvature)
+                else:
+                    step = -IRLS_MAX_STEP_DEG if f_plus > f_minus else IRLS_MAX_STEP_DEG
+                step = max(-IRLS_MAX_STEP_DEG, min(IRLS_MAX_STEP_DEG, step))
+                phi = normalize_deg(phi + step)
+                origin, _ = weighted_fit(phi, weights)
+                _tick(budget, 4)
+                if budget is not None:
+                    budget.report('irls', phi, f_center)
+                if abs(step) < tol_deg:
+                    break
+    
+    weights = irls_weights(observations, origin, phi, loss)
+    inliers = [i for i, w in enumerate(weights) if w >= IRLS_INLIER_WEIGHT] or list(range(len(observations)))
+    cos_phi, sin_phi = line_dir_from_angle_deg(phi)
+    distances = _line_distances(backend, prepared, len(base), origin, cos_phi, sin_phi)
+    resid = sum(distances[i] for i in inliers) / len(inliers)
+    return (origin, phi, resid, inliers)
 
-def estimate_origin_and_phi(observations: List[Dict], method: str = 'ransac', return_inliers: bool = False) -> Tuple[Tuple[float, float], float, float] | Tuple[Tuple[float, float], float, float, List[int]]:
+@dataclass(slots=True)
+class EstimationResult:
+    """
+    Résultat d'une estimation, toujours retourné par estimate_origin_and_phi.
+    
+    Attributes:
+        origin: Position estimée de la table (x, y)
+        phi: Orientation de la table en degrés
+        residual: Résiduel moyen (mètres) sur les inliers
+        inlier_mask: inlier_mask[i] vaut True si l'observation i est retenue
+        method: Méthode utilisée
+        timings: Temps en secondes ('total', et par étape si instrumenté)
+        iterations: Nombre d'évaluations du résiduel demandées (0 si cache)
+        complete: False si le budget s'est épuisé avant la fin
+        stats: SolveStats détaillé si return_stats=True
+        weights: Poids robustes par observation (masque d'inliers « doux »,
+            méthode 'irls' uniquement)
+    """
+    origin: Tuple[float, float]
+    phi: float
+    residual: float
+    inlier_mask: List[bool]
+    method: str
+    timings: Dict[str, float] = field(default_factory=dict)
+    iterations: int = 0
+    complete: bool = True
+    stats: Optional[instrumentation.SolveStats] = None
+    weights: Optional[List[float]] = None
+    
+    @property
+    def inliers(self) -> List[int]:
+        """Indices des observations retenues."""
+        return [i for i, ok in enumerate(self.inlier_mask) if ok]
+    
+    @property
+    def n_outliers(self) -> int:
+        return len(self.inlier_mask) - sum(self.inlier_mask)
+
+def estimate_origin_and_phi(observations: List[Dict], method: str = 'ransac', budget: Optional[SolveBudget] = None, cache: Optional[ResultCache] = None, memo: Optional[ResidualMemo] = None, return_stats: bool = False, prior_weights: Optional[List[float]] = None, loss: str = 'tukey') -> EstimationResult:
     """
     Estime la position et l'orientation d'une table d'orientation.
     
@@ -347,73 +941,288 @@ def estimate_origin_and_phi(observations: List[Dict], method: str = 'ransac', re
             - azimuth_deg : azimut gravé sur la table (0=N, 90=E)
         method: Méthode d'optimisation
             - 'ransac' (RECOMMANDÉ) : élimine automatiquement les outliers
+            - 'irls' : M-estimateur Huber/Tukey, déterministe, poids par
+              observation dans result.weights
             - 'adaptive' : recherche multi-échelle, très robuste
             - 'ternary' : recherche ternaire + gradient
             - 'multi-start' : 8 descentes de gradient
             - 'gradient' : descente de gradient simple
             - 'legacy' : balayage linéaire (lent)
-        return_inliers: Si True, retourne aussi les indices des inliers
+        budget: SolveBudget optionnel (temps limite, nombre d'évaluations,
+            callback de progression). Si le budget s'épuise, la meilleure
+            solution trouvée est retournée avec complete=False.
+        cache: ResultCache optionnel. Les résultats sont indexés par le
+            contenu des observations ; une solution partielle (budget
+            épuisé) n'est jamais mise en cache.
+        memo: ResidualMemo de la résolution. Si None, un nouveau est créé ;
+            en fournir un permet de lire memo.saved_evaluations ensuite.
+        return_stats: Si True, active l'instrumentation et remplit
+            result.stats (compteurs d'appels, temps par étape)
+        prior_weights: Poids a priori d'inlier par observation, utilisés par
+            'ransac' (voir ransac_estimate et visibility.prior_weights)
+        loss: Fonction de perte de 'irls' ('tukey' ou 'huber'), utilisée
+            aussi pour result.weights ; ignorée par les autres méthodes
     
     Returns:
-        (origin, phi, residual) ou (origin, phi, residual, inlier_indices)
+        EstimationResult. Aucun affichage console : les diagnostics (outliers
+        écartés) passent par le logger du module.
+    
+    Raises:
+        ValueError: si prior_weights n'a pas un poids fini >= 0 par observation
     """
+    if return_stats:
+        with instrumentation.collect_stats() as stats:
+            result = estimate_origin_and_phi(observations, method, budget, cache, memo,
+                                             prior_weights=prior_weights, loss=loss)
+        result.stats = stats
+        result.timings.update(stats.stage_seconds)
+        return result
+    
+    _check_prior_weights(prior_weights, len(observations))
+    if not observations:
+        # Rien à estimer : pas de solution, comme avant les résultats structurés
+        return EstimationResult(origin=None, phi=None, residual=float('inf'), inlier_mask=[], method=method,
+                                timings={'total': 0.0}, complete=budget is None or budget.complete)
+    
+    t0 = time.perf_counter()
+    params = {}
+    if prior_weights is not None:
+        params['prior_weights'] = [round(w, 3) for w in prior_weights]
+    if method == 'irls':
+        params['loss'] = loss
+    key = observations_key(observations, method, params) if cache is not None else None
+    solved = cache.get(key) if cache is not None else None
+    evaluations = 0
+    if solved is None:
+        if memo is None:
+            memo = ResidualMemo()
+        # Un mémo fourni peut déjà contenir des évaluations (lot, résolution précédente)
+        before = memo.hits + memo.misses
+        solved = _solve_method(observations, method, budget, memo, prior_weights, loss)
+        evaluations = memo.hits + memo.misses - before
+        if cache is not None and (budget is None or budget.complete):
+            cache.put(key, solved)
+    elapsed = time.perf_counter() - t0
+    
+    origin, phi, resid, inliers = solved
+    inlier_set = set(inliers)
+    result = EstimationResult(
+        origin=origin,
+        phi=phi,
+        residual=resid,
+        inlier_mask=[i in inlier_set for i in range(len(observations))],
+        method=method,
+        timings={'total': elapsed},
+        iterations=evaluations,
+        complete=budget is None or budget.complete,
+    )
+    if method == 'irls' and origin is not None:
+        result.weights = irls_weights(observations, origin, phi, loss)
+    
+    if result.n_outliers and logger.isEnabledFor(logging.INFO):
+        logger.info("Méthode %s : %d outlier(s) écarté(s) (inliers : %d/%d)",
+                    method, result.n_outliers, len(inliers), len(observations))
+    metrics.record_solve(method, elapsed, evaluations, len(observations), len(inliers), resid)
+    return result
+
+# Méthodes acceptées par estimate_origin_and_phi
+METHODS = ('ransac', 'irls', 'adaptive', 'ternary', 'multi-start', 'gradient', 'legacy')
+
+def _solve_method(observations: List[Dict], method: str, budget: Optional[SolveBudget], memo: ResidualMemo, prior_weights: Optional[List[float]] = None, loss: str = 'tukey') -> Tuple[Tuple[float, float], float, float, List[int]]:
+    """Exécute la méthode demandée. Retourne toujours (origin, phi, residual, inliers)."""
+    all_indices = list(range(len(observations)))
+    
     if method == 'ransac':
-        origin, phi, resid, inliers = ransac_estimate(observations, n_iterations=100, threshold=50.0)
-        if len(inliers) < len(observations):
-            print(f"   RANSAC a détecté {len(observations) - len(inliers)} outlier(s) et les a éliminés.")
-            print(f"    Inliers utilisés: {len(inliers)}/{len(observations)} observations")
-        if return_inliers:
-            return (origin, phi, resid, inliers)
-        return (origin, phi, resid)
+        return ransac_estimate(observations, n_iterations=100, threshold=50.0, budget=budget, memo=memo,
+                               weights=prior_weights)
+    
+    elif method == 'irls':
+        return irls_estimate(observations, loss=loss, budget=budget, memo=memo)
     
     elif method == 'adaptive':
         # RECOMMANDÉ: méthode la plus robuste et précise
-        result = adaptive_multi_scale_search(observations)
-        if return_inliers:
-            return (*result, list(range(len(observations))))
-        return result
+        result = adaptive_multi_scale_search(observations, budget=budget, memo=memo)
+        return (*result, all_indices)
     
     elif method == 'ternary':
-        phi, origin, residual = ternary_search_phi(observations, epsilon=0.1)
+        phi, origin, residual = ternary_search_phi(observations, epsilon=0.1, budget=budget, memo=memo)
         # Affinage par gradient
-        phi, origin, residual = gradient_descent_phi(observations, phi, learning_rate=0.5, max_iter=50)
-        if return_inliers:
-            return (origin, phi, residual, list(range(len(observations))))
-        return (origin, phi, residual)
+        if not _exhausted(budget):
+            phi, origin, residual = gradient_descent_phi(observations, phi, learning_rate=0.5, max_iter=50, budget=budget, memo=memo)
+        return (origin, phi, residual, all_indices)
     
     elif method == 'gradient':
         # Départ à phi=0, puis descente
-        phi, origin, residual = gradient_descent_phi(observations, 0.0)
-        if return_inliers:
-            return (origin, phi, residual, list(range(len(observations))))
-        return (origin, phi, residual)
+        phi, origin, residual = gradient_descent_phi(observations, 0.0, budget=budget, memo=memo)
+        return (origin, phi, residual, all_indices)
     
     elif method == 'multi-start':
         # Multi-start: teste plusieurs points de départ pour éviter les minima locaux
         best = (None, None, float('inf'))
         for phi_start in [0.0, 45.0, 90.0, 135.0, 180.0, 225.0, 270.0, 315.0]:
-            phi, origin, residual = gradient_descent_phi(observations, phi_start, learning_rate=0.5, max_iter=100)
+            if _exhausted(budget):
+                break
+            phi, origin, residual = gradient_descent_phi(observations, phi_start, learning_rate=0.5, max_iter=100, budget=budget, memo=memo)
             if residual < best[2]:
                 best = (origin, phi, residual)
-        if return_inliers:
-            return (*best, list(range(len(observations))))
-        return best
+                if budget is not None:
+                    budget.report('multi-start', phi, residual)
+        return (*best, all_indices)
     
     else:  # legacy
         # Ancien algorithme (pour comparaison)
         best = (None, None, float('inf'))
-        phi = 0.0
-        while phi < 360.0:
-            origin, residual = compute_residual_for_phi(phi, observations)
+        for phi, origin, residual in scan_phi_grid(observations, 0.5, budget, memo):
             if residual < best[2]:
                 best = (origin, phi, residual)
-            phi += 0.5
-        if return_inliers:
-            return (*best, list(range(len(observations))))
-        return best
+        return (*best, all_indices)
+
+# Pas (degrés) du balayage complet de φ par lequel commence chaque méthode
+GRID_STEPS = {'legacy': 0.5, 'adaptive': 1.0, 'irls': 2.0}
+
+def estimate_origin_and_phi_batch(batch: List[List[Dict]], method: str = 'ransac', time_limit: Optional[float] = None, return_exceptions: bool = False) -> List[EstimationResult]:
+    """
+    Estime plusieurs tables en un seul appel.
+    
+    Les jeux d'observations identiques ne sont résolus qu'une fois, le
+    résultat étant partagé. Pour les méthodes qui commencent par un
+    balayage complet de φ (GRID_STEPS : 'legacy', 'adaptive', 'irls'), ce
+    balayage est fait pour toutes les tables du lot en un seul passage
+    vectorisé (scan_phi_grid_batch) et rangé dans le ResidualMemo de chaque
+    table ; les étapes suivantes (affinages locaux, gradient) restent
+    propres à chaque table et s'exécutent l'une après l'autre. Pour
+    'ransac', les hypothèses de chaque table sont déjà évaluées par paquets
+    (RANSAC_CHUNK) avec le même noyau.
+    
+    Args:
+        batch: Liste de listes d'observations (une par table)
+        method: Méthode d'optimisation (voir estimate_origin_and_phi)
+        time_limit: Temps limite optionnel par table (secondes), décompté
+            à partir de la résolution propre à la table
+        return_exceptions: Si True, l'exception levée par une table prend
+            sa place dans la liste des résultats au lieu d'interrompre le
+            lot (comme asyncio.gather)
+    
+    Returns:
+        Liste des résultats, dans l'ordre du lot
+    """
+    keys = [tuple((o['x'], o['y'], o['azimuth_deg']) for o in observations) for observations in batch]
+    tables: Dict[Tuple, List[Dict]] = {}
+    for key, observations in zip(keys, batch):
+        tables.setdefault(key, observations)
+    memos = {key: ResidualMemo() for key in tables}
+    
+    if method in GRID_STEPS and tables:
+        try:
+            with instrumentation.stage('batch.grid'):
+                scan_phi_grid_batch(list(tables.values()), GRID_STEPS[method], list(memos.values()))
+        except Exception:
+            # Chaque table relèvera sa propre erreur ci-dessous
+            if not return_exceptions:
+                raise
+    
+    solved = {}
+    for key, observations in tables.items():
+        budget = SolveBudget(time_limit=time_limit) if time_limit is not None else None
+        try:
+            solved[key] = estimate_origin_and_phi(observations, method=method, budget=budget, memo=memos[key])
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            solved[key] = exc
+    return [solved[key] for key in keys]
+
+def resolve(previous: EstimationResult, observations: List[Dict], range_deg: float = 2.0, max_degradation: float = 2.0, tolerance_m: float = 5.0, threshold: float = 50.0, budget: Optional[SolveBudget] = None, loss: str = 'tukey') -> EstimationResult:
+    """
+    Ré-estime une table après une petite modification de ses observations.
+
+    Repart de la solution précédente au lieu d'une recherche globale :
+    1. Inliers : ceux de previous (si le nombre d'observations est inchangé)
+       plus les observations à moins de threshold mètres de l'ancien modèle
+       (toutes les observations si previous.method n'est ni 'ransac' ni 'irls')
+    2. Recherche locale à ±range_deg autour de l'ancien φ (pas de 0.1°)
+    3. Affinage par gradient, retenu s'il reste dans cette fenêtre
+
+    Si le résiduel obtenu dépasse previous.residual * max_degradation +
+    tolerance_m, ou s'il reste trop peu d'inliers, la recherche globale de
+    previous.method est relancée.
+
+    Args:
+        previous: Résultat d'estimation de la version précédente de la table
+        observations: Nouvelles observations (même format que estimate_origin_and_phi)
+        range_deg: Demi-largeur de la recherche locale autour de previous.phi
+        max_degradation: Facteur de dégradation du résiduel toléré
+        tolerance_m: Marge absolue (mètres) ajoutée au résiduel toléré
+        threshold: Seuil de distance (mètres) d'appartenance aux inliers
+        budget: SolveBudget optionnel, partagé par la recherche de repli
+        loss: Fonction de perte si previous.method vaut 'irls' (celle de la
+            résolution précédente), pour le repli et result.weights
+
+    Returns:
+        EstimationResult. timings contient 'local' et, en cas de repli, 'global'.
+    """
+    t0 = time.perf_counter()
+    memo = ResidualMemo()
+
+    inliers: List[int] = []
+    if previous.phi is not None and previous.origin is not None and observations:
+        if previous.method in ('ransac', 'irls'):
+            same_layout = len(previous.inlier_mask) == len(observations)
+            backend = backends.get_backend()
+            cos_phi, sin_phi = line_dir_from_angle_deg(previous.phi)
+            distances = _line_distances(backend, memo.prepared(observations, backend), len(observations),
+                                        previous.origin, cos_phi, sin_phi)
+            inliers = [i for i, dist in enumerate(distances)
+                       if dist < threshold or (same_layout and previous.inlier_mask[i])]
+        else:
+            inliers = list(range(len(observations)))
+
+    solved = None
+    if len(inliers) >= min(3, len(observations)) and inliers:
+        inlier_obs = [observations[i] for i in inliers]
+        with instrumentation.stage('resolve.local'):
+            origin, phi, resid = local_search_around_phi(
+                inlier_obs, previous.phi, range_deg=range_deg, step_deg=0.1, budget=budget, memo=memo
+            )
+            if not _exhausted(budget):
+                phi_g, origin_g, resid_g = gradient_descent_phi(
+                    inlier_obs, phi, learning_rate=0.1, max_iter=50, budget=budget, memo=memo
+                )
+                # L'affinage ne doit pas sortir de la fenêtre : au-delà, c'est la recherche globale qui décide
+                if resid_g < resid and abs((phi_g - previous.phi + 180.0) % 360.0 - 180.0) <= range_deg:
+                    origin, phi, resid = origin_g, phi_g, resid_g
+        if budget is not None:
+            budget.report('resolve', phi, resid)
+        if resid <= previous.residual * max_degradation + tolerance_m:
+            solved = (origin, phi, resid)
+    local_seconds = time.perf_counter() - t0
+    evaluations = memo.hits + memo.misses
+
+    if solved is None:
+        logger.info("Résiduel dégradé après modification : nouvelle recherche globale (%s)", previous.method)
+        result = estimate_origin_and_phi(observations, method=previous.method, budget=budget, memo=memo, loss=loss)
+        result.timings.update({'local': local_seconds, 'global': result.timings['total'],
+                               'total': time.perf_counter() - t0})
+        result.iterations = memo.hits + memo.misses
+        return result
+
+    origin, phi, resid = solved
+    inlier_set = set(inliers)
+    metrics.record_solve('resolve', local_seconds, evaluations, len(observations), len(inliers), resid)
+    return EstimationResult(
+        origin=origin,
+        phi=phi,
+        residual=resid,
+        inlier_mask=[i in inlier_set for i in range(len(observations))],
+        method=previous.method,
+        timings={'total': local_seconds, 'local': local_seconds},
+        iterations=evaluations,
+        complete=budget is None or budget.complete,
+        weights=irls_weights(observations, origin, phi, loss) if previous.method == 'irls' else None,
+    )
 
 # Exemple d'utilisation (données fictives en mètres):
-if __name__ == "__main__":
+def _demo():
     # Test avec 3 points
     observations_3 = [
         {'x': 2900.0, 'y': 200.0, 'azimuth_deg': 360.0},
@@ -440,23 +1249,36 @@ if __name__ == "__main__":
         
         print("\n🏆 Méthode RANSAC (robuste aux outliers, FORTEMENT RECOMMANDÉE)")
         t0 = time.time()
-        origin, phi, resid = estimate_origin_and_phi(obs, method='ransac')
+        result = estimate_origin_and_phi(obs, method='ransac')
         t1 = time.time()
-        print(f"   Origine: ({origin[0]:.2f}, {origin[1]:.2f})")
-        print(f"   Orientation φ: {phi:.4f}°")
-        print(f"   Résiduel: {resid:.3f} m")
+        print(f"   Origine: ({result.origin[0]:.2f}, {result.origin[1]:.2f})")
+        print(f"   Orientation φ: {result.phi:.4f}°")
+        print(f"   Résiduel: {result.residual:.3f} m")
         print(f"   Temps: {(t1-t0)*1000:.2f} ms")
         
         print("\n⚡ Méthode MULTI-START (pour comparaison)")
         t0 = time.time()
-        origin2, phi2, resid2 = estimate_origin_and_phi(obs, method='multi-start')
+        result2 = estimate_origin_and_phi(obs, method='multi-start')
         t1 = time.time()
-        print(f"   Origine: ({origin2[0]:.2f}, {origin2[1]:.2f})")
-        print(f"   Orientation φ: {phi2:.4f}°")
-        print(f"   Résiduel: {resid2:.3f} m")
+        print(f"   Origine: ({result2.origin[0]:.2f}, {result2.origin[1]:.2f})")
+        print(f"   Orientation φ: {result2.phi:.4f}°")
+        print(f"   Résiduel: {result2.residual:.3f} m")
         print(f"   Temps: {(t1-t0)*1000:.2f} ms")
     
     print(f"\n{'='*60}")
     print(" RANSAC élimine automatiquement les outliers !")
     print(" Résiduel beaucoup plus petit et fiable !")
-    print('='*60)
\ No newline at end of file
+    print('='*60)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Démonstration de l'estimation de tables d'orientation")
+    parser.add_argument('--profile', metavar='FICHIER', default=None,
+                        help="Profile l'exécution avec cProfile et enregistre le rapport (.prof)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='   %(message)s')
+    if args.profile:
+        instrumentation.run_profiled(_demo, args.profile)
+    else:
+        _demo()
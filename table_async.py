@@ -0,0 +1,154 @@
+"""
+API asynchrone pour estimate_origin_and_phi.
+
+Le calcul (CPU) est délégué à un exécuteur (threads ou processus) pour ne
+pas bloquer la boucle asyncio. Les requêtes identiques simultanées sont
+regroupées en un seul calcul, et l'annulation interrompt réellement la
+résolution via l'événement d'annulation du SolveBudget.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from table import EstimationResult, SolveBudget, estimate_origin_and_phi
+
+
+def _solve(observations: List[Dict], method: str, time_limit: Optional[float],
+           max_evaluations: Optional[int], cancel_event) -> EstimationResult:
+    """Exécuté dans l'exécuteur : résolution bornée par un SolveBudget."""
+    budget = SolveBudget(time_limit=time_limit, max_evaluations=max_evaluations,
+                         cancel_event=cancel_event)
+    return estimate_origin_and_phi(observations, method=method, budget=budget)
+
+
+def _request_key(observations: List[Dict], method: str, time_limit: Optional[float],
+                 max_evaluations: Optional[int]) -> Tuple:
+    """Clé identifiant deux requêtes donnant le même calcul."""
+    obs_key = tuple((float(o['x']), float(o['y']), float(o['azimuth_deg'])) for o in observations)
+    return (method, time_limit, max_evaluations, obs_key)
+
+
+class _InFlight:
+    """Calcul en cours partagé par plusieurs requêtes identiques."""
+
+    def __init__(self, future: asyncio.Future, cancel_event):
+        self.future = future
+        self.cancel_event = cancel_event
+        self.waiters = 0
+
+
+class AsyncEstimator:
+    """
+    Estimateur asynchrone avec exécuteur configurable et regroupement des
+    requêtes identiques.
+
+    Args:
+        executor: ThreadPoolExecutor ou ProcessPoolExecutor. Si None,
+            l'exécuteur par défaut de la boucle (threads) est utilisé.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+        self._inflight: Dict[Tuple, _InFlight] = {}
+        self._manager = None
+
+    def _make_cancel_event(self):
+        if isinstance(self.executor, ProcessPoolExecutor):
+            # Un Event de Manager est partageable entre processus
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Event()
+        return threading.Event()
+
+    async def estimate(self, observations: List[Dict], method: str = 'ransac',
+                       time_limit: Optional[float] = None,
+                       max_evaluations: Optional[int] = None) -> EstimationResult:
+        """Version asynchrone de estimate_origin_and_phi."""
+        key = _request_key(observations, method, time_limit, max_evaluations)
+        entry = self._inflight.get(key)
+        if entry is None:
+            loop = asyncio.get_running_loop()
+            cancel_event = self._make_cancel_event()
+            future = loop.run_in_executor(
+                self.executor, _solve, [dict(o) for o in observations], method,
+                time_limit, max_evaluations, cancel_event
+            )
+            entry = _InFlight(future, cancel_event)
+            self._inflight[key] = entry
+            future.add_done_callback(lambda _f, k=key, e=entry: self._forget(k, e))
+
+        entry.waiters += 1
+        try:
+            return await asyncio.shield(entry.future)
+        except asyncio.CancelledError:
+            if entry.waiters == 1:
+                # Plus personne n'attend ce calcul : on l'interrompt
+                entry.cancel_event.set()
+                entry.future.cancel()
+                self._forget(key, entry)
+            raise
+        finally:
+            entry.waiters -= 1
+
+    async def estimate_batch(self, batch: List[List[Dict]], method: str = 'ransac',
+                             time_limit: Optional[float] = None,
+                             max_evaluations: Optional[int] = None) -> List[EstimationResult]:
+        """Estime plusieurs tables en parallèle ; les tables identiques ne sont calculées qu'une fois."""
+        return await asyncio.gather(*(
+            self.estimate(obs, method, time_limit, max_evaluations)
+            for obs in batch
+        ))
+
+    def _forget(self, key: Tuple, entry: _InFlight) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+    def close(self) -> None:
+        """Libère le Manager éventuellement créé pour l'annulation inter-processus."""
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+_default_estimator: Optional[AsyncEstimator] = None
+
+
+def set_default_executor(executor: Optional[Executor]) -> None:
+    """Configure l'exécuteur utilisé par les fonctions asynchrones du module."""
+    global _default_estimator
+    if _default_estimator is not None:
+        _default_estimator.close()
+    _default_estimator = AsyncEstimator(executor)
+
+
+def _get_default_estimator() -> AsyncEstimator:
+    global _default_estimator
+    if _default_estimator is None:
+        _default_estimator = AsyncEstimator()
+    return _default_estimator
+
+
+async def estimate_origin_and_phi_async(observations: List[Dict], method: str = 'ransac',
+                                        time_limit: Optional[float] = None,
+                                        max_evaluations: Optional[int] = None) -> EstimationResult:
+    """
+    Estime la position et l'orientation sans bloquer la boucle asyncio.
+
+    Même sémantique que estimate_origin_and_phi. L'annulation de la tâche
+    interrompt la résolution dès que plus aucune requête identique ne l'attend.
+    """
+    return await _get_default_estimator().estimate(
+        observations, method, time_limit, max_evaluations
+    )
+
+
+async def estimate_origin_and_phi_batch_async(batch: List[List[Dict]], method: str = 'ransac',
+                                              time_limit: Optional[float] = None,
+                                              max_evaluations: Optional[int] = None) -> List[EstimationResult]:
+    """Variante par lot de estimate_origin_and_phi_async."""
+    return await _get_default_estimator().estimate_batch(
+        batch, method, time_limit, max_evaluations
+    )
@@ -6,6 +6,8 @@ avec 4 et 5 points d'observation.
 """
 
 from table import estimate_origin_and_phi
+import instrumentation
+import logging
 import time
 
 
@@ -18,25 +20,25 @@ def test_observations(observations, name):
     # RANSAC (recommandé)
     print("🏆 Méthode RANSAC (robuste aux outliers)")
     t0 = time.time()
-    origin, phi, resid = estimate_origin_and_phi(observations, method='ransac')
+    result = estimate_origin_and_phi(observations, method='ransac')
     t1 = time.time()
-    print(f"   Origine: ({origin[0]:.2f}, {origin[1]:.2f})")
-    print(f"   φ: {phi:.4f}°")
-    print(f"   Résiduel: {resid:.3f} m")
+    print(f"   Origine: ({result.origin[0]:.2f}, {result.origin[1]:.2f})")
+    print(f"   φ: {result.phi:.4f}°")
+    print(f"   Résiduel: {result.residual:.3f} m")
     print(f"   Temps: {(t1-t0)*1000:.2f} ms\n")
     
     # Multi-start (pour comparaison)
     print("⚡ Méthode MULTI-START (pour comparaison)")
     t0 = time.time()
-    origin2, phi2, resid2 = estimate_origin_and_phi(observations, method='multi-start')
+    result2 = estimate_origin_and_phi(observations, method='multi-start')
     t1 = time.time()
-    print(f"   Origine: ({origin2[0]:.2f}, {origin2[1]:.2f})")
-    print(f"   φ: {phi2:.4f}°")
-    print(f"   Résiduel: {resid2:.3f} m")
+    print(f"   Origine: ({result2.origin[0]:.2f}, {result2.origin[1]:.2f})")
+    print(f"   φ: {result2.phi:.4f}°")
+    print(f"   Résiduel: {result2.residual:.3f} m")
     print(f"   Temps: {(t1-t0)*1000:.2f} ms")
 
 
-if __name__ == "__main__":
+def _demo():
     # Jeu de test avec 4 points
     observations_4 = [
         {'x': 2900.0, 'y': 200.0, 'azimuth_deg': 360.0},
@@ -57,3 +59,16 @@ if __name__ == "__main__":
     print("💡 RANSAC détecte et élimine automatiquement les outliers !")
     print("   → Résiduel plus petit et fiable")
     print('='*60)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Comparaison RANSAC / multi-start")
+    parser.add_argument('--profile', metavar='FICHIER', default=None,
+                        help="Profile l'exécution avec cProfile et enregistre le rapport (.prof)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='   %(message)s')
+    if args.profile:
+        instrumentation.run_profiled(_demo, args.profile)
+    else:
+        _demo()
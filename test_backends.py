@@ -0,0 +1,165 @@
+"""
+Script de test de parité des backends de calcul.
+
+Vérifie que les backends disponibles (numpy, numba) donnent les mêmes
+résultats que l'implémentation Python de référence, noyau par noyau puis
+sur des estimations complètes, et que la sélection du backend suit
+AUTO_ORDER.
+"""
+
+import math
+import random
+
+import backends
+from scenario_generator import generate_table
+from table import estimate_origin_and_phi, estimate_origin_and_phi_batch, grid_trig_table
+
+TOLERANCE = 1e-6
+
+
+def _close(a: float, b: float, tol: float = TOLERANCE) -> bool:
+    return abs(a - b) <= tol * max(1.0, abs(a), abs(b))
+
+
+def _tables():
+    # Petites tables (noyaux Python) et grandes tables (noyaux vectorisés)
+    for seed, n in ((1, 4), (2, 8), (3, 40), (4, 300)):
+        yield generate_table(n, 'ring', noise_deg=0.5, outlier_ratio=0.2, seed=seed)['observations']
+
+
+def check_kernels(name: str) -> int:
+    """Compare les noyaux du backend name à ceux de référence. Retourne le nombre d'écarts."""
+    reference = backends.load_backend('python')
+    backend = backends.load_backend(name)
+    errors = 0
+    cos_table, sin_table = grid_trig_table(1.0)
+    for observations in _tables():
+        ref_prep = reference.prepare(observations)
+        prep = backend.prepare(observations)
+
+        ref_origins, ref_residuals = reference.residuals_for_angles(ref_prep, cos_table, sin_table)
+        origins, residuals = backend.residuals_for_angles(prep, cos_table, sin_table)
+        for (rx, ry), rr, (x, y), r in zip(ref_origins, ref_residuals, origins, residuals):
+            if not (_close(rx, x) and _close(ry, y) and _close(rr, r)):
+                errors += 1
+
+        # Balayage par lot : une table vide et des tables de tailles différentes
+        tables = [observations, [], observations[:3], observations[::2]]
+        ref_batch = reference.residuals_for_angles_batch([reference.prepare(t) for t in tables],
+                                                         cos_table, sin_table)
+        batch = backend.residuals_for_angles_batch([backend.prepare(t) for t in tables], cos_table, sin_table)
+        for (ref_origins, ref_residuals), (origins, residuals) in zip(ref_batch, batch):
+            for (rx, ry), rr, (x, y), r in zip(ref_origins, ref_residuals, origins, residuals):
+                if not (rr == r == float('inf') or (_close(rx, x) and _close(ry, y) and _close(rr, r))):
+                    errors += 1
+
+        cp, sp = math.cos(0.3), math.sin(0.3)
+        ref_origin, ref_residual = reference.residual_for_phi(ref_prep, cp, sp)
+        origin, residual = backend.residual_for_phi(prep, cp, sp)
+        if not (_close(ref_residual, residual) and all(map(_close, ref_origin, origin))):
+            errors += 1
+
+        ref_dist = reference.line_distances(ref_prep, ref_origin, cp, sp)
+        dist = backend.line_distances(prep, ref_origin, cp, sp)
+        errors += sum(not _close(a, b) for a, b in zip(ref_dist, dist))
+
+        lines = [((o['x'], o['y']), (math.cos(0.01 * i), math.sin(0.01 * i)))
+                 for i, o in enumerate(observations)]
+        if not all(map(_close, reference.least_squares_origin(lines), backend.least_squares_origin(lines))):
+            errors += 1
+        weights = [1.0 / (1 + i % 5) for i in range(len(lines))]
+        if not all(map(_close, reference.least_squares_origin(lines, weights),
+                       backend.least_squares_origin(lines, weights))):
+            errors += 1
+
+    # Cas dégénérés : aucune observation, droites parallèles
+    empty = backend.residuals_for_angles(backend.prepare([]), [1.0], [0.0])
+    if empty[1] != [float('inf')]:
+        errors += 1
+    parallel = [{'x': float(i), 'y': 0.0, 'azimuth_deg': 90.0} for i in range(300)]
+    ref = reference.residual_for_phi(reference.prepare(parallel), 1.0, 0.0)
+    got = backend.residual_for_phi(backend.prepare(parallel), 1.0, 0.0)
+    if not all(map(_close, ref[0], got[0])):
+        errors += 1
+    return errors
+
+
+def check_estimates(name: str) -> int:
+    """Compare les estimations complètes (φ modulo 180°) au backend de référence."""
+    errors = 0
+    for method in ('adaptive', 'ransac', 'irls', 'legacy'):
+        for observations in _tables():
+            results = []
+            for backend_name in ('python', name):
+                backends.set_backend(backend_name)
+                random.seed(0)
+                results.append(estimate_origin_and_phi(observations, method=method))
+            diff = (results[0].phi - results[1].phi) % 180.0
+            if min(diff, 180.0 - diff) > 1e-3 or not _close(results[0].residual, results[1].residual, 1e-4):
+                errors += 1
+    backends.set_backend('auto')
+    return errors
+
+
+def check_batch(name: str) -> int:
+    """Compare estimate_origin_and_phi_batch aux résolutions table par table."""
+    backends.set_backend(name)
+    batch = [observations for observations in _tables()]
+    errors = 0
+    for method in ('legacy', 'adaptive', 'irls'):
+        batched = estimate_origin_and_phi_batch(batch + batch[:1], method=method)
+        for observations, result in zip(batch + batch[:1], batched):
+            single = estimate_origin_and_phi(observations, method=method)
+            if not (_close(single.phi, result.phi) and _close(single.residual, result.residual)
+                    and single.iterations == result.iterations):
+                errors += 1
+    backends.set_backend('auto')
+    return errors
+
+
+def test_backend_parity():
+    for name in backends.available_backends():
+        assert check_kernels(name) == 0, name
+        assert check_estimates(name) == 0, name
+        assert check_batch(name) == 0, name
+
+
+
+def test_backend_selection():
+    available = backends.available_backends()
+    try:
+        # 'auto' retient le premier backend disponible dans l'ordre de préférence
+        expected = next(name for name in backends.AUTO_ORDER if name in available)
+        assert backends.set_backend('auto').name == expected
+        # Une instance par backend, partagée par les sélections successives
+        assert backends.set_backend('python') is backends.load_backend('python')
+        assert backends.get_backend().name == 'python'
+        try:
+            backends.set_backend('fortran')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("backend inconnu accepté")
+        assert backends.get_backend().name == 'python'
+    finally:
+        backends.set_backend('auto')
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Parité des backends de calcul")
+    print("=" * 60 + "\n")
+    print(f"Backends disponibles : {', '.join(backends.available_backends())}")
+    print(f"Backend automatique  : {backends.set_backend('auto').name}\n")
+    try:
+        test_backend_selection()
+        print("✅ sélection du backend")
+    except AssertionError as exc:
+        print(f"❌ sélection du backend : {exc}")
+    for name in backends.available_backends():
+        kernel_errors = check_kernels(name)
+        estimate_errors = check_estimates(name)
+        batch_errors = check_batch(name)
+        status = "✅" if kernel_errors == 0 and estimate_errors == 0 and batch_errors == 0 else "❌"
+        print(f"{status} {name:<8} écarts noyaux : {kernel_errors}   écarts estimations : {estimate_errors}"
+              f"   écarts lots : {batch_errors}")
@@ -0,0 +1,50 @@
+"""
+Script de test de la suite de benchmarks (benchmark.py).
+
+Exécute une suite réduite (toutes les méthodes, petites tables sans bruit)
+et vérifie le rapport JSON, les statistiques et la détection des
+régressions par rapport à une référence.
+"""
+
+import copy
+import json
+import math
+
+from benchmark import METHODS, compare_to_baseline, run_suite, summarize
+
+
+def test_summarize():
+    stats = summarize([4.0, 1.0, 3.0, 2.0])
+    assert (stats['min'], stats['median'], stats['mean'], stats['p95'], stats['runs']) == (1.0, 2.5, 2.5, 4.0, 4)
+    assert summarize([5.0])['stdev'] == 0.0
+
+
+def test_run_suite_and_baseline():
+    report = run_suite(METHODS, sizes=[3, 10], noises=[0.0], outliers=[0.0], repeat=2, warmup=0, seed=1)
+    # Rapport sérialisable en JSON strict, une entrée par (méthode, taille)
+    report = json.loads(json.dumps(report, allow_nan=False))
+    assert len(report['results']) == 2 * len(METHODS)
+    for entry in report['results']:
+        assert entry['time_ms']['runs'] == 2
+        assert math.isfinite(entry['residual']), entry
+
+    # Référence identique : aucune régression ; référence deux fois plus rapide : tout régresse
+    assert compare_to_baseline(report, report, tolerance=0.2) == []
+    faster = copy.deepcopy(report)
+    for entry in faster['results']:
+        entry['time_ms']['median'] /= 2.0
+    regressions = compare_to_baseline(report, faster, tolerance=0.2)
+    assert len(regressions) == len(report['results'])
+    assert all(abs(r['ratio'] - 2.0) < 1e-6 for r in regressions)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Suite de benchmarks")
+    print("=" * 60 + "\n")
+    for test in (test_summarize, test_run_suite_and_baseline):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
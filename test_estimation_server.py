@@ -0,0 +1,82 @@
+"""
+Script de test du micro-service d'estimation (estimation_server.py).
+
+Démarre des serveurs locaux sur un port libre et vérifie les codes de
+réponse : 200 avec un JSON strict, 400 pour une requête invalide, 503 quand
+la file est pleine et 504 quand la résolution dépasse le délai.
+"""
+
+import http.client
+import json
+import queue
+import threading
+
+from estimation_server import create_server
+from scenario_generator import generate_table
+
+
+def _start(**kwargs):
+    server = create_server(port=0, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _post(server, body):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=30)
+    try:
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        connection.request('POST', '/estimate', payload, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_ok_and_bad_requests():
+    server = _start()
+    try:
+        observations = generate_table(8, 'ring', noise_deg=0.3, seed=4)['observations']
+        status, reply = _post(server, {'observations': observations, 'method': 'adaptive'})
+        assert status == 200 and reply['complete'] and len(reply['origin']) == 2
+        invalid = [
+            b'{pas du json',
+            {'observations': observations, 'method': 'inconnue'},
+            {'observations': observations[:1]},
+            {'observations': [dict(o, x='abc') for o in observations]},
+            b'{"observations": [{"x": NaN, "y": 0, "azimuth_deg": 0}, {"x": 1, "y": 0, "azimuth_deg": 0}]}',
+        ]
+        for body in invalid:
+            status, reply = _post(server, body)
+            assert status == 400 and 'error' in reply, body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_queue_full_and_timeout():
+    server = _start(max_queue=2, request_timeout=0.1)
+    # Le lanceur de lots reste bloqué sur l'ancienne file : plus rien n'est traité
+    server.batcher.queue = queue.Queue(maxsize=2)
+    observations = generate_table(8, 'ring', noise_deg=0.3, seed=4)['observations']
+    try:
+        # Requêtes acceptées mais jamais résolues : 504 après request_timeout
+        for _ in range(2):
+            status, reply = _post(server, {'observations': observations})
+            assert status == 504 and 'error' in reply
+        # File pleine : refus immédiat
+        status, reply = _post(server, {'observations': observations})
+        assert status == 503 and 'error' in reply
+    finally:
+        server.shutdown()
+        server.server_close()
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Micro-service d'estimation")
+    print("=" * 60 + "\n")
+    for test in (test_ok_and_bad_requests, test_queue_full_and_timeout):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
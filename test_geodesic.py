@@ -0,0 +1,84 @@
+"""
+Script de test du mode géodésique (geodesic.py).
+
+Sur des curiosités à plus de 50 km, vérifie que le raffinement géodésique
+retrouve la table là où le modèle plan s'écarte, et que refine_geodesic
+s'arrête dès que son budget est épuisé.
+"""
+
+import math
+import random
+
+from geodesic import GeodesicSite, _ecef, _local_en, _station, estimate_geodesic, refine_geodesic
+from projection import UTMProjection
+from table import SolveBudget, estimate_origin_and_phi, normalize_deg
+
+TABLE_LAT, TABLE_LON, TRUE_PHI = 45.1885, 5.7245, 37.0
+
+
+def _far_observations(n: int = 12, min_km: float = 50.0, max_km: float = 200.0, seed: int = 4):
+    """Curiosités lointaines sans bruit : azimut gravé = direction géodésique vraie - φ."""
+    rng = random.Random(seed)
+    station = _station(TABLE_LAT, TABLE_LON)
+    utm = UTMProjection.for_site(TABLE_LAT, TABLE_LON)
+    x0, y0 = utm.forward([TABLE_LAT], [TABLE_LON])
+    observations = []
+    for _ in range(n):
+        bearing = rng.uniform(0.0, 2 * math.pi)
+        dist = rng.uniform(min_km, max_km) * 1000.0
+        lats, lons = utm.inverse([x0[0] + dist * math.cos(bearing)], [y0[0] + dist * math.sin(bearing)])
+        east, north = _local_en(*_ecef(lats[0], lons[0]), station)
+        observations.append({'x': lons[0], 'y': lats[0],
+                             'azimuth_deg': normalize_deg(math.degrees(math.atan2(north, east)) - TRUE_PHI)})
+    return observations
+
+
+def _error_m(site: GeodesicSite, lonlat) -> float:
+    xs, ys = site.projection.forward([lonlat[1], TABLE_LAT], [lonlat[0], TABLE_LON])
+    return math.hypot(xs[0] - xs[1], ys[0] - ys[1])
+
+
+def test_geodesic_recovers_far_table():
+    observations = _far_observations()
+    site = GeodesicSite(observations)
+    planar = estimate_origin_and_phi(site.metric, method='adaptive')
+    result = estimate_geodesic(observations, method='adaptive')
+    assert result.complete and result.method == 'geodesic'
+    planar_error = _error_m(site, site.to_lonlat(*planar.origin))
+    geodesic_error = _error_m(site, result.origin)
+    assert geodesic_error < 1.0 and geodesic_error < planar_error
+    assert abs((result.phi - TRUE_PHI + 90.0) % 180.0 - 90.0) < 1e-3
+    assert result.residual < 0.5
+
+
+def test_refine_stops_on_budget():
+    observations = _far_observations()
+    site = GeodesicSite(observations)
+    planar = estimate_origin_and_phi(site.metric, method='adaptive')
+    indices = list(range(len(observations)))
+    *_, iterations = refine_geodesic(site, planar.origin, planar.phi, indices)
+    assert iterations > 1
+
+    # Budget d'une itération : le raffinement s'arrête, dépasse au plus d'un jacobien (3 évaluations)
+    budget = SolveBudget(max_evaluations=5)
+    origin, phi, residual, capped = refine_geodesic(site, planar.origin, planar.phi, indices, budget=budget)
+    assert capped < iterations and not budget.complete
+    assert budget.evaluations <= 5 + 3
+    assert math.isfinite(residual)
+
+    # Budget largement suffisant : résolution complète, mêmes itérations
+    roomy = SolveBudget(max_evaluations=10000)
+    *_, full = refine_geodesic(site, planar.origin, planar.phi, indices, budget=roomy)
+    assert full == iterations and roomy.complete
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Mode géodésique")
+    print("=" * 60 + "\n")
+    for test in (test_geodesic_recovers_far_table, test_refine_stops_on_budget):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
@@ -0,0 +1,75 @@
+"""
+Script de test des compteurs d'instrumentation.
+
+Vérifie que chaque méthode d'estimation, quel que soit le backend, alimente
+les compteurs du chemin critique (compute_residual_for_phi,
+least_squares_origin, distance_point_to_line) quand return_stats=True, et
+que les collectes concurrentes laissent ENABLED cohérent.
+"""
+
+import random
+import threading
+
+import backends
+import instrumentation
+from scenario_generator import generate_table
+from table import estimate_origin_and_phi
+
+METHODS = ['ransac', 'irls', 'adaptive', 'ternary', 'multi-start', 'gradient', 'legacy']
+COUNTERS = ['compute_residual_for_phi', 'least_squares_origin', 'distance_point_to_line']
+
+
+def missing_counters(backend_name: str) -> dict:
+    """Compteurs restés à zéro, par méthode, pour le backend backend_name."""
+    observations = generate_table(8, 'ring', noise_deg=0.5, outlier_ratio=0.2, seed=7)['observations']
+    backends.set_backend(backend_name)
+    missing = {}
+    try:
+        for method in METHODS:
+            random.seed(0)
+            stats = estimate_origin_and_phi(observations, method=method, return_stats=True).stats
+            zeros = [name for name in COUNTERS if not stats.counters.get(name)]
+            if zeros:
+                missing[method] = zeros
+    finally:
+        backends.set_backend('auto')
+    return missing
+
+
+def test_counters_nonzero():
+    for name in backends.available_backends():
+        assert missing_counters(name) == {}, name
+
+
+def test_concurrent_collect_stats():
+    # Des collectes imbriquées dans plusieurs threads ne doivent perdre aucune mise à jour d'ENABLED
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        for _ in range(2000):
+            with instrumentation.collect_stats() as stats:
+                instrumentation.count('tick')
+            assert stats.counters == {'tick': 1}
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert instrumentation.ENABLED == 0
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Compteurs d'instrumentation par méthode")
+    print("=" * 60 + "\n")
+    for name in backends.available_backends():
+        missing = missing_counters(name)
+        status = "✅" if not missing else "❌"
+        print(f"{status} {name:<8} compteurs nuls : {missing or 'aucun'}")
+    try:
+        test_concurrent_collect_stats()
+        print("✅ collectes concurrentes")
+    except AssertionError as exc:
+        print(f"❌ collectes concurrentes : {exc}")
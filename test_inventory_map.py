@@ -0,0 +1,55 @@
+"""
+Script de test de la carte d'inventaire.
+
+Vérifie que le détail des tables écrit par create_inventory_map est du JSON
+strict (pas d'Infinity ni de NaN), y compris pour une table non résolue.
+"""
+
+import json
+import os
+import tempfile
+
+from inventory_map import create_inventory_map, detail_key, table_detail
+from result_cache import ResultCache
+from scenario_generator import generate_table
+
+
+def _strict_load(path: str):
+    def reject(constant):
+        raise AssertionError(f"valeur non finie {constant} dans {path}")
+    with open(path) as f:
+        return json.load(f, parse_constant=reject)
+
+
+def test_unsolved_table_detail():
+    detail = table_detail({'id': 'vide', 'observations': []}, 45.0, 6.0, cache=ResultCache())
+    assert (detail['origin'], detail['phi'], detail['residual']) == (None, None, None)
+    json.dumps(detail, allow_nan=False)
+
+
+def test_detail_files_are_strict_json():
+    solved = generate_table(8, 'ring', noise_deg=0.3, seed=3)
+    tables = [dict(solved, id='t1'), {'id': 't/2', 'name': 'Sans visée', 'observations': []}]
+    with tempfile.TemporaryDirectory() as directory:
+        index = create_inventory_map(tables, output_dir=directory, cache=ResultCache())
+        assert os.path.exists(index)
+        first = _strict_load(os.path.join(directory, 'tables', f"{detail_key('t1')}.json"))
+        assert first['residual'] is not None and len(first['origin']) == 2
+        assert all(obs['sight_end'] is not None for obs in first['observations'])
+        second = _strict_load(os.path.join(directory, 'tables', f"{detail_key('t/2')}.json"))
+        assert second['residual'] is None and second['origin'] is None
+        with open(index) as f:
+            page = f.read()
+        assert 'Infinity' not in page and 'NaN' not in page
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Carte d'inventaire")
+    print("=" * 60 + "\n")
+    for test in (test_unsolved_table_detail, test_detail_files_are_strict_json):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
@@ -0,0 +1,49 @@
+"""
+Script de test de l'exposition Prometheus de metrics.py.
+
+Vérifie que les valeurs non finies sont écrites avec les jetons du format
+texte (+Inf, -Inf, NaN) et que les grands compteurs gardent tous leurs
+chiffres.
+"""
+
+import math
+
+from metrics import MetricsRegistry, _format_value
+
+
+def test_format_value():
+    assert _format_value(float('inf')) == '+Inf'
+    assert _format_value(float('-inf')) == '-Inf'
+    assert _format_value(float('nan')) == 'NaN'
+    assert _format_value(1234567.0) == '1234567'
+    assert _format_value(0.25) == '0.25'
+
+
+def test_render_non_finite():
+    registry = MetricsRegistry()
+    residuals = registry.histogram('residual_meters', "Résiduel", [1, 10], ['method'])
+    evaluations = registry.counter('evaluations_total', "Évaluations", ['method'])
+    residuals.observe(float('inf'), 'legacy')
+    evaluations.inc(1234567, 'legacy')
+    lines = registry.render().splitlines()
+    assert 'residual_meters_sum{method="legacy"} +Inf' in lines
+    assert 'residual_meters_bucket{method="legacy",le="+Inf"} 1' in lines
+    assert 'residual_meters_bucket{method="legacy",le="10.0"} 0' in lines
+    assert 'evaluations_total{method="legacy"} 1234567' in lines
+    # Aucune valeur au format Python (inf, nan) dans l'exposition
+    for line in lines:
+        if not line.startswith('#'):
+            value = line.rsplit(' ', 1)[1]
+            assert value in ('+Inf', '-Inf', 'NaN') or math.isfinite(float(value)), line
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Exposition Prometheus")
+    print("=" * 60 + "\n")
+    for test in (test_format_value, test_render_non_finite):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
@@ -0,0 +1,100 @@
+"""
+Script de test des projections WGS84 ↔ plan métrique (projection.py).
+
+Vérifie les allers-retours UTM et plan tangent local (écart < 1 mm), des
+valeurs de référence, l'accord entre calcul vectorisé et point par point,
+et le plan du site partagé par les rendus (site_plane).
+"""
+
+import math
+import random
+
+from projection import (MIN_VECTOR_POINTS, WGS84_A, WGS84_E2, UTMProjection, get_projection,
+                        site_plane)
+
+LAT0, LON0 = 45.1885, 5.7245
+
+
+def _points(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return ([LAT0 + rng.uniform(-0.3, 0.3) for _ in range(n)],
+            [LON0 + rng.uniform(-0.4, 0.4) for _ in range(n)])
+
+
+def _max_error_m(lats, lons, back_lats, back_lons) -> float:
+    # Écart en mètres (1° de latitude ≈ 111 km, longitude réduite par cos φ)
+    return max(math.hypot((a - c) * 111320.0, (b - d) * 111320.0 * math.cos(math.radians(a)))
+               for a, b, c, d in zip(lats, lons, back_lats, back_lons))
+
+
+def test_round_trip_under_millimetre():
+    # Petit lot (boucle Python) et grand lot (numpy si disponible)
+    for n in (MIN_VECTOR_POINTS // 2, 5000):
+        lats, lons = _points(n)
+        for kind in ('enu', 'utm'):
+            projection = get_projection(LAT0, LON0, kind)
+            xs, ys = projection.forward(lats, lons)
+            back_lats, back_lons = projection.inverse(xs, ys)
+            assert _max_error_m(lats, lons, back_lats, back_lons) < 1e-3, (kind, n)
+
+
+def test_vector_matches_scalar():
+    lats, lons = _points(8)
+    for kind in ('enu', 'utm'):
+        projection = get_projection(LAT0, LON0, kind)
+        small = projection.forward(lats, lons)
+        large = projection.forward(lats * 20, lons * 20)
+        for axis in range(2):
+            assert all(abs(a - b) < 1e-6 for a, b in zip(small[axis], list(large[axis])[:8])), kind
+
+
+def test_reference_values():
+    # Équateur sur le méridien central du fuseau 31 : (500 000 m, 0 m)
+    xs, ys = UTMProjection.for_site(0.0, 3.0).forward([0.0], [3.0])
+    assert abs(xs[0] - 500000.0) < 1e-6 and abs(ys[0]) < 1e-6
+    # Plan tangent : le site est l'origine et 0,001° de latitude vaut un arc de méridien
+    enu = get_projection(LAT0, LON0)
+    xs, ys = enu.forward([LAT0, LAT0 + 0.001], [LON0, LON0])
+    assert abs(xs[0]) < 1e-6 and abs(ys[0]) < 1e-6
+    sin_lat = math.sin(math.radians(LAT0))
+    meridian_radius = WGS84_A * (1.0 - WGS84_E2) / (1.0 - WGS84_E2 * sin_lat ** 2) ** 1.5
+    assert abs(ys[1] - meridian_radius * math.radians(0.001)) < 1e-3
+    assert abs(xs[1]) < 1e-3
+    # Une projection par site
+    assert get_projection(LAT0, LON0) is enu
+    try:
+        get_projection(LAT0, LON0, 'lambert')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("projection inconnue acceptée")
+
+
+def test_site_plane():
+    lats, lons = _points(6, seed=1)
+    observations = [{'x': lon, 'y': lat, 'azimuth_deg': 10.0 * i, 'name': f"P{i}"}
+                    for i, (lat, lon) in enumerate(zip(lats, lons))]
+    origin = (LON0, LAT0)
+    projection, metric, origin_m = site_plane(observations, origin, use_latlon=True)
+    # Plan centré sur la moyenne des observations, autres champs conservés
+    assert abs(sum(o['x'] for o in metric) / len(metric)) < 50.0
+    assert [(o['azimuth_deg'], o['name']) for o in metric] == [(o['azimuth_deg'], o['name']) for o in observations]
+    back_lats, back_lons = projection.inverse([origin_m[0]], [origin_m[1]])
+    assert _max_error_m([LAT0], [LON0], back_lats, back_lons) < 1e-3
+
+    # Observations déjà en mètres : rendues telles quelles, plan du centre indiqué
+    projection, same, same_origin = site_plane(metric, origin_m, center_lat=LAT0, center_lon=LON0)
+    assert same is metric and same_origin == origin_m and projection is get_projection(LAT0, LON0)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Projections WGS84 ↔ plan métrique")
+    print("=" * 60 + "\n")
+    for test in (test_round_trip_under_millimetre, test_vector_matches_scalar, test_reference_values,
+                 test_site_plane):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
@@ -0,0 +1,89 @@
+"""
+Script de test du cache de résultats.
+
+Vérifie l'aller-retour des résultats par la mémoire et par SQLite, la
+quantification des clés et l'exclusion des résultats sans solution.
+"""
+
+import os
+import tempfile
+
+from result_cache import XY_QUANTUM, ResultCache, observations_key
+
+OBSERVATIONS = [
+    {'x': 2900.0, 'y': 200.0, 'azimuth_deg': 360.0},
+    {'x': 1601.0, 'y': 1001.0, 'azimuth_deg': 30.0},
+    {'x': 1500.0, 'y': 3500.0, 'azimuth_deg': 120.0},
+]
+RESULT = ((1234.5, -67.25), 12.3456, 0.75, [0, 2])
+
+
+def _shifted(dx: float = 0.0, dazimuth: float = 0.0):
+    return [dict(o, x=o['x'] + dx, azimuth_deg=o['azimuth_deg'] + dazimuth) for o in OBSERVATIONS]
+
+
+def test_key_quantization():
+    key = observations_key(OBSERVATIONS, 'ransac')
+    # Sous le quantum : même clé ; au-delà : clé différente
+    assert observations_key(_shifted(dx=0.2 * XY_QUANTUM), 'ransac') == key
+    assert observations_key(_shifted(dazimuth=1e-8), 'ransac') == key
+    assert observations_key(_shifted(dx=2 * XY_QUANTUM), 'ransac') != key
+    assert observations_key(_shifted(dazimuth=1e-5), 'ransac') != key
+    # Méthode et paramètres font partie de la clé
+    assert observations_key(OBSERVATIONS, 'irls') != key
+    assert observations_key(OBSERVATIONS, 'irls', {'loss': 'huber'}) != observations_key(OBSERVATIONS, 'irls')
+
+
+def test_memory_round_trip():
+    cache = ResultCache(max_entries=2)
+    key = observations_key(OBSERVATIONS, 'ransac')
+    assert cache.get(key) is None
+    cache.put(key, RESULT)
+    assert cache.get(key) == RESULT
+    # LRU : la plus ancienne entrée est évincée
+    cache.put('b', RESULT)
+    cache.put('c', RESULT)
+    assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_sqlite_round_trip():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cache.sqlite')
+        key = observations_key(OBSERVATIONS, 'ransac')
+        cache = ResultCache(db_path=path)
+        cache.put(key, RESULT)
+        cache.close()
+
+        reopened = ResultCache(db_path=path)
+        assert reopened.get(key) == RESULT
+        assert reopened.disk_hits == 1
+        # Relu depuis la mémoire ensuite
+        assert reopened.get(key) == RESULT
+        assert reopened.disk_hits == 1
+        reopened.close()
+
+
+def test_unsolved_results_not_cached():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(db_path=os.path.join(directory, 'cache.sqlite'))
+        for key, result in (('none', (None, None, float('inf'), [])),
+                            ('inf', ((0.0, 0.0), 10.0, float('inf'), [0, 1])),
+                            ('nan', ((float('nan'), 0.0), 10.0, 1.0, [0]))):
+            cache.put(key, result)
+            assert cache.get(key) is None, key
+        assert cache.stats()['disk_bytes'] == 0
+        cache.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Cache de résultats")
+    print("=" * 60 + "\n")
+    for test in (test_key_quantization, test_memory_round_trip, test_sqlite_round_trip,
+                 test_unsolved_results_not_cached):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
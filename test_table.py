@@ -0,0 +1,249 @@
+"""
+Script de test de l'API d'estimation de table.py.
+
+Vérifie sur des tables synthétiques le comportement de
+estimate_origin_and_phi et de ses options (fonction de perte IRLS, budget
+de calcul), ainsi que la forme des résultats (EstimationResult silencieux).
+"""
+
+import contextlib
+import io
+import logging
+import math
+import random
+import threading
+
+from result_cache import ResultCache
+from scenario_generator import generate_table
+from table import (METHODS, EstimationResult, ResidualMemo, SolveBudget, compute_residual_for_phi,
+                   estimate_origin_and_phi, estimate_origin_and_phi_batch, gradient_descent_phi, grid_trig_table,
+                   irls_weights, resolve, scan_phi_grid)
+
+
+def _table_with_outlier():
+    observations = generate_table(10, 'ring', noise_deg=0.3, seed=11)['observations']
+    # Visée décalée de 25° : outlier franc
+    observations[0] = dict(observations[0], azimuth_deg=(observations[0]['azimuth_deg'] + 25.0) % 360.0)
+    return observations
+
+
+def test_irls_loss():
+    observations = _table_with_outlier()
+    huber = estimate_origin_and_phi(observations, method='irls', loss='huber')
+    tukey = estimate_origin_and_phi(observations, method='irls', loss='tukey')
+    # Huber garde un poids à l'outlier, Tukey l'annule
+    assert huber.weights != tukey.weights
+    assert huber.weights[0] > 0.0
+    assert tukey.weights[0] == 0.0
+    assert huber.weights == irls_weights(observations, huber.origin, huber.phi, 'huber')
+    assert tukey.weights == irls_weights(observations, tukey.origin, tukey.phi, 'tukey')
+
+    # La perte fait partie de la clé du cache
+    cache = ResultCache()
+    estimate_origin_and_phi(observations, method='irls', cache=cache, loss='huber')
+    estimate_origin_and_phi(observations, method='irls', cache=cache, loss='tukey')
+    assert cache.hits == 0
+
+
+def test_irls_unknown_loss():
+    try:
+        estimate_origin_and_phi(_table_with_outlier(), method='irls', loss='cauchy')
+    except ValueError:
+        return
+    raise AssertionError("perte inconnue acceptée")
+
+
+def test_empty_observations():
+    # Aucune observation : pas de solution, sans exception, pour toutes les méthodes
+    for method in METHODS:
+        result = estimate_origin_and_phi([], method=method)
+        assert (result.origin, result.phi, result.residual) == (None, None, float('inf')), method
+    # Résiduel infini → φ non fini dans le gradient : le mémo ne doit pas le quantifier
+    phi, _, residual = gradient_descent_phi([], 0.0, memo=ResidualMemo())
+    assert residual == float('inf')
+
+
+def test_budget_evaluation_cap():
+    observations = generate_table(10, 'ring', noise_deg=0.3, seed=11)['observations']
+    for method in ('legacy', 'gradient', 'adaptive'):
+        unbounded = SolveBudget()
+        reference = estimate_origin_and_phi(observations, method=method, budget=unbounded)
+        assert reference.complete, method
+        # Terminer pile sur le plafond n'est pas un arrêt anticipé
+        exact = estimate_origin_and_phi(observations, method=method,
+                                        budget=SolveBudget(max_evaluations=unbounded.evaluations))
+        assert exact.complete and exact.phi == reference.phi, method
+        # Plafond à mi-parcours : résolution interrompue, meilleure solution partielle retournée
+        capped = SolveBudget(max_evaluations=unbounded.evaluations // 2)
+        result = estimate_origin_and_phi(observations, method=method, budget=capped)
+        assert not result.complete and result.phi is not None, method
+        assert capped.evaluations <= unbounded.evaluations // 2 + 1, method
+    # Grille legacy : une évaluation de moins que le balayage complet suffit à l'interrompre
+    grid = SolveBudget(max_evaluations=719)
+    assert not estimate_origin_and_phi(observations, method='legacy', budget=grid).complete
+
+
+def test_budget_counts_every_evaluation():
+    # Toutes les évaluations du gradient sont décomptées, y compris à la convergence
+    observations = generate_table(10, 'ring', noise_deg=0.3, seed=11)['observations']
+    memo, budget = ResidualMemo(), SolveBudget()
+    gradient_descent_phi(observations, 10.0, budget=budget, memo=memo)
+    assert budget.evaluations == memo.hits + memo.misses
+    assert budget.complete
+
+
+def test_budget_deadline_and_cancel():
+    observations = generate_table(10, 'ring', noise_deg=0.3, seed=11)['observations']
+    expired = SolveBudget(time_limit=0.0)
+    result = estimate_origin_and_phi(observations, method='adaptive', budget=expired)
+    assert not result.complete and expired.evaluations == 1 and not expired.cancelled
+
+    event = threading.Event()
+    event.set()
+    cancelled = SolveBudget(cancel_event=event)
+    result = estimate_origin_and_phi(observations, method='multi-start', budget=cancelled)
+    assert not result.complete and cancelled.cancelled
+    assert cancelled.evaluations < SolveBudget.CANCEL_CHECK_INTERVAL
+
+    # Événement jamais levé : la résolution va à son terme
+    untouched = SolveBudget(cancel_event=threading.Event())
+    assert estimate_origin_and_phi(observations, method='multi-start', budget=untouched).complete
+
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_silent_structured_results():
+    observations = _table_with_outlier()
+    handler = _Records()
+    logger = logging.getLogger('table')
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            results = []
+            for method in METHODS:
+                random.seed(0)
+                results.append(estimate_origin_and_phi(observations, method=method))
+            results += estimate_origin_and_phi_batch([observations, observations[1:]], method='ransac')
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
+    # Aucun affichage : le diagnostic des outliers passe par le logger du module
+    assert output.getvalue() == ''
+    assert any('outlier' in record.getMessage() for record in handler.records)
+    for result in results:
+        assert isinstance(result, EstimationResult)
+        assert len(result.inlier_mask) in (len(observations), len(observations) - 1)
+        assert len(result.inliers) + result.n_outliers == len(result.inlier_mask)
+        assert result.timings['total'] >= 0.0 and result.iterations > 0
+    ransac = results[0]
+    assert ransac.method == 'ransac' and not ransac.inlier_mask[0]
+    # Résultat à slots : pas d'attribut ajouté par erreur
+    try:
+        ransac.extra = 1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("EstimationResult accepte des attributs arbitraires")
+
+
+
+def test_grid_trig_table_shared():
+    # Une table par pas, calculée une fois puis partagée (même objet), y compris entre threads
+    tables = []
+    threads = [threading.Thread(target=lambda: tables.append(grid_trig_table(0.7))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(table is tables[0] for table in tables) and grid_trig_table(0.7) is tables[0]
+    cos_table, sin_table = tables[0]
+    assert len(cos_table) == len(sin_table) == math.ceil(360.0 / 0.7)
+    assert max(abs(c - math.cos(math.radians(k * 0.7))) for k, c in enumerate(cos_table)) < 1e-12
+    assert max(abs(s - math.sin(math.radians(k * 0.7))) for k, s in enumerate(sin_table)) < 1e-12
+
+    # Le balayage par tables donne les mêmes résiduels que l'évaluation angle par angle
+    observations = generate_table(12, 'cone', noise_deg=0.5, seed=2)['observations']
+    for phi, origin, residual in scan_phi_grid(observations, 5.0):
+        _, expected = compute_residual_for_phi(phi, observations)
+        assert abs(residual - expected) <= 1e-9 * max(1.0, expected), phi
+
+
+
+def test_residual_memo():
+    observations = generate_table(10, 'ring', noise_deg=0.3, seed=11)['observations']
+    memo = ResidualMemo()
+    first = memo.evaluate(37.5, observations)
+    assert first == compute_residual_for_phi(37.5, observations)
+    # Même contenu dans un autre ordre, même angle à un tour près : servis par le mémo
+    assert memo.evaluate(37.5 + 360.0, list(reversed(observations))) == first
+    assert (memo.hits, memo.misses) == (1, 1)
+
+    # Une résolution mémoïsée donne le même résultat qu'une résolution sans mémo partagé
+    shared = ResidualMemo()
+    with_memo = estimate_origin_and_phi(observations, method='adaptive', memo=shared)
+    assert with_memo.phi == estimate_origin_and_phi(observations, method='adaptive').phi
+    assert shared.saved_evaluations > 0
+
+
+def test_residual_memo_bounded():
+    memo = ResidualMemo(max_entries=100, max_lists=4)
+    for seed in range(20):
+        observations = generate_table(5, 'ring', noise_deg=0.3, seed=seed)['observations']
+        for phi in range(0, 360, 30):
+            memo.evaluate(float(phi), observations)
+        list(scan_phi_grid(observations, 10.0, memo=memo))
+        memo.store_grid(observations, 20.0, [(0.0, 0.0)] * 18, [1.0] * 18)
+    assert len(memo._entries) <= 100
+    for table in (memo._lists, memo._tokens, memo._prepared, memo._grids):
+        assert len(table) <= 4
+
+
+
+def _angle_gap(a: float, b: float) -> float:
+    return abs((a - b + 180.0) % 360.0 - 180.0)
+
+
+def test_resolve_warm_start():
+    observations = generate_table(12, 'ring', noise_deg=0.3, seed=21)['observations']
+    previous = estimate_origin_and_phi(observations, method='adaptive')
+    # Une visée corrigée de 0.3° : la solution précédente est réutilisée
+    edited = [dict(o) for o in observations]
+    edited[3]['azimuth_deg'] = (edited[3]['azimuth_deg'] + 0.3) % 360.0
+    result = resolve(previous, edited, range_deg=1.0)
+    assert 'global' not in result.timings and 'local' in result.timings
+    assert _angle_gap(result.phi, previous.phi) <= 1.0
+    fresh = estimate_origin_and_phi(edited, method='adaptive')
+    assert result.residual <= fresh.residual + 1.0
+    assert result.iterations < fresh.iterations
+
+    # Table tournée de 40° : hors de ±range_deg, repli sur la recherche globale
+    rotated = [dict(o, azimuth_deg=(o['azimuth_deg'] + 40.0) % 360.0) for o in observations]
+    fallback = resolve(previous, rotated, range_deg=1.0)
+    assert 'global' in fallback.timings
+    assert _angle_gap(fallback.phi, estimate_origin_and_phi(rotated, method='adaptive').phi) < 0.1
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("API d'estimation")
+    print("=" * 60 + "\n")
+    for test in (test_irls_loss, test_irls_unknown_loss, test_empty_observations, test_budget_evaluation_cap,
+                 test_budget_counts_every_evaluation, test_budget_deadline_and_cancel, test_silent_structured_results,
+                 test_grid_trig_table_shared, test_residual_memo, test_residual_memo_bounded,
+                 test_resolve_warm_start):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
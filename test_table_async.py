@@ -0,0 +1,90 @@
+"""
+Script de test de l'API asynchrone (table_async.py).
+
+Vérifie que l'estimateur asynchrone rend le même résultat que l'appel
+synchrone, que les requêtes identiques simultanées partagent un seul calcul
+et que l'annulation de la tâche interrompt réellement la résolution.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import backends
+from scenario_generator import generate_table
+from table import estimate_origin_and_phi
+from table_async import AsyncEstimator
+
+
+class _CountingExecutor(ThreadPoolExecutor):
+    """Exécuteur qui garde les futures soumises."""
+
+    def __init__(self):
+        super().__init__(max_workers=2)
+        self.submitted = []
+
+    def submit(self, *args, **kwargs):
+        future = super().submit(*args, **kwargs)
+        self.submitted.append(future)
+        return future
+
+
+def test_matches_sync_and_coalesces():
+    observations = generate_table(10, 'ring', noise_deg=0.3, seed=5)['observations']
+    other = generate_table(10, 'cone', noise_deg=0.3, seed=6)['observations']
+    executor = _CountingExecutor()
+    estimator = AsyncEstimator(executor)
+
+    async def run():
+        return await estimator.estimate_batch([observations, other, observations], method='adaptive')
+
+    try:
+        first, second, third = asyncio.run(run())
+    finally:
+        executor.shutdown()
+    # Deux tables distinctes : deux calculs seulement, la requête répétée partage le premier
+    assert len(executor.submitted) == 2
+    assert first is third
+    expected = estimate_origin_and_phi(observations, method='adaptive')
+    assert (first.origin, first.phi, first.residual) == (expected.origin, expected.phi, expected.residual)
+    assert second.phi == estimate_origin_and_phi(other, method='adaptive').phi
+    assert estimator._inflight == {}
+
+
+def test_cancel_interrupts_solve():
+    # Backend Python et grande table : la résolution dure bien plus que le délai avant annulation
+    observations = generate_table(2000, 'ring', noise_deg=0.5, outlier_ratio=0.2, seed=8)['observations']
+    backends.set_backend('python')
+    executor = _CountingExecutor()
+    estimator = AsyncEstimator(executor)
+
+    async def run():
+        task = asyncio.ensure_future(estimator.estimate(observations, method='ransac'))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    try:
+        assert asyncio.run(run())
+        # Le calcul du thread s'arrête au prochain relevé de cancel_event, sans aller au bout
+        result = executor.submitted[0].result(timeout=10.0)
+        assert not result.complete
+    finally:
+        executor.shutdown()
+        backends.set_backend('auto')
+    assert estimator._inflight == {}
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("API asynchrone")
+    print("=" * 60 + "\n")
+    for test in (test_matches_sync_and_coalesces, test_cancel_interrupts_solve):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
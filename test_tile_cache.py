@@ -0,0 +1,117 @@
+"""
+Script de test du cache de tuiles hors ligne (tile_cache.py).
+
+Sans accès réseau : numérotation des tuiles, stockage MBTiles (lignes TMS),
+import d'archive, pré-téléchargement d'une emprise déjà en cache et
+serveur local en mode hors ligne.
+"""
+
+import os
+import sqlite3
+import tempfile
+import urllib.error
+import urllib.request
+
+from tile_cache import TileCache, local_tile_url, prefetch, start_tile_server, tile_xy, tiles_for_bounds
+
+BOUNDS = (45.0, 5.5, 45.4, 6.0)
+
+
+def test_tile_numbering():
+    assert tile_xy(0.0, 0.0, 0) == (0, 0)
+    assert tile_xy(10.0, 10.0, 1) == (1, 0) and tile_xy(-10.0, -10.0, 1) == (0, 1)
+    # Pôles et antiméridien ramenés dans la grille
+    assert tile_xy(90.0, 180.0, 3) == (7, 0)
+    tiles = list(tiles_for_bounds(BOUNDS, range(8, 11)))
+    assert len(set(tiles)) == len(tiles) and {z for z, _, _ in tiles} == {8, 9, 10}
+    assert (10,) + tile_xy(45.2, 5.7, 10) in tiles
+
+
+def test_store_and_import():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TileCache(os.path.join(directory, 'cache'))
+        try:
+            cache.put('osm', 10, 533, 364, b'tuile')
+            assert cache.get('osm', 10, 533, 364) == b'tuile'
+            assert cache.get('osm', 10, 533, 365) is None
+            # Stockage MBTiles : ligne TMS (origine en bas)
+            db = sqlite3.connect(cache.path('osm'))
+            row = db.execute("SELECT tile_row FROM tiles").fetchone()
+            db.close()
+            assert row[0] == (1 << 10) - 1 - 364
+
+            archive = os.path.join(directory, 'archive.mbtiles')
+            db = sqlite3.connect(archive)
+            db.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, "
+                       "tile_data BLOB)")
+            db.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                           [(10, 533, (1 << 10) - 1 - 364, b'archive'), (10, 534, 600, b'nouvelle')])
+            db.commit()
+            db.close()
+            # Les tuiles déjà en cache sont conservées
+            assert cache.import_mbtiles(archive, 'osm') == 1
+            assert cache.count('osm') == 2 and cache.get('osm', 10, 533, 364) == b'tuile'
+
+            try:
+                cache.get('../osm', 0, 0, 0)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("nom de source invalide accepté")
+        finally:
+            cache.close()
+
+
+def test_prefetch_without_network():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TileCache(directory)
+        try:
+            tiles = list(tiles_for_bounds(BOUNDS, [9]))
+            for tile in tiles:
+                cache.put('osm', *tile, b'png')
+            # Tout est en cache : aucune requête réseau
+            assert prefetch(cache, 'osm', BOUNDS, [9]) == {'fetched': 0, 'cached': len(tiles), 'failed': 0}
+            try:
+                prefetch(cache, 'osm', BOUNDS, range(8, 16), max_tiles=100)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("emprise trop grande acceptée")
+        finally:
+            cache.close()
+
+
+def test_offline_server():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TileCache(directory)
+        server, url = start_tile_server(cache, port=0)
+        try:
+            cache.put('osm', 10, 533, 364, b'\x89PNG')
+            template = local_tile_url(url, 'osm')
+            with urllib.request.urlopen(template.format(z=10, x=533, y=364), timeout=5) as response:
+                assert response.status == 200 and response.read() == b'\x89PNG'
+                assert response.headers['Content-Type'] == 'image/png'
+            # Tuile absente (hors ligne), source inconnue, tuile hors grille, chemin invalide
+            for path in ('/osm/10/533/365.png', '/inconnue/10/533/364.png', '/osm/2/9/0.png', '/osm/x'):
+                try:
+                    urllib.request.urlopen(url + path, timeout=5)
+                except urllib.error.HTTPError as exc:
+                    assert exc.code == 404, path
+                else:
+                    raise AssertionError(f"{path} servi")
+        finally:
+            server.shutdown()
+            server.server_close()
+            cache.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Cache de tuiles hors ligne")
+    print("=" * 60 + "\n")
+    for test in (test_tile_numbering, test_store_and_import, test_prefetch_without_network, test_offline_server):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
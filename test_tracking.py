@@ -0,0 +1,63 @@
+"""
+Script de test du suivi récursif (tracking.py).
+
+Vérifie sur une table synthétique que le filtre converge vers la vérité
+terrain en réduisant son incertitude, qu'une lecture aberrante injectée est
+rejetée sans modifier l'état et qu'une visée à 180° près est acceptée
+(droites sans sens).
+"""
+
+import math
+import random
+
+from scenario_generator import generate_table
+from tracking import TableTracker
+
+
+def _reading(table, target, rng, offset_deg: float = 0.0):
+    true_x, true_y = table['origin']
+    theta = math.degrees(math.atan2(target['y'] - true_y, target['x'] - true_x))
+    azimuth = theta - table['phi'] + rng.gauss(0.0, 0.3) + offset_deg
+    return target['x'], target['y'], azimuth % 360.0
+
+
+def test_tracker_converges():
+    table = generate_table(8, 'ring', noise_deg=0.5, outlier_ratio=0.0, seed=7)
+    tracker = TableTracker.from_batch(table['observations'], method='adaptive')
+    initial = tracker.sigmas
+    rng = random.Random(2)
+    for _ in range(500):
+        assert tracker.update(*_reading(table, rng.choice(table['observations']), rng))
+    error = math.hypot(tracker.origin[0] - table['origin'][0], tracker.origin[1] - table['origin'][1])
+    assert error < 10.0
+    assert abs((tracker.phi - table['phi'] + 90.0) % 180.0 - 90.0) < 0.1
+    assert all(after < before for after, before in zip(tracker.sigmas, initial))
+
+
+def test_tracker_gates_outlier():
+    table = generate_table(8, 'ring', noise_deg=0.5, outlier_ratio=0.0, seed=7)
+    tracker = TableTracker.from_batch(table['observations'], method='adaptive')
+    rng = random.Random(3)
+    tracker.update_many([dict(zip(('x', 'y', 'azimuth_deg'), _reading(table, target, rng)))
+                         for target in table['observations'] * 20])
+    state, covariance, rejected = list(tracker.state), [row[:] for row in tracker.P], tracker.n_rejected
+
+    # Lecture décalée de 30° : rejetée, état et covariance inchangés
+    assert not tracker.update(*_reading(table, table['observations'][0], rng, offset_deg=30.0))
+    assert tracker.n_rejected == rejected + 1
+    assert tracker.state == state and tracker.P == covariance
+
+    # Visée retournée de 180° : même droite, lecture acceptée
+    assert tracker.update(*_reading(table, table['observations'][1], rng, offset_deg=180.0))
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Suivi récursif")
+    print("=" * 60 + "\n")
+    for test in (test_tracker_converges, test_tracker_gates_outlier):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
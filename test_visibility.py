@@ -0,0 +1,110 @@
+"""
+Script de test de la visibilité sur modèle numérique de terrain.
+
+Vérifie sur un petit MNT synthétique (plaine et crête nord-sud) que la
+lecture GeoTIFF tuilée et la grille brute donnent les mêmes altitudes, que
+les rayons détectent le masquage par la crête, que le cache par cellule
+sert les appels répétés et que les poids a priori sont validés.
+"""
+
+import math
+import os
+import random
+import struct
+import tempfile
+
+from table import estimate_origin_and_phi, ransac_estimate
+from visibility import ElevationModel, VisibilityIndex, _write_geotiff, line_of_sight, prior_weights
+
+CELL = 25.0
+SIZE = 240
+X_MIN, Y_MAX = -3000.0, 3000.0
+# Plaine à 300 m, crête de 1200 m à x = 1500 m
+RIDGE_X = 1500.0
+
+
+def _rows():
+    return [[int(300 + 900 * math.exp(-((X_MIN + (col + 0.5) * CELL - RIDGE_X) / 200.0) ** 2))
+             for col in range(SIZE)] for _ in range(SIZE)]
+
+
+def _write_dems(directory: str):
+    rows = _rows()
+    tif = os.path.join(directory, 'mnt.tif')
+    raw = os.path.join(directory, 'mnt.bin')
+    _write_geotiff(tif, rows, X_MIN, Y_MAX, CELL)
+    with open(raw, 'wb') as f:
+        for row in rows:
+            f.write(struct.pack(f'<{SIZE}h', *row))
+    return tif, raw
+
+
+def test_geotiff_matches_raw():
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as directory:
+        tif, raw = _write_dems(directory)
+        with ElevationModel.from_geotiff(tif) as dem, \
+                ElevationModel.from_raw(raw, SIZE, SIZE, X_MIN, Y_MAX, CELL) as dem_raw:
+            # 500 points (lecture vectorisée) et 10 points (lecture point par point), dont hors raster
+            for n in (500, 10):
+                xs = [rng.uniform(-3500.0, 3500.0) for _ in range(n)]
+                ys = [rng.uniform(-3500.0, 3500.0) for _ in range(n)]
+                tiled, flat = list(dem.sample(xs, ys)), list(dem_raw.sample(xs, ys))
+                assert all(a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(tiled, flat))
+                assert any(math.isnan(a) for a in tiled) and not all(math.isnan(a) for a in tiled)
+
+
+def test_line_of_sight():
+    targets = [
+        {'x': 2500.0, 'y': 0.0},               # derrière la crête : masquée
+        {'x': -2000.0, 'y': 500.0},            # dans la plaine : visible
+        {'x': 800.0, 'y': -300.0},             # au pied de la crête, côté table : visible
+        {'x': 2500.0, 'y': 0.0, 'z': 2500.0},  # sommet plus haut que la crête : visible
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        tif, _ = _write_dems(directory)
+        with ElevationModel.from_geotiff(tif) as dem:
+            assert line_of_sight(dem, (0.0, 0.0), targets) == [False, True, True, True]
+            # Même résultat par lots vectorisés et par la boucle Python (pas de marche long)
+            assert line_of_sight(dem, (0.0, 0.0), targets, step=400.0) == [False, True, True, True]
+
+
+def test_visibility_cache():
+    # Cibles sans altitude 'z' : la clé du cache doit rester comparable
+    targets = [{'x': 2500.0, 'y': 0.0}, {'x': -2000.0, 'y': 500.0}, {'x': 100.0, 'y': -1500.0, 'z': 350.0}]
+    with tempfile.TemporaryDirectory() as directory:
+        tif, _ = _write_dems(directory)
+        with ElevationModel.from_geotiff(tif) as dem:
+            index = VisibilityIndex(dem, cell_size=100.0)
+            first = index.visible((10.0, 10.0), targets)
+            for _ in range(2):
+                assert index.visible((30.0, 40.0), targets) == first
+            assert (index.hits, index.misses) == (2 * len(targets), len(targets))
+            assert sum(len(known) for known in index._cells.values()) == len(targets)
+            assert prior_weights(targets, (10.0, 10.0), index, hidden_weight=0.2) == [0.2, 1.0, 1.0]
+
+
+def test_prior_weights_validation():
+    observations = [{'x': 1000.0 * math.cos(a), 'y': 1000.0 * math.sin(a), 'azimuth_deg': 90.0 - math.degrees(a)}
+                    for a in (0.3, 1.4, 2.5, 3.9, 5.1)]
+    for weights in ([1.0] * 4, [1.0, 1.0, -0.5, 1.0, 1.0], [1.0, math.nan, 1.0, 1.0, 1.0]):
+        for solve in (lambda: ransac_estimate(observations, weights=weights),
+                      lambda: estimate_origin_and_phi(observations, prior_weights=weights)):
+            try:
+                solve()
+            except ValueError:
+                continue
+            raise AssertionError(f"poids invalides acceptés : {weights}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Visibilité sur modèle numérique de terrain")
+    print("=" * 60 + "\n")
+    for test in (test_geotiff_matches_raw, test_line_of_sight, test_visibility_cache,
+                 test_prior_weights_validation):
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except AssertionError as exc:
+            print(f"❌ {test.__name__} : {exc}")
@@ -0,0 +1,326 @@
+"""
+Cache local de tuiles cartographiques et serveur de tuiles hors ligne.
+
+Les cartes de visualize_map chargent leurs fonds (OpenStreetMap, Stamen
+terrain, CartoDB) sur Internet : lentes ou vides sur le terrain et dans un
+environnement isolé. Ce module :
+- stocke les tuiles dans un fichier MBTiles (SQLite) par source ;
+- pré-télécharge les tuiles d'une emprise et d'une plage de zooms, ou
+  importe une archive MBTiles existante ;
+- sert les tuiles en local (http://127.0.0.1:8766/<source>/{z}/{x}/{y}.png)
+  pour create_interactive_map(tile_server_url=...).
+
+Convention MBTiles : les lignes sont numérotées en TMS (origine en bas),
+les URL en XYZ (origine en haut) ; la conversion est y_tms = 2^z - 1 - y.
+
+Exemple :
+    python tile_cache.py prefetch --bounds 45.0 5.5 45.4 6.0 --zooms 10-14
+    python tile_cache.py serve
+"""
+
+import argparse
+import math
+import os
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+# Source → (URL distante XYZ, attribution, nom de la couche sur la carte)
+SOURCES: Dict[str, Tuple[str, str, str]] = {
+    'osm': (
+        'https://tile.openstreetmap.org/{z}/{x}/{y}.png',
+        '&copy; OpenStreetMap contributors',
+        'OpenStreetMap',
+    ),
+    'terrain': (
+        'https://tiles.stadiamaps.com/tiles/stamen_terrain/{z}/{x}/{y}.png',
+        'Map tiles by Stamen Design, under CC BY 3.0. Data by OpenStreetMap, under ODbL.',
+        'Terrain',
+    ),
+    'cartodb-light': (
+        'https://a.basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png',
+        '&copy; OpenStreetMap contributors &copy; CARTO',
+        'CartoDB Light',
+    ),
+}
+
+DEFAULT_DIRECTORY = os.environ.get('TABLE_TILE_CACHE', 'tile_cache')
+DEFAULT_PORT = 8766
+USER_AGENT = "TableOrientation-TileCache/1.0"
+
+# Garde-fou contre les téléchargements massifs (politique d'usage des serveurs publics)
+MAX_PREFETCH_TILES = 20000
+
+
+def _tms_row(z: int, y: int) -> int:
+    """Ligne TMS (MBTiles) d'une tuile XYZ ; la conversion est son propre inverse."""
+    return (1 << z) - 1 - y
+
+
+def tile_xy(lat: float, lon: float, z: int) -> Tuple[int, int]:
+    """Tuile XYZ (Web Mercator) contenant un point."""
+    n = 1 << z
+    lat = max(min(lat, 85.05112878), -85.05112878)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return (min(max(x, 0), n - 1), min(max(y, 0), n - 1))
+
+
+def tiles_for_bounds(bounds: Tuple[float, float, float, float],
+                     zooms: Sequence[int]) -> Iterator[Tuple[int, int, int]]:
+    """Tuiles (z, x, y) couvrant l'emprise (lat_min, lon_min, lat_max, lon_max)."""
+    lat_min, lon_min, lat_max, lon_max = bounds
+    for z in zooms:
+        x0, y0 = tile_xy(lat_max, lon_min, z)
+        x1, y1 = tile_xy(lat_min, lon_max, z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield (z, x, y)
+
+
+class TileCache:
+    """
+    Magasin de tuiles : un fichier <source>.mbtiles par source dans directory.
+
+    Les accès sont protégés par un verrou : le cache est partagé entre les
+    threads de pré-téléchargement et ceux du serveur.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def path(self, source: str) -> str:
+        return os.path.join(self.directory, f"{source}.mbtiles")
+
+    def _db(self, source: str) -> sqlite3.Connection:
+        db = self._connections.get(source)
+        if db is None:
+            if not source.replace('-', '').replace('_', '').isalnum():
+                raise ValueError(f"Nom de source invalide : {source!r}")
+            db = sqlite3.connect(self.path(source), check_same_thread=False)
+            db.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS tiles ("
+                "zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB, "
+                "PRIMARY KEY (zoom_level, tile_column, tile_row))"
+            )
+            label = SOURCES[source][2] if source in SOURCES else source
+            db.executemany("INSERT OR IGNORE INTO metadata (name, value) VALUES (?, ?)",
+                           [('name', label), ('format', 'png'), ('type', 'baselayer'), ('version', '1.1')])
+            db.commit()
+            self._connections[source] = db
+        return db
+
+    def get(self, source: str, z: int, x: int, y: int) -> Optional[bytes]:
+        """Tuile XYZ (z, x, y) de source, ou None si absente du cache."""
+        with self._lock:
+            row = self._db(source).execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level = ? AND tile_column = ? AND tile_row = ?",
+                (z, x, _tms_row(z, y))
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, source: str, z: int, x: int, y: int, data: bytes) -> None:
+        """Enregistre la tuile XYZ (z, x, y) de source."""
+        with self._lock:
+            db = self._db(source)
+            db.execute("INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) "
+                       "VALUES (?, ?, ?, ?)", (z, x, _tms_row(z, y), sqlite3.Binary(data)))
+            db.commit()
+
+    def count(self, source: str) -> int:
+        """Nombre de tuiles en cache pour source."""
+        with self._lock:
+            return self._db(source).execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+
+    def import_mbtiles(self, archive: str, source: str) -> int:
+        """
+        Importe les tuiles d'une archive MBTiles (les tuiles déjà en cache sont conservées).
+
+        Retourne le nombre de tuiles ajoutées.
+        """
+        if not os.path.exists(archive):
+            raise FileNotFoundError(archive)
+        with self._lock:
+            db = self._db(source)
+            before = db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0]
+            db.execute("ATTACH DATABASE ? AS archive", (archive,))
+            try:
+                db.execute("INSERT OR IGNORE INTO tiles (zoom_level, tile_column, tile_row, tile_data) "
+                           "SELECT zoom_level, tile_column, tile_row, tile_data FROM archive.tiles")
+                db.commit()
+            finally:
+                db.execute("DETACH DATABASE archive")
+            return db.execute("SELECT COUNT(*) FROM tiles").fetchone()[0] - before
+
+    def close(self) -> None:
+        with self._lock:
+            for db in self._connections.values():
+                db.close()
+            self._connections.clear()
+
+
+def fetch_tile(source: str, z: int, x: int, y: int, timeout: float = 10.0) -> bytes:
+    """Télécharge une tuile XYZ depuis le serveur distant de source."""
+    url = SOURCES[source][0].format(z=z, x=x, y=y)
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def prefetch(cache: TileCache, source: str, bounds: Tuple[float, float, float, float],
+             zooms: Sequence[int], workers: int = 4,
+             max_tiles: int = MAX_PREFETCH_TILES) -> Dict[str, int]:
+    """
+    Pré-télécharge les tuiles d'une emprise (lat_min, lon_min, lat_max, lon_max).
+
+    Les tuiles déjà en cache ne sont pas redemandées. Lève ValueError si
+    l'emprise dépasse max_tiles tuiles.
+
+    Returns:
+        {'fetched', 'cached', 'failed'}
+    """
+    tiles = list(tiles_for_bounds(bounds, zooms))
+    if len(tiles) > max_tiles:
+        raise ValueError(f"{len(tiles)} tuiles demandées (maximum {max_tiles}) : réduire l'emprise ou les zooms")
+    missing = [t for t in tiles if cache.get(source, *t) is None]
+    stats = {'fetched': 0, 'cached': len(tiles) - len(missing), 'failed': 0}
+
+    def _fetch(tile: Tuple[int, int, int]) -> bool:
+        try:
+            cache.put(source, *tile, fetch_tile(source, *tile))
+            return True
+        except (urllib.error.URLError, OSError):
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for ok in executor.map(_fetch, missing):
+            stats['fetched' if ok else 'failed'] += 1
+    return stats
+
+
+class TileRequestHandler(BaseHTTPRequestHandler):
+    """Gestionnaire HTTP : GET /<source>/<z>/<x>/<y>.png."""
+
+    server_version = "TableTiles/1.0"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        parts = self.path.split('?', 1)[0].strip('/').split('/')
+        try:
+            source, z, x, y = parts[0], int(parts[1]), int(parts[2]), int(parts[3].split('.', 1)[0])
+        except (IndexError, ValueError):
+            self.send_error(404)
+            return
+        if source not in SOURCES or not 0 <= z <= 22 or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+            self.send_error(404)
+            return
+
+        data = self.server.cache.get(source, z, x, y)
+        if data is None and self.server.online:
+            try:
+                data = fetch_tile(source, z, x, y)
+                self.server.cache.put(source, z, x, y, data)
+            except (urllib.error.URLError, OSError):
+                data = None
+        if data is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "public, max-age=86400")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_tile_server(cache: TileCache, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                       online: bool = False, verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Crée le serveur de tuiles (sans le démarrer). Appeler serve_forever() ensuite.
+
+    Si online est vrai, une tuile absente est téléchargée puis gardée en
+    cache ; sinon le serveur répond 404 sans jamais toucher au réseau.
+    """
+    server = ThreadingHTTPServer((host, port), TileRequestHandler)
+    server.cache = cache
+    server.online = online
+    server.verbose = verbose
+    return server
+
+
+def start_tile_server(cache: TileCache, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                      online: bool = False) -> Tuple[ThreadingHTTPServer, str]:
+    """Démarre le serveur dans un thread démon. Retourne (serveur, URL de base)."""
+    server = create_tile_server(cache, host, port, online)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def local_tile_url(server_url: str, source: str) -> str:
+    """Gabarit d'URL Leaflet d'une source servie par le serveur local."""
+    return f"{server_url.rstrip('/')}/{source}/{{z}}/{{x}}/{{y}}.png"
+
+
+def _parse_zooms(text: str) -> range:
+    low, _, high = text.partition('-')
+    return range(int(low), int(high or low) + 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache de tuiles et serveur de tuiles hors ligne")
+    parser.add_argument("--directory", default=DEFAULT_DIRECTORY, help="Dossier des fichiers MBTiles")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = commands.add_parser("prefetch", help="Pré-télécharge une emprise")
+    fetch_parser.add_argument("--bounds", type=float, nargs=4, required=True,
+                              metavar=("LAT_MIN", "LON_MIN", "LAT_MAX", "LON_MAX"))
+    fetch_parser.add_argument("--zooms", default="10-14", help="Zoom ou plage de zooms (ex. 10-14)")
+    fetch_parser.add_argument("--source", action="append", choices=sorted(SOURCES),
+                              help="Source(s) à télécharger (par défaut : toutes)")
+    fetch_parser.add_argument("--workers", type=int, default=4)
+
+    import_parser = commands.add_parser("import", help="Importe une archive MBTiles")
+    import_parser.add_argument("archive")
+    import_parser.add_argument("--source", required=True, choices=sorted(SOURCES))
+
+    serve_parser = commands.add_parser("serve", help="Sert les tuiles en local")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--online", action="store_true",
+                              help="Télécharger (et garder) les tuiles absentes du cache")
+    serve_parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    tile_cache = TileCache(args.directory)
+    if args.command == "prefetch":
+        for name in args.source or sorted(SOURCES):
+            result = prefetch(tile_cache, name, tuple(args.bounds), _parse_zooms(args.zooms), args.workers)
+            print(f"🗺️  {name:<14} {result['fetched']} téléchargées, {result['cached']} déjà en cache, "
+                  f"{result['failed']} échecs")
+    elif args.command == "import":
+        added = tile_cache.import_mbtiles(args.archive, args.source)
+        print(f"✅ {added} tuiles importées dans {tile_cache.path(args.source)}")
+    else:
+        server = create_tile_server(tile_cache, args.host, args.port, args.online, args.verbose)
+        print(f"🚀 Serveur de tuiles à l'écoute sur http://{args.host}:{args.port}"
+              f" ({'en ligne' if args.online else 'hors ligne'})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            tile_cache.close()
@@ -0,0 +1,249 @@
+"""
+Suivi récursif (filtre de Kalman étendu) pour le mode relevé en continu.
+
+En mode portable, l'appareil émet une suite de lectures (cible, azimut
+mesuré) pendant que l'opérateur balaie l'horizon. Plutôt que de relancer
+estimate_origin_and_phi sur une liste qui grandit, TableTracker met à jour
+l'état (x, y, φ) et sa covariance en O(1) par lecture.
+
+Modèle de mesure (même convention que table.py) : l'angle mathématique de
+la direction origine → cible vaut azimut + φ. Comme dans le modèle par
+droites de table.py, φ et φ + 180° sont équivalents : l'innovation est
+ramenée dans [-90°, 90°[.
+
+Les lectures improbables (distance de Mahalanobis au-delà de gate) sont
+rejetées comme outliers sans modifier l'état.
+
+Exemple :
+    tracker = TableTracker.from_batch(premieres_observations)
+    for lecture in flux:
+        tracker.update(lecture['x'], lecture['y'], lecture['azimuth_deg'])
+    print(tracker.origin, tracker.phi, tracker.sigmas)
+"""
+
+import math
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from table import EstimationResult, estimate_origin_and_phi, normalize_deg
+
+Matrix = List[List[float]]
+
+# Quantile à 99 % d'un chi² à 1 degré de liberté
+DEFAULT_GATE = 6.635
+
+
+def _wrap_half_turn(angle_rad: float) -> float:
+    """Ramène un angle dans [-π/2, π/2[ (les droites n'ont pas de sens)."""
+    return (angle_rad + math.pi / 2.0) % math.pi - math.pi / 2.0
+
+
+def _jacobian(state: Sequence[float], x: float, y: float) -> Tuple[float, float, float, float]:
+    """Prédiction h = atan2(dy, dx) - φ et ses dérivées par rapport à (x, y, φ)."""
+    dx = x - state[0]
+    dy = y - state[1]
+    r2 = dx * dx + dy * dy
+    if r2 < 1e-12:
+        return (0.0, 0.0, 0.0, -1.0)
+    return (math.atan2(dy, dx) - state[2], dy / r2, -dx / r2, -1.0)
+
+
+def _invert3(m: Matrix) -> Optional[Matrix]:
+    """Inverse d'une matrice 3x3 (None si singulière)."""
+    a, b, c = m[0]
+    d, e, f = m[1]
+    g, h, i = m[2]
+    co = [e * i - f * h, -(d * i - f * g), d * h - e * g]
+    det = a * co[0] + b * co[1] + c * co[2]
+    if abs(det) < 1e-18:
+        return None
+    inv = [
+        [co[0], -(b * i - c * h), b * f - c * e],
+        [co[1], a * i - c * g, -(a * f - c * d)],
+        [co[2], -(a * h - b * g), a * e - b * d],
+    ]
+    return [[v / det for v in row] for row in inv]
+
+
+def information_covariance(origin: Tuple[float, float], phi_deg: float,
+                           observations: List[Dict], sigma_deg: float) -> Optional[Matrix]:
+    """
+    Covariance (Gauss-Newton) de (x, y, φ[rad]) au point donné : (HᵀR⁻¹H)⁻¹.
+
+    Retourne None si les observations ne contraignent pas les trois paramètres.
+    """
+    state = (origin[0], origin[1], math.radians(phi_deg))
+    weight = 1.0 / math.radians(sigma_deg) ** 2
+    info = [[0.0] * 3 for _ in range(3)]
+    for obs in observations:
+        _, hx, hy, hphi = _jacobian(state, obs['x'], obs['y'])
+        row = (hx, hy, hphi)
+        for r in range(3):
+            for c in range(3):
+                info[r][c] += weight * row[r] * row[c]
+    return _invert3(info)
+
+
+class TableTracker:
+    """
+    Filtre de Kalman étendu sur l'état (x, y, φ) d'une table.
+
+    Args:
+        origin: Position initiale (x, y) en mètres
+        phi: Orientation initiale en degrés
+        covariance: Covariance initiale 3x3 de (x, y, φ) ; x, y en m et φ en
+            radians. Si None, incertitude large (1 km, 10°).
+        measurement_sigma_deg: Écart-type d'une lecture d'azimut (degrés)
+        process_noise: Variances ajoutées à chaque lecture (m², m², rad²),
+            pour suivre une dérive lente ; nulles pour une table fixe
+        gate: Seuil sur la distance de Mahalanobis² d'une innovation ; au-delà
+            la lecture est rejetée comme outlier
+    """
+
+    def __init__(self, origin: Tuple[float, float], phi: float,
+                 covariance: Optional[Matrix] = None,
+                 measurement_sigma_deg: float = 0.5,
+                 process_noise: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+                 gate: float = DEFAULT_GATE):
+        self.state = [float(origin[0]), float(origin[1]), math.radians(phi)]
+        if covariance is None:
+            covariance = [[1e6, 0.0, 0.0], [0.0, 1e6, 0.0], [0.0, 0.0, math.radians(10.0) ** 2]]
+        self.P = [list(map(float, row)) for row in covariance]
+        self.R = math.radians(measurement_sigma_deg) ** 2
+        self.Q = tuple(process_noise)
+        self.gate = gate
+        self.n_accepted = 0
+        self.n_rejected = 0
+
+    @classmethod
+    def from_batch(cls, observations: List[Dict], method: str = 'ransac',
+                   measurement_sigma_deg: float = 0.5, **kwargs) -> 'TableTracker':
+        """
+        Initialise le filtre par une résolution globale de table.py.
+
+        La covariance initiale est la covariance de Gauss-Newton calculée sur
+        les inliers de la solution, dilatée par le chi² réduit de
+        l'ajustement lorsque la dispersion dépasse measurement_sigma_deg.
+        """
+        return cls.from_result(estimate_origin_and_phi(observations, method=method), observations,
+                               measurement_sigma_deg=measurement_sigma_deg, **kwargs)
+
+    @classmethod
+    def from_result(cls, result: EstimationResult, observations: List[Dict],
+                    measurement_sigma_deg: float = 0.5, **kwargs) -> 'TableTracker':
+        """Initialise le filtre depuis un EstimationResult déjà calculé."""
+        inlier_obs = [observations[i] for i in result.inliers]
+        covariance = information_covariance(result.origin, result.phi, inlier_obs, measurement_sigma_deg)
+        if covariance is not None and len(inlier_obs) > 3:
+            state = (result.origin[0], result.origin[1], math.radians(result.phi))
+            chi2 = sum(_wrap_half_turn(math.radians(o['azimuth_deg']) - _jacobian(state, o['x'], o['y'])[0]) ** 2
+                       for o in inlier_obs) / math.radians(measurement_sigma_deg) ** 2
+            scale = max(1.0, chi2 / (len(inlier_obs) - 3))
+            covariance = [[v * scale for v in row] for row in covariance]
+        tracker = cls(result.origin, result.phi, covariance,
+                      measurement_sigma_deg=measurement_sigma_deg, **kwargs)
+        tracker.n_accepted = len(inlier_obs)
+        tracker.n_rejected = result.n_outliers
+        return tracker
+
+    def innovation(self, x: float, y: float, azimuth_deg: float) -> Tuple[float, float]:
+        """(innovation en radians, distance de Mahalanobis²) d'une lecture, sans mise à jour."""
+        h, hx, hy, hphi = _jacobian(self.state, x, y)
+        nu = _wrap_half_turn(math.radians(azimuth_deg) - h)
+        H = (hx, hy, hphi)
+        PH = [sum(self.P[r][c] * H[c] for c in range(3)) for r in range(3)]
+        S = sum(H[r] * PH[r] for r in range(3)) + self.R
+        return nu, nu * nu / S
+
+    def update(self, x: float, y: float, azimuth_deg: float) -> bool:
+        """
+        Intègre une lecture (cible en (x, y), azimut mesuré en degrés).
+
+        Retourne False si la lecture est rejetée par le test de vraisemblance.
+        """
+        P = self.P
+        for k in range(3):
+            P[k][k] += self.Q[k]
+
+        h, hx, hy, hphi = _jacobian(self.state, x, y)
+        H = (hx, hy, hphi)
+        nu = _wrap_half_turn(math.radians(azimuth_deg) - h)
+        PH = [P[r][0] * H[0] + P[r][1] * H[1] + P[r][2] * H[2] for r in range(3)]
+        S = H[0] * PH[0] + H[1] * PH[1] + H[2] * PH[2] + self.R
+        if nu * nu / S > self.gate:
+            self.n_rejected += 1
+            return False
+
+        K = [PH[r] / S for r in range(3)]
+        for r in range(3):
+            self.state[r] += K[r] * nu
+        # P = P - K (PHᵀ)ᵀ, en ne calculant que la moitié supérieure (P symétrique)
+        for r in range(3):
+            for c in range(r, 3):
+                value = P[r][c] - K[r] * PH[c]
+                P[r][c] = P[c][r] = value
+        self.n_accepted += 1
+        return True
+
+    def update_many(self, readings: List[Dict]) -> int:
+        """Intègre une liste de lectures {'x', 'y', 'azimuth_deg'}. Retourne le nombre d'acceptées."""
+        return sum(self.update(r['x'], r['y'], r['azimuth_deg']) for r in readings)
+
+    @property
+    def origin(self) -> Tuple[float, float]:
+        return (self.state[0], self.state[1])
+
+    @property
+    def phi(self) -> float:
+        """Orientation courante en degrés, dans [0, 360[."""
+        return normalize_deg(math.degrees(self.state[2]))
+
+    @property
+    def covariance(self) -> Matrix:
+        """Covariance de (x, y, φ) avec x, y en m et φ en degrés."""
+        scale = (1.0, 1.0, math.degrees(1.0))
+        return [[self.P[r][c] * scale[r] * scale[c] for c in range(3)] for r in range(3)]
+
+    @property
+    def sigmas(self) -> Tuple[float, float, float]:
+        """Écarts-types (σx m, σy m, σφ degrés)."""
+        return (math.sqrt(max(self.P[0][0], 0.0)), math.sqrt(max(self.P[1][1], 0.0)),
+                math.degrees(math.sqrt(max(self.P[2][2], 0.0))))
+
+
+def _demo():
+    from scenario_generator import generate_table
+
+    table = generate_table(8, 'ring', noise_deg=0.5, outlier_ratio=0.0, seed=7)
+    targets = table['observations']
+    true_x, true_y = table['origin']
+
+    print("=" * 60)
+    print("Suivi récursif d'une table (relevé en continu)")
+    print("=" * 60 + "\n")
+    print(f"Vérité terrain : origine ({true_x:.2f}, {true_y:.2f}), φ = {table['phi']:.3f}°\n")
+
+    tracker = TableTracker.from_batch(targets, method='adaptive')
+    sx, sy, sphi = tracker.sigmas
+    print(f"🔍 Initialisation : ({tracker.origin[0]:.2f}, {tracker.origin[1]:.2f}), φ = {tracker.phi:.3f}°"
+          f"  σ = ({sx:.1f} m, {sy:.1f} m, {sphi:.3f}°)\n")
+
+    rng = random.Random(1)
+    for step in range(1, 2001):
+        target = rng.choice(targets)
+        theta = math.degrees(math.atan2(target['y'] - true_y, target['x'] - true_x))
+        azimuth = theta - table['phi'] + rng.gauss(0.0, 0.5)
+        if rng.random() < 0.05:
+            azimuth += rng.uniform(20.0, 340.0)  # Lecture aberrante
+        tracker.update(target['x'], target['y'], normalize_deg(azimuth))
+        if step in (10, 100, 500, 2000):
+            sx, sy, sphi = tracker.sigmas
+            error = math.hypot(tracker.origin[0] - true_x, tracker.origin[1] - true_y)
+            print(f"   {step:>5} lectures : erreur {error:7.2f} m, φ = {tracker.phi:.3f}°"
+                  f"  σ = ({sx:.1f} m, {sy:.1f} m, {sphi:.3f}°)")
+
+    print(f"\n✅ {tracker.n_accepted} lectures acceptées, {tracker.n_rejected} rejetées")
+
+
+if __name__ == "__main__":
+    _demo()
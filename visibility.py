@@ -0,0 +1,529 @@
+"""
+Visibilité des curiosités depuis la table, sur un modèle numérique de terrain.
+
+Une curiosité gravée mais cachée par le relief depuis la position estimée
+est un outlier probable. Ce module :
+- lit un MNT (raster d'altitudes) par mmap, sans le charger en mémoire :
+  grille brute (binaire ligne par ligne) ou GeoTIFF non compressé, en
+  bandes ou en tuiles. Chaque lecture ne touche que les pages des tuiles
+  traversées ;
+- calcule la visibilité de chaque curiosité par marche le long des rayons
+  (tous les échantillons de tous les rayons en un seul lot avec numpy),
+  avec courbure terrestre et réfraction ;
+- garde les résultats par cellule du MNT contenant l'origine : deux
+  origines voisines (itérations RANSAC, tables d'un même belvédère)
+  partagent leurs calculs ;
+- convertit les visibilités en poids a priori pour ransac_estimate.
+
+Les coordonnées sont celles du plan des observations (mètres). Pour un MNT
+en degrés (EPSG:4326), fournir la projection du site (projection.py) :
+les points du plan sont convertis en (lat, lon) avant lecture.
+
+Exemple :
+    dem = ElevationModel.from_geotiff('mnt.tif')
+    index = VisibilityIndex(dem)
+    result = estimate_with_visibility(observations, index)
+"""
+
+import math
+import mmap
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from table import EstimationResult, estimate_origin_and_phi
+
+try:
+    import numpy as np
+except ImportError:  # numpy est optionnel
+    np = None
+
+# Rayon terrestre moyen et coefficient de réfraction atmosphérique standard
+EARTH_RADIUS = 6371000.0
+REFRACTION = 0.13
+
+# Nombre maximal d'échantillons par rayon (le pas s'allonge au-delà)
+MAX_RAY_SAMPLES = 4096
+
+# En dessous de ce nombre d'échantillons, la boucle Python est plus rapide que numpy
+MIN_VECTOR_POINTS = 64
+
+# Longueur approximative d'un degré de latitude (résolution d'un MNT en degrés)
+METERS_PER_DEGREE = 111320.0
+
+# TIFF : (SampleFormat, BitsPerSample) → format struct
+_TIFF_SAMPLE_FORMATS = {
+    (1, 8): 'B', (1, 16): 'H', (1, 32): 'I',
+    (2, 8): 'b', (2, 16): 'h', (2, 32): 'i',
+    (3, 32): 'f', (3, 64): 'd',
+}
+# TIFF : type de champ → (format struct, taille)
+_TIFF_FIELD_TYPES = {1: ('B', 1), 2: ('c', 1), 3: ('H', 2), 4: ('I', 4),
+                     11: ('f', 4), 12: ('d', 8), 16: ('Q', 8)}
+
+
+class ElevationModel:
+    """
+    Raster d'altitudes (mètres) lu par mmap, découpé en tuiles.
+
+    Une grille brute est une seule tuile ; un GeoTIFF en bandes a des
+    tuiles de la largeur de l'image. La cellule (col, row) couvre
+    [x_min + col·dx, x_min + (col+1)·dx[ × ]y_max - (row+1)·dy, y_max - row·dy].
+
+    Args:
+        path: Fichier du raster
+        width, height: Taille en cellules
+        x_min, y_max: Coin haut-gauche (unités du raster)
+        dx, dy: Taille d'une cellule (unités du raster, positives)
+        sample_format: Format struct d'une valeur ('h', 'f'...)
+        byte_order: '<' ou '>'
+        tile_width, tile_height: Taille des tuiles (défaut : l'image entière)
+        tile_offsets: Position de chaque tuile dans le fichier (ordre ligne par ligne)
+        nodata: Valeur « pas de donnée » (ignorée par les rayons)
+        projection: Projection du site si le raster est en degrés (lon, lat)
+    """
+
+    def __init__(self, path: str, width: int, height: int, x_min: float, y_max: float,
+                 dx: float, dy: float, sample_format: str = 'h', byte_order: str = '<',
+                 tile_width: Optional[int] = None, tile_height: Optional[int] = None,
+                 tile_offsets: Optional[List[int]] = None, nodata: Optional[float] = None,
+                 projection=None):
+        self.path = path
+        self.width, self.height = width, height
+        self.x_min, self.y_max, self.dx, self.dy = x_min, y_max, dx, dy
+        self.fmt = byte_order + sample_format
+        self.itemsize = struct.calcsize(self.fmt)
+        self.tile_width = tile_width or width
+        self.tile_height = tile_height or height
+        self.tiles_across = -(-width // self.tile_width)
+        self.tile_offsets = list(tile_offsets) if tile_offsets is not None else [0]
+        self.nodata = nodata
+        self.projection = projection
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if np is not None:
+            self._bytes = np.frombuffer(self._mm, dtype=np.uint8)
+            self._dtype = np.dtype(self.fmt)
+            self._offsets = np.asarray(self.tile_offsets, dtype=np.int64)
+
+    @classmethod
+    def from_raw(cls, path: str, width: int, height: int, x_min: float, y_max: float,
+                 cell_size: float, sample_format: str = 'h', byte_order: str = '<',
+                 header_bytes: int = 0, nodata: Optional[float] = None,
+                 projection=None) -> 'ElevationModel':
+        """Grille brute : height lignes de width valeurs, ligne du haut en premier."""
+        return cls(path, width, height, x_min, y_max, cell_size, cell_size, sample_format,
+                   byte_order, tile_offsets=[header_bytes], nodata=nodata, projection=projection)
+
+    @classmethod
+    def from_geotiff(cls, path: str, projection=None) -> 'ElevationModel':
+        """
+        GeoTIFF classique (pas BigTIFF), une bande, non compressé.
+
+        Le géoréférencement vient de ModelPixelScale et ModelTiepoint, la
+        valeur « pas de donnée » de GDAL_NODATA.
+        """
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            tags, order = _read_tiff_tags(mm)
+        finally:
+            mm.close()
+
+        def first(tag, default=None):
+            values = tags.get(tag)
+            return values[0] if values else default
+
+        if first(259, 1) != 1:
+            raise ValueError(f"{path} : GeoTIFF compressé non pris en charge (Compression={first(259)})")
+        if first(277, 1) != 1:
+            raise ValueError(f"{path} : une seule bande attendue (SamplesPerPixel={first(277)})")
+        if first(317, 1) != 1:
+            raise ValueError(f"{path} : prédicteur non pris en charge (Predictor={first(317)})")
+        sample_format = _TIFF_SAMPLE_FORMATS.get((first(339, 1), first(258, 8)))
+        if sample_format is None:
+            raise ValueError(f"{path} : format de valeur non pris en charge "
+                             f"(SampleFormat={first(339, 1)}, BitsPerSample={first(258)})")
+        if 33550 not in tags or 33922 not in tags:
+            raise ValueError(f"{path} : géoréférencement absent (ModelPixelScale / ModelTiepoint)")
+
+        width, height = first(256), first(257)
+        if 324 in tags:
+            tile_width, tile_height, offsets = first(322), first(323), tags[324]
+        else:
+            tile_width, tile_height, offsets = width, first(278, height), tags[273]
+        scale_x, scale_y = tags[33550][0], tags[33550][1]
+        col0, row0, _, x0, y0, _ = tags[33922][:6]
+        nodata = None
+        if 42113 in tags:
+            text = b''.join(tags[42113]).rstrip(b'\0').strip()
+            nodata = float(text) if text else None
+        return cls(path, width, height, x0 - col0 * scale_x, y0 + row0 * scale_y, scale_x, scale_y,
+                   sample_format, order, tile_width, tile_height, list(offsets), nodata, projection)
+
+    @property
+    def resolution_m(self) -> float:
+        """Taille d'une cellule en mètres (approchée pour un raster en degrés)."""
+        if self.projection is None:
+            return min(self.dx, self.dy)
+        return self.dy * METERS_PER_DEGREE
+
+    def close(self) -> None:
+        self._bytes = None
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> 'ElevationModel':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def cell_of(self, x: float, y: float) -> Tuple[int, int]:
+        """Cellule (col, row) contenant un point du plan des observations."""
+        if self.projection is not None:
+            lats, lons = self.projection.inverse([x], [y])
+            x, y = lons[0], lats[0]
+        return (math.floor((x - self.x_min) / self.dx), math.floor((self.y_max - y) / self.dy))
+
+    def sample(self, xs: Sequence[float], ys: Sequence[float]):
+        """
+        Altitudes aux points (xs, ys) du plan, cellule la plus proche.
+
+        Hors du raster ou sur « pas de donnée » : NaN. Avec numpy et un lot
+        assez grand, retourne un tableau ; sinon une liste.
+        """
+        if self.projection is not None:
+            lats, lons = self.projection.inverse(xs, ys)
+            xs, ys = lons, lats
+        if np is not None and (isinstance(xs, np.ndarray) or len(xs) >= MIN_VECTOR_POINTS):
+            return self._sample_array(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        return [self._sample_one(x, y) for x, y in zip(xs, ys)]
+
+    def _byte_offset(self, col, row):
+        """Position dans le fichier de la valeur (col, row) ; scalaires ou tableaux."""
+        tw, th = self.tile_width, self.tile_height
+        tile = (row // th) * self.tiles_across + col // tw
+        offsets = self.tile_offsets if isinstance(col, int) else self._offsets
+        return offsets[tile] + ((row % th) * tw + col % tw) * self.itemsize
+
+    def _sample_one(self, x: float, y: float) -> float:
+        col = math.floor((x - self.x_min) / self.dx)
+        row = math.floor((self.y_max - y) / self.dy)
+        if not (0 <= col < self.width and 0 <= row < self.height):
+            return math.nan
+        value = struct.unpack_from(self.fmt, self._mm, self._byte_offset(col, row))[0]
+        return math.nan if value == self.nodata else float(value)
+
+    def _sample_array(self, xs, ys):
+        cols = np.floor((xs - self.x_min) / self.dx).astype(np.int64)
+        rows = np.floor((self.y_max - ys) / self.dy).astype(np.int64)
+        inside = (cols >= 0) & (cols < self.width) & (rows >= 0) & (rows < self.height)
+        values = np.full(len(cols), np.nan)
+        if inside.any():
+            offsets = self._byte_offset(cols[inside], rows[inside])
+            # Rassemble les octets de chaque valeur : valable quel que soit l'alignement des tuiles
+            raw = self._bytes[offsets[:, None] + np.arange(self.itemsize)]
+            found = raw.view(self._dtype).ravel().astype(float)
+            if self.nodata is not None:
+                found[found == self.nodata] = np.nan
+            values[inside] = found
+        return values
+
+
+def _read_tiff_tags(mm) -> Tuple[Dict[int, List], str]:
+    """Étiquettes du premier IFD d'un TIFF classique : {tag: valeurs}, ordre des octets."""
+    order = {b'II': '<', b'MM': '>'}.get(bytes(mm[:2]))
+    if order is None or struct.unpack_from(order + 'H', mm, 2)[0] != 42:
+        raise ValueError("Fichier TIFF classique attendu (BigTIFF non pris en charge)")
+    ifd = struct.unpack_from(order + 'I', mm, 4)[0]
+    tags: Dict[int, List] = {}
+    for k in range(struct.unpack_from(order + 'H', mm, ifd)[0]):
+        tag, kind, count, inline = struct.unpack_from(order + 'HHI4s', mm, ifd + 2 + 12 * k)
+        if kind not in _TIFF_FIELD_TYPES:
+            continue
+        fmt, size = _TIFF_FIELD_TYPES[kind]
+        if count * size <= 4:
+            tags[tag] = list(struct.unpack_from(f'{order}{count}{fmt}', inline))
+        else:
+            offset = struct.unpack_from(order + 'I', inline)[0]
+            tags[tag] = list(struct.unpack_from(f'{order}{count}{fmt}', mm, offset))
+    return tags, order
+
+
+def line_of_sight(dem: ElevationModel, origin: Tuple[float, float], targets: List[Dict],
+                  observer_height: float = 1.5, target_height: float = 0.0,
+                  step: Optional[float] = None, clearance: float = 0.0) -> List[bool]:
+    """
+    Visibilité de chaque cible depuis origin, par marche le long des rayons.
+
+    Le terrain est abaissé de d²(1 - REFRACTION) / 2R à la distance d
+    (courbure terrestre et réfraction). Une cible est visible si aucun
+    échantillon du relief ne dépasse la ligne de visée de plus de clearance.
+    Les échantillons sans donnée ne masquent rien.
+
+    Args:
+        dem: Modèle de terrain
+        origin: Position de la table (x, y)
+        targets: Liste de dict {'x', 'y', 'z' (opt, altitude du sommet)}
+        observer_height: Hauteur de l'œil au-dessus du sol (mètres)
+        target_height: Hauteur visée au-dessus du sol de la cible (mètres)
+        step: Pas de marche (mètres, défaut : résolution du MNT)
+        clearance: Marge tolérée (mètres)
+
+    Returns:
+        Liste de booléens, un par cible
+    """
+    if not targets:
+        return []
+    step = step or dem.resolution_m
+    ground = dem.sample([origin[0]] + [t['x'] for t in targets], [origin[1]] + [t['y'] for t in targets])
+    ground = [float(g) for g in ground]
+    eye = (ground[0] if not math.isnan(ground[0]) else 0.0) + observer_height
+    curvature = (1.0 - REFRACTION) / (2.0 * EARTH_RADIUS)
+
+    # Rayons : extrémités, altitude de la cible, nombre d'échantillons
+    rays = []
+    for target, z_ground in zip(targets, ground[1:]):
+        dx, dy = target['x'] - origin[0], target['y'] - origin[1]
+        dist = math.hypot(dx, dy)
+        z = target.get('z', z_ground)
+        z = (z if not math.isnan(z) else eye) + target_height - curvature * dist * dist
+        rays.append((dx, dy, dist, z, min(int(dist / step), MAX_RAY_SAMPLES)))
+    total = sum(r[4] for r in rays)
+
+    if np is not None and total >= MIN_VECTOR_POINTS:
+        # Fractions t ∈ ]0, 1[ de tous les rayons à la suite, une lecture du MNT pour le lot
+        counts = np.array([max(r[4] - 1, 0) for r in rays])
+        ray_of = np.repeat(np.arange(len(rays)), counts)
+        starts = np.cumsum(counts) - counts
+        rank = np.arange(counts.sum()) - np.repeat(starts, counts) + 1
+        t = rank / np.repeat(np.array([max(r[4], 1) for r in rays], dtype=float), counts)
+        dxs, dys, dists, zs = (np.array([r[k] for r in rays], dtype=float) for k in range(4))
+        d = t * dists[ray_of]
+        terrain = dem.sample(origin[0] + t * dxs[ray_of], origin[1] + t * dys[ray_of])
+        excess = terrain - curvature * d * d - (eye + t * (zs[ray_of] - eye))
+        excess = np.where(np.isnan(excess), -np.inf, excess)
+        blocked = np.full(len(rays), False)
+        nonempty = counts > 0
+        if nonempty.any():
+            blocked[nonempty] = np.maximum.reduceat(excess, starts[nonempty]) > clearance
+        return (~blocked).tolist()
+
+    visible = []
+    for dx, dy, dist, z, n in rays:
+        ts = [k / n for k in range(1, n)]
+        terrain = dem.sample([origin[0] + t * dx for t in ts], [origin[1] + t * dy for t in ts])
+        visible.append(all(
+            math.isnan(h) or h - curvature * (t * dist) ** 2 - (eye + t * (z - eye)) <= clearance
+            for t, h in zip(ts, terrain)
+        ))
+    return visible
+
+
+class VisibilityIndex:
+    """
+    Visibilités mises en cache par cellule d'origine.
+
+    L'origine est ramenée au centre de sa cellule de taille cell_size : le
+    résultat ne dépend que de la cellule, et toute origine de la même
+    cellule réutilise les rayons déjà calculés. Les cellules les plus
+    anciennes sont évincées au-delà de max_cells.
+
+    Args:
+        dem: Modèle de terrain
+        cell_size: Taille des cellules d'origine (mètres, défaut : résolution du MNT)
+        max_cells: Nombre maximal de cellules gardées (LRU)
+        observer_height, target_height, clearance: Voir line_of_sight
+    """
+
+    def __init__(self, dem: ElevationModel, cell_size: Optional[float] = None, max_cells: int = 256,
+                 observer_height: float = 1.5, target_height: float = 0.0, clearance: float = 0.0):
+        self.dem = dem
+        self.cell_size = cell_size or dem.resolution_m
+        self.max_cells = max_cells
+        self.observer_height = observer_height
+        self.target_height = target_height
+        self.clearance = clearance
+        self.hits = 0
+        self.misses = 0
+        self._cells: "OrderedDict[Tuple[int, int], Dict[Tuple[float, float, float], bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def visible(self, origin: Tuple[float, float], targets: List[Dict]) -> List[bool]:
+        """Visibilité de chaque cible depuis la cellule de origin."""
+        cell = (math.floor(origin[0] / self.cell_size), math.floor(origin[1] / self.cell_size))
+        keys = [(round(t['x'], 1), round(t['y'], 1), _altitude_key(t)) for t in targets]
+        with self._lock:
+            known = self._cells.get(cell)
+            if known is None:
+                known = self._cells[cell] = {}
+            self._cells.move_to_end(cell)
+            while len(self._cells) > self.max_cells:
+                self._cells.popitem(last=False)
+            missing = [i for i, key in enumerate(keys) if key not in known]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            center = ((cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size)
+            flags = line_of_sight(self.dem, center, [targets[i] for i in missing],
+                                  self.observer_height, self.target_height, clearance=self.clearance)
+            with self._lock:
+                known.update((keys[i], flag) for i, flag in zip(missing, flags))
+        return [known[key] for key in keys]
+
+
+def _altitude_key(target: Dict) -> Optional[float]:
+    """Altitude arrondie d'une cible pour la clé du cache ; None si absente (NaN ne serait jamais retrouvé)."""
+    z = target.get('z')
+    return None if z is None or math.isnan(z) else round(z, 1)
+
+
+def prior_weights(observations: List[Dict], origin: Tuple[float, float], index: VisibilityIndex,
+                  hidden_weight: float = 0.2) -> List[float]:
+    """
+    Poids a priori d'inlier : 1 pour une curiosité visible depuis origin,
+    hidden_weight sinon (le MNT peut se tromper : un poids nul exclurait
+    définitivement l'observation des échantillons RANSAC).
+    """
+    if not 0.0 <= hidden_weight <= 1.0:
+        raise ValueError(f"hidden_weight doit être dans [0, 1] (reçu {hidden_weight!r})")
+    return [1.0 if ok else hidden_weight for ok in index.visible(origin, observations)]
+
+
+def estimate_with_visibility(observations: List[Dict], index: VisibilityIndex, method: str = 'ransac',
+                             hidden_weight: float = 0.2, origin_hint: Optional[Tuple[float, float]] = None
+                             ) -> EstimationResult:
+    """
+    Estimation en deux passes : position provisoire (ou origin_hint), puis
+    RANSAC pondéré par la visibilité des curiosités depuis cette position.
+
+    Returns:
+        EstimationResult de la seconde passe ; timings contient 'first',
+        'visibility', 'second' et 'total'.
+    """
+    t0 = time.perf_counter()
+    if origin_hint is None:
+        origin_hint = estimate_origin_and_phi(observations, method=method).origin
+    t1 = time.perf_counter()
+    weights = prior_weights(observations, origin_hint, index, hidden_weight)
+    t2 = time.perf_counter()
+    result = estimate_origin_and_phi(observations, method=method, prior_weights=weights)
+    t3 = time.perf_counter()
+    result.timings.update({'first': t1 - t0, 'visibility': t2 - t1, 'second': t3 - t2, 'total': t3 - t0})
+    return result
+
+
+def _write_geotiff(path: str, rows: List[List[int]], x_min: float, y_max: float,
+                   cell_size: float, tile: int = 64) -> None:
+    """GeoTIFF int16 tuilé non compressé (démonstration et tests)."""
+    height, width = len(rows), len(rows[0])
+    across, down = -(-width // tile), -(-height // tile)
+    tile_bytes = tile * tile * 2
+    data_start = 8
+    offsets = [data_start + k * tile_bytes for k in range(across * down)]
+    payload = bytearray()
+    for ty in range(down):
+        for tx in range(across):
+            for r in range(ty * tile, ty * tile + tile):
+                line = rows[r][tx * tile:tx * tile + tile] if r < height else []
+                line = list(line) + [0] * (tile - len(line))
+                payload += struct.pack(f'<{tile}h', *line)
+    extra_start = data_start + len(payload)
+    entries, extra = [], bytearray()
+
+    def field(tag, kind, values):
+        fmt, size = _TIFF_FIELD_TYPES[kind]
+        packed = struct.pack(f'<{len(values)}{fmt}', *values)
+        if len(packed) <= 4:
+            entries.append(struct.pack('<HHI', tag, kind, len(values)) + packed.ljust(4, b'\0'))
+        else:
+            entries.append(struct.pack('<HHII', tag, kind, len(values), extra_start + len(extra)))
+            extra.extend(packed + b'\0' * (len(packed) % 2))
+
+    field(256, 4, [width])
+    field(257, 4, [height])
+    field(258, 3, [16])
+    field(259, 3, [1])
+    field(262, 3, [1])
+    field(277, 3, [1])
+    field(322, 3, [tile])
+    field(323, 3, [tile])
+    field(324, 4, offsets)
+    field(325, 4, [tile_bytes] * len(offsets))
+    field(339, 3, [2])
+    field(33550, 12, [cell_size, cell_size, 0.0])
+    field(33922, 12, [0.0, 0.0, 0.0, x_min, y_max, 0.0])
+    ifd_offset = extra_start + len(extra)
+    with open(path, 'wb') as f:
+        f.write(b'II' + struct.pack('<HI', 42, ifd_offset))
+        f.write(payload)
+        f.write(extra)
+        f.write(struct.pack('<H', len(entries)) + b''.join(entries) + struct.pack('<I', 0))
+
+
+def _demo():
+    import os
+    import random
+    import tempfile
+
+    print("=" * 60)
+    print("Visibilité des curiosités sur modèle numérique de terrain")
+    print("=" * 60 + "\n")
+
+    # Terrain 40 km × 40 km à 25 m : plaine à 300 m et crête nord-sud à x = 1,5 km
+    cell, size = 25.0, 1600
+    rows = [[int(300 + 900 * math.exp(-((col * cell - 21500.0) / 400.0) ** 2)) for col in range(size)]
+            for _ in range(size)]
+    x_min, y_max = -20000.0, 20000.0
+    directory = tempfile.mkdtemp()
+    tif = os.path.join(directory, 'mnt.tif')
+    _write_geotiff(tif, rows, x_min, y_max, cell)
+    print(f"🗻 MNT {size}×{size} écrit en GeoTIFF tuilé ({directory})")
+
+    rng = random.Random(3)
+    true_origin, true_phi = (0.0, 0.0), 35.0
+    # Majorité d'azimuts recopiés d'une ancienne table (de l'autre côté de la
+    # crête) : cohérents entre eux, mais visés depuis un autre point
+    copied_origin = (3500.0, 1000.0)
+    observations = []
+    for k in range(14):
+        hidden = k >= 6
+        x = rng.uniform(2500.0, 6000.0) if hidden else rng.uniform(-5000.0, 1000.0)
+        y = rng.uniform(-5000.0, 5000.0)
+        viewpoint = copied_origin if hidden else true_origin
+        theta = math.degrees(math.atan2(y - viewpoint[1], x - viewpoint[0]))
+        observations.append({'x': x, 'y': y, 'z': rng.uniform(450.0, 900.0),
+                             'azimuth_deg': (theta - true_phi + rng.gauss(0.0, 0.05)) % 360.0,
+                             'name': f"Curiosité {k}"})
+
+    with ElevationModel.from_geotiff(tif) as dem:
+        index = VisibilityIndex(dem, cell_size=100.0)
+        start = time.perf_counter()
+        flags = index.visible(true_origin, observations)
+        first = time.perf_counter() - start
+        start = time.perf_counter()
+        index.visible((true_origin[0] + 20.0, true_origin[1] + 30.0), observations)
+        cached = time.perf_counter() - start
+        print(f"👁️  Visibles : {sum(flags)}/{len(flags)} (cachées : "
+              f"{', '.join(o['name'] for o, ok in zip(observations, flags) if not ok)})")
+        print(f"⏱️  Rayons {first * 1000:.1f} ms, même cellule {cached * 1000:.2f} ms "
+              f"({index.hits} lectures du cache)")
+
+        random.seed(1)
+        plain = estimate_origin_and_phi(observations, method='ransac')
+        random.seed(1)
+        # Position approximative de la table connue (plan du site) : la
+        # visibilité est calculée depuis ce point plutôt que depuis la première passe
+        weighted = estimate_with_visibility(observations, index, origin_hint=(150.0, -100.0))
+        for label, result in (("RANSAC seul", plain), ("RANSAC + visibilité", weighted)):
+            error = math.hypot(result.origin[0] - true_origin[0], result.origin[1] - true_origin[1])
+            print(f"📍 {label:20s} : origine à {error:7.1f} m, φ = {result.phi % 180.0:6.2f}° (mod 180), "
+                  f"inliers {len(result.inliers)}/{len(observations)}")
+
+
+if __name__ == "__main__":
+    _demo()
@@ -10,20 +10,340 @@ Génère une carte interactive HTML montrant :
 
 import folium
 from folium import plugins
+import html
+import json
+import logging
 import math
-from typing import List, Dict, Tuple, Optional
-from table import estimate_origin_and_phi, line_dir_from_angle_deg, normalize_deg
+from string import Template
+from typing import List, Dict, Iterable, Iterator, Tuple, Optional
+from table import EstimationResult, estimate_origin_and_phi, line_dir_from_angle_deg, normalize_deg
+from result_cache import ResultCache, get_default_cache
+import instrumentation
+from projection import site_plane
+import tile_cache
 
+logger = logging.getLogger(__name__)
 
-def meters_to_degrees(meters: float, latitude: float = 45.0) -> float:
-    """Convertit des mètres en degrés (approximation pour petites distances)."""
-    return meters / (111000.0 * math.cos(math.radians(latitude)))
+def observation_geometries(observations: List[Dict], origin: Tuple[float, float], phi: float,
+                           projection, distance_km: float = 5.0) -> List[Dict]:
+    """
+    Distance à la table, azimuts corrigés et extrémités (lat, lon) des lignes de chaque curiosité.
+    
+    Les observations et l'origine sont en mètres dans le plan de projection ;
+    les extrémités des lignes sont calculées dans ce plan puis converties en
+    un seul lot.
+    """
+    reach = distance_km * 1000.0
+    geometries, xs, ys = [], [], []
+    for obs in observations:
+        # Ligne de visée : point loin dans la direction corrigée
+        azimuth_corrected = normalize_deg(obs['azimuth_deg'] + phi)
+        direction = line_dir_from_angle_deg(azimuth_corrected)
+        xs.append(origin[0] + direction[0] * reach)
+        ys.append(origin[1] + direction[1] * reach)
+        
+        # Rétro-azimut : point loin dans la direction opposée
+        back_bearing = normalize_deg(obs['azimuth_deg'] + phi + 180.0)
+        back_direction = line_dir_from_angle_deg(back_bearing)
+        xs.append(obs['x'] + back_direction[0] * reach)
+        ys.append(obs['y'] + back_direction[1] * reach)
+        
+        geometries.append({
+            'dist': math.hypot(obs['x'] - origin[0], obs['y'] - origin[1]),
+            'azimuth_corrected': azimuth_corrected,
+            'back_bearing': back_bearing,
+        })
+    
+    lats, lons = projection.inverse(xs, ys)
+    for i, geo in enumerate(geometries):
+        geo['sight_end'] = (lats[2 * i], lons[2 * i])
+        geo['back_end'] = (lats[2 * i + 1], lons[2 * i + 1])
+    return geometries
 
 
-def project_point(origin: Tuple[float, float], direction: Tuple[float, float], distance: float) -> Tuple[float, float]:
-    """Projette un point depuis l'origine dans une direction donnée."""
-    dx, dy = direction
-    return (origin[0] + dx * distance, origin[1] + dy * distance)
+# Au-delà de ce nombre d'observations, le mode 'auto' passe au rendu GeoJSON
+MARKERS_LIMIT = 50
+
+# Style partagé des marqueurs numérotés du rendu GeoJSON
+_CLUSTER_CSS = """
+<style>
+.curiosite-icon { font-size: 14px; font-weight: bold; color: white; border-radius: 50%;
+                  width: 30px; height: 30px; display: flex; align-items: center;
+                  justify-content: center; border: 3px solid white;
+                  box-shadow: 0 0 5px rgba(0,0,0,0.5); box-sizing: border-box; }
+</style>
+"""
+
+# Construit dans le navigateur le marqueur et le popup d'une ligne de données :
+# [lat, lon, numéro, nom, azimut gravé, azimut corrigé, distance, inlier, couleur]
+_CLUSTER_CALLBACK = """
+function (row) {
+    var template = '<div style="font-family: Arial, sans-serif; min-width: 250px;">' +
+        '<h4 style="margin: 0 0 10px 0; color: {title_color};">🏔️ {name}</h4>' +
+        '<table style="width: 100%; font-size: 12px;">' +
+        '<tr><td><b>Point #:</b></td><td>{num}</td></tr>' +
+        '<tr><td><b>Latitude:</b></td><td>{lat}°</td></tr>' +
+        '<tr><td><b>Longitude:</b></td><td>{lon}°</td></tr>' +
+        '<tr><td><b>Azimut gravé:</b></td><td>{azimuth}°</td></tr>' +
+        '<tr><td><b>Azimut corrigé:</b></td><td>{corrected}°</td></tr>' +
+        '<tr><td><b>Distance table:</b></td><td>{dist} m</td></tr>' +
+        '<tr><td><b>Statut:</b></td><td style="color: {status_color};">{status}</td></tr>' +
+        '</table></div>';
+    var inlier = row[7] === 1;
+    var icon = L.divIcon({
+        html: '<div class="curiosite-icon" style="background-color: ' + row[8] + ';">' + row[2] + '</div>',
+        className: '', iconSize: [30, 30]
+    });
+    var marker = L.marker(new L.LatLng(row[0], row[1]), {icon: icon});
+    marker.bindTooltip('#' + row[2] + ' ' + row[3] + (inlier ? ' ✓' : ' ✗'));
+    marker.bindPopup(function () {
+        return L.Util.template(template, {
+            title_color: inlier ? '#cc0000' : '#666', name: row[3], num: row[2],
+            lat: row[0].toFixed(6), lon: row[1].toFixed(6), azimuth: row[4].toFixed(1),
+            corrected: row[5].toFixed(1), dist: row[6],
+            status_color: inlier ? 'green' : 'red',
+            status: inlier ? '✓ Inlier (valide)' : '✗ Outlier (éliminé)'
+        });
+    }, {maxWidth: 300});
+    return marker;
+}
+"""
+
+
+def _line_feature(points: List[Tuple[float, float]], properties: Dict) -> Dict:
+    """Feature GeoJSON LineString à partir de points (lat, lon)."""
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'LineString',
+                     'coordinates': [[round(lon, 7), round(lat, 7)] for lat, lon in points]},
+        'properties': properties,
+    }
+
+
+# Curiosités par élément <script> du rendu GeoJSON diffusé
+STREAM_CHUNK_ROWS = 500
+
+# Fonctions partagées par les paquets de données diffusés
+_STREAM_SETUP = Template("""
+<script>
+var curiosite_marker = $callback;
+function curiosite_lines(features, group, label, style) {
+    L.geoJSON({type: 'FeatureCollection', features: features}, {
+        style: function () { return style; },
+        onEachFeature: function (feature, layer) {
+            layer.bindTooltip('<b>' + label + '</b> ' + feature.properties.name +
+                              '<br><b>Azimut (°)</b> ' + feature.properties.azimuth);
+        }
+    }).addTo(group);
+}
+</script>
+""")
+
+# Couches de lignes : clé → (nom de couche, libellé d'infobulle, style)
+_LINE_LAYERS = {
+    'sight': ('Lignes de visée', 'Visée →', {'color': 'green', 'weight': 2.5, 'opacity': 0.7}),
+    'outlier': ('Outliers', '✗ Outlier :', {'color': 'gray', 'weight': 1, 'opacity': 0.3, 'dashArray': '5, 5'}),
+    'back': ('Rétro-azimuts', 'Rétro ←', {'color': 'orange', 'weight': 2, 'opacity': 0.6, 'dashArray': '10, 5'}),
+}
+
+
+def _add_geojson_layers(m: folium.Map, obs_latlon: List[Dict], inliers_mask: List[bool],
+                        geometries: List[Dict], origin_lat: float, origin_lon: float,
+                        colors: List[str]) -> Iterator[str]:
+    """
+    Rendu compact des curiosités et de leurs lignes, diffusé par paquets.
+    
+    Les couches sont ajoutées vides à la carte : un groupe FastMarkerCluster
+    pour les curiosités (marqueur et popup construits dans le navigateur à
+    partir de lignes de données) et un FeatureGroup par couche de lignes
+    (visées, outliers, rétro-azimuts). Leurs données sont produites par le
+    générateur retourné, en éléments <script> de STREAM_CHUNK_ROWS
+    curiosités, que save_streamed écrit après le script de la carte : ni le
+    document rendu par folium ni aucune chaîne en mémoire ne grandit avec
+    le nombre de curiosités.
+    """
+    m.get_root().header.add_child(folium.Element(_CLUSTER_CSS))
+    cluster = plugins.FastMarkerCluster([], name='Curiosités').add_to(m)
+    n_inliers = sum(inliers_mask)
+    counts = {'sight': n_inliers, 'outlier': len(obs_latlon) - n_inliers, 'back': n_inliers}
+    groups = {key: folium.FeatureGroup(name=_LINE_LAYERS[key][0]).add_to(m).get_name()
+              for key in _LINE_LAYERS if counts[key]}
+    return _iter_geojson_scripts(cluster.get_name(), groups, obs_latlon, inliers_mask, geometries,
+                                 origin_lat, origin_lon, colors)
+
+
+def _iter_geojson_scripts(cluster_name: str, groups: Dict[str, str], obs_latlon: List[Dict],
+                          inliers_mask: List[bool], geometries: List[Dict], origin_lat: float,
+                          origin_lon: float, colors: List[str]) -> Iterator[str]:
+    """Éléments <script> remplissant les couches de _add_geojson_layers, paquet par paquet."""
+    yield _STREAM_SETUP.substitute(callback=_CLUSTER_CALLBACK.strip())
+    for start in range(0, len(obs_latlon), STREAM_CHUNK_ROWS):
+        rows = []
+        lines: Dict[str, List[Dict]] = {key: [] for key in _LINE_LAYERS}
+        for i in range(start, min(start + STREAM_CHUNK_ROWS, len(obs_latlon))):
+            obs, geo = obs_latlon[i], geometries[i]
+            is_inlier = inliers_mask[i]
+            name = html.escape(str(obs['name']))
+            rows.append([round(obs['lat'], 7), round(obs['lon'], 7), i + 1, name,
+                         round(obs['azimuth_deg'], 1), round(geo['azimuth_corrected'], 1),
+                         round(geo['dist']), 1 if is_inlier else 0,
+                         colors[i % len(colors)] if is_inlier else '#999'])
+            sight = _line_feature([(origin_lat, origin_lon), geo['sight_end']],
+                                  {'name': name, 'azimuth': round(geo['azimuth_corrected'], 1)})
+            lines['sight' if is_inlier else 'outlier'].append(sight)
+            if is_inlier:
+                lines['back'].append(_line_feature([(obs['lat'], obs['lon']), geo['back_end']],
+                                                   {'name': name, 'azimuth': round(geo['back_bearing'], 1)}))
+        parts = [f"{cluster_name}.addLayers({json.dumps(rows)}.map(curiosite_marker));"]
+        for key, features in lines.items():
+            if features:
+                _, label, style = _LINE_LAYERS[key]
+                parts.append(f"curiosite_lines({json.dumps(features)}, {groups[key]}, "
+                             f"{json.dumps(label)}, {json.dumps(style)});")
+        yield "<script>\n" + "\n".join(parts) + "\n</script>\n"
+
+
+# Gabarits précompilés des popups et du panneau de données : une substitution
+# par ligne, sans concaténation répétée
+_TABLE_POPUP = Template("""
+    <div style="font-family: Arial, sans-serif; min-width: 250px;">
+        <h4 style="margin: 0 0 10px 0; color: #0066cc;">📍 Table d'Orientation</h4>
+        <table style="width: 100%; font-size: 12px;">
+            <tr><td><b>Latitude:</b></td><td>$lat°</td></tr>
+            <tr><td><b>Longitude:</b></td><td>$lon°</td></tr>
+            <tr><td><b>Orientation φ:</b></td><td>$phi°</td></tr>
+            <tr><td><b>Résiduel:</b></td><td>$residual m</td></tr>
+            <tr><td><b>Points valides:</b></td><td>$n_inliers/$n_obs</td></tr>
+            $outliers_row
+        </table>
+        <p style="font-size: 10px; margin-top: 10px; color: #666;">
+            <i>✓ Position estimée par RANSAC</i>
+        </p>
+    </div>
+    """)
+
+_TABLE_OUTLIERS_ROW = Template(
+    '<tr><td><b>Outliers éliminés:</b></td><td style="color: red;">$n_outliers</td></tr>')
+
+_CURIOSITY_POPUP = Template("""
+        <div style="font-family: Arial, sans-serif; min-width: 250px;">
+            <h4 style="margin: 0 0 10px 0; color: $title_color;">🏔️ $name</h4>
+            <table style="width: 100%; font-size: 12px;">
+                <tr><td><b>Point #:</b></td><td>$num</td></tr>
+                <tr><td><b>Latitude:</b></td><td>$lat°</td></tr>
+                <tr><td><b>Longitude:</b></td><td>$lon°</td></tr>
+                <tr><td><b>Azimut gravé:</b></td><td>$azimuth°</td></tr>
+                <tr><td><b>Azimut corrigé:</b></td><td>$corrected°</td></tr>
+                <tr><td><b>Distance table:</b></td><td>$dist m</td></tr>
+                <tr><td><b>Statut:</b></td><td style="color: $status_color;">
+                    $status
+                </td></tr>
+            </table>
+        </div>
+        """)
+
+_CURIOSITY_ICON = Template("""
+        <div style="font-size: 14px; font-weight: bold;
+                    color: white; background-color: $color;
+                    border-radius: 50%; width: 30px; height: 30px;
+                    display: flex; align-items: center; justify-content: center;
+                    border: 3px solid white; box-shadow: 0 0 5px rgba(0,0,0,0.5);">
+            $num
+        </div>
+        """)
+
+_PANEL_HEAD = """
+    <div style="position: fixed; top: 70px; right: 10px; width: 350px;
+                background-color: white; border: 2px solid #0066cc; z-index: 9999;
+                font-size: 12px; padding: 15px; border-radius: 8px;
+                box-shadow: 0 4px 6px rgba(0,0,0,0.1); max-height: 80vh; overflow-y: auto;">
+        <h4 style="margin: 0 0 10px 0; color: #0066cc;">📊 Données de Triangulation</h4>
+        <table style="width: 100%; border-collapse: collapse; font-size: 11px;">
+            <thead>
+                <tr style="background-color: #f0f0f0; border-bottom: 2px solid #0066cc;">
+                    <th style="padding: 5px; text-align: center;">#</th>
+                    <th style="padding: 5px;">Nom</th>
+                    <th style="padding: 5px; text-align: right;">Azimut</th>
+                    <th style="padding: 5px; text-align: center;">Statut</th>
+                </tr>
+            </thead>
+            <tbody>
+    """
+
+_PANEL_ROW = Template("""
+                <tr style="background-color: $row_color; border-bottom: 1px solid #ddd;">
+                    <td style="padding: 5px; text-align: center; font-weight: bold;">$num</td>
+                    <td style="padding: 5px;">$name</td>
+                    <td style="padding: 5px; text-align: right;">$azimuth°</td>
+                    <td style="padding: 5px; text-align: center; color: $status_color; font-weight: bold;">$status</td>
+                </tr>
+        """)
+
+_PANEL_FOOT = Template("""
+            </tbody>
+        </table>
+        <div style="margin-top: 10px; padding: 8px; background-color: #e6f2ff; border-radius: 4px;">
+            <p style="margin: 3px 0; font-size: 11px;"><b>Position Table:</b> ($x, $y)</p>
+            <p style="margin: 3px 0; font-size: 11px;"><b>Orientation φ:</b> $phi°</p>
+            <p style="margin: 3px 0; font-size: 11px;"><b>Résiduel:</b> $residual m</p>
+            <p style="margin: 3px 0; font-size: 11px; color: green;"><b>Inliers:</b> $n_inliers/$n_obs</p>
+            $outliers_row
+        </div>
+    </div>
+    """)
+
+_PANEL_OUTLIERS_ROW = Template(
+    '<p style="margin: 3px 0; font-size: 11px; color: red;"><b>Outliers éliminés:</b> $n_outliers</p>')
+
+# Emplacement du panneau dans le document rendu par folium
+_PANEL_PLACEHOLDER = "<!-- panneau-donnees -->"
+
+
+def iter_data_panel(obs_latlon: List[Dict], inliers_mask: List[bool], origin: Tuple[float, float],
+                    phi: float, residual: float) -> Iterator[str]:
+    """Produit le HTML du panneau de données morceau par morceau (une ligne de tableau à la fois)."""
+    yield _PANEL_HEAD
+    n_inliers = 0
+    for i, obs in enumerate(obs_latlon):
+        is_inlier = inliers_mask[i]
+        n_inliers += is_inlier
+        yield _PANEL_ROW.substitute(
+            row_color='#fff' if is_inlier else '#f9f9f9',
+            num=i + 1,
+            name=html.escape(str(obs['name'])),
+            azimuth=f"{obs['azimuth_deg']:.1f}",
+            status_color='green' if is_inlier else 'red',
+            status='✓' if is_inlier else '✗',
+        )
+    n_outliers = len(obs_latlon) - n_inliers
+    yield _PANEL_FOOT.substitute(
+        x=f"{origin[0]:.1f}", y=f"{origin[1]:.1f}", phi=f"{phi:.2f}", residual=f"{residual:.3f}",
+        n_inliers=n_inliers, n_obs=len(obs_latlon),
+        outliers_row=_PANEL_OUTLIERS_ROW.substitute(n_outliers=n_outliers) if n_outliers > 0 else '',
+    )
+
+
+def save_streamed(m: folium.Map, output_file: str, placeholder: str, chunks: Iterable[str],
+                  script_chunks: Iterable[str] = ()) -> None:
+    """
+    Écrit la carte en insérant les morceaux `chunks` à la place de `placeholder`.
+
+    Les éléments <script> de script_chunks sont écrits à la fin du document,
+    après le script de la carte : ils peuvent remplir les couches Leaflet
+    créées vides par folium (voir _add_geojson_layers). Les deux flux sont
+    écrits au fil de l'eau, sans être assemblés en mémoire ; seul le
+    squelette de la carte est rendu par folium en une chaîne. En mode
+    'markers', ce squelette contient les marqueurs et leurs popups : ce mode
+    est destiné aux petites cartes (MARKERS_LIMIT en mode 'auto').
+    """
+    head, tail = m.get_root().render().split(placeholder, 1)
+    body, end = tail.rsplit('</html>', 1)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(head)
+        f.writelines(chunks)
+        f.write(body)
+        f.writelines(script_chunks)
+        f.write('</html>' + end)
 
 
 def create_interactive_map(observations: List[Dict], 
@@ -34,77 +354,93 @@ def create_interactive_map(observations: List[Dict],
                           use_latlon: bool = False,
                           center_lat: float = 45.0,
                           center_lon: float = 6.0,
-                          output_file: str = "table_orientation_map.html") -> str:
+                          output_file: str = "table_orientation_map.html",
+                          cache: Optional[ResultCache] = None,
+                          render_mode: str = 'auto',
+                          tile_server_url: Optional[str] = None,
+                          result: Optional[EstimationResult] = None) -> str:
     """
     Génère une carte interactive OpenStreetMap.
     
     Args:
         observations: Liste de dict {'x', 'y', 'azimuth_deg', 'name' (opt)}
-        origin: Position de la table (x, y). Si None, calculée avec RANSAC
+        origin: Position de la table (x, y), ou (lon, lat) si use_latlon.
+            Si None, calculée avec RANSAC
         phi: Orientation de la table en degrés. Si None, calculée avec RANSAC
         residual: Résiduel moyen. Si None, calculé
         inliers_mask: Masque booléen des inliers. Si None, calculé
-        use_latlon: Si True, x/y sont lat/lon. Sinon, mètres projetés
-        center_lat: Latitude centre (conversion mètres→degrés)
-        center_lon: Longitude centre (conversion mètres→degrés)
+        use_latlon: Si True, x/y sont lon/lat (projetés en mètres sur le plan
+            tangent local avant l'estimation). Sinon, mètres autour du centre
+        center_lat: Latitude du centre du plan métrique (si not use_latlon)
+        center_lon: Longitude du centre du plan métrique (si not use_latlon)
         output_file: Nom du fichier HTML généré
+        cache: Cache des résultats d'estimation (par défaut, le cache du processus)
+        render_mode: 'markers' (un marqueur et des PolyLine par curiosité),
+            'geojson' (couches GeoJSON et regroupement côté client, pour les
+            grandes cartes) ou 'auto' (geojson au-delà de MARKERS_LIMIT points)
+        tile_server_url: URL d'un serveur de tuiles local (tile_cache.py) ; si
+            fourni, tous les fonds de carte et la mini-carte y sont chargés
+        result: EstimationResult fournissant origin, phi, residual et
+            inliers_mask non précisés (comme static_render.create_static_map) ;
+            son origine est en mètres dans le plan du site
     
     Returns:
         Chemin du fichier HTML créé
     """
     
+    # Plan métrique du site : les estimateurs travaillent toujours en mètres
+    source_observations = observations
+    projection, observations, origin = site_plane(observations, origin, use_latlon, center_lat, center_lon)
+    
+    # Un résultat déjà calculé complète les valeurs non fournies
+    if result is not None:
+        origin = origin if origin is not None else result.origin
+        phi = phi if phi is not None else result.phi
+        residual = residual if residual is not None else result.residual
+        inliers_mask = inliers_mask if inliers_mask is not None else list(result.inlier_mask)
+    
     # Calculer l'origine et phi si non fournis
     if origin is None or phi is None:
-        print("🔍 Calcul de la position de la table avec RANSAC...")
-        origin_calc, phi_calc, resid, inlier_indices = estimate_origin_and_phi(observations, method='ransac', return_inliers=True)
+        logger.info("🔍 Calcul de la position de la table avec RANSAC...")
+        result = estimate_origin_and_phi(
+            observations, method='ransac',
+            cache=cache if cache is not None else get_default_cache()
+        )
         if origin is None:
-            origin = origin_calc
+            origin = result.origin
         if phi is None:
-            phi = phi_calc
+            phi = result.phi
         if residual is None:
-            residual = resid
+            residual = result.residual
         if inliers_mask is None:
-            # Créer un masque booléen
-            inliers_mask = [i in inlier_indices for i in range(len(observations))]
-        print(f"✅ Origine: ({origin[0]:.2f}, {origin[1]:.2f})")
-        print(f"✅ Orientation φ: {phi:.4f}°")
-        print(f"✅ Résiduel: {resid:.3f} m\n")
+            inliers_mask = list(result.inlier_mask)
+        logger.info("✅ Origine: (%.2f, %.2f)", origin[0], origin[1])
+        logger.info("✅ Orientation φ: %.4f°", phi)
+        logger.info("✅ Résiduel: %.3f m", result.residual)
     
     # Si pas de masque fourni, tous sont des inliers
     if inliers_mask is None:
         inliers_mask = [True] * len(observations)
     
-    # Conversion des coordonnées si nécessaire
-    if not use_latlon:
-        # Convertir TOUTES les coordonnées métriques en lat/lon relatives
-        # On suppose que center_lat, center_lon est le centre approximatif
-        obs_latlon = []
-        for i, obs in enumerate(observations):
-            lat = center_lat + meters_to_degrees(obs['y'], center_lat)
-            lon = center_lon + meters_to_degrees(obs['x'], center_lat)
-            obs_latlon.append({
-                'lat': lat,
-                'lon': lon,
-                'azimuth_deg': obs['azimuth_deg'],
-                'name': obs.get('name', f"Point {i+1}"),
-                'original_x': obs['x'],
-                'original_y': obs['y']
-            })
-        
-        origin_lat = center_lat + meters_to_degrees(origin[1], center_lat)
-        origin_lon = center_lon + meters_to_degrees(origin[0], center_lat)
+    # Coordonnées géographiques des curiosités et de la table (un seul lot)
+    if use_latlon:
+        lats = [o['y'] for o in source_observations]
+        lons = [o['x'] for o in source_observations]
     else:
-        # Coordonnées déjà en lat/lon
-        obs_latlon = []
-        for i, obs in enumerate(observations):
-            obs_latlon.append({
-                'lat': obs['y'],
-                'lon': obs['x'],
-                'azimuth_deg': obs['azimuth_deg'],
-                'name': obs.get('name', f"Point {i+1}")
-            })
-        origin_lat = origin[1]
-        origin_lon = origin[0]
+        lats, lons = projection.inverse([o['x'] for o in observations], [o['y'] for o in observations])
+    obs_latlon = [
+        {
+            'lat': lat,
+            'lon': lon,
+            'azimuth_deg': obs['azimuth_deg'],
+            'name': obs.get('name', f"Point {i+1}"),
+            'original_x': obs['x'],
+            'original_y': obs['y']
+        }
+        for i, (obs, lat, lon) in enumerate(zip(observations, lats, lons))
+    ]
+    origin_lats, origin_lons = projection.inverse([origin[0]], [origin[1]])
+    origin_lat, origin_lon = origin_lats[0], origin_lons[0]
     
     # Calculer le centre de la carte et les limites
     all_lats = [obs['lat'] for obs in obs_latlon] + [origin_lat]
@@ -113,11 +449,11 @@ def create_interactive_map(observations: List[Dict],
     map_center_lon = sum(all_lons) / len(all_lons)
     
     # Créer la carte
-    print("🗺️  Création de la carte interactive...")
+    logger.info("🗺️  Création de la carte interactive...")
     m = folium.Map(
         location=[map_center_lat, map_center_lon],
         zoom_start=14,
-        tiles='OpenStreetMap',
+        tiles='OpenStreetMap' if tile_server_url is None else None,
         control_scale=True
     )
     
@@ -125,39 +461,39 @@ def create_interactive_map(observations: List[Dict],
     bounds = [[min(all_lats), min(all_lons)], [max(all_lats), max(all_lons)]]
     m.fit_bounds(bounds, padding=(50, 50))
     
-    # Ajouter des tuiles alternatives
-    folium.TileLayer(
-        tiles='https://tiles.stadiamaps.com/tiles/stamen_terrain/{z}/{x}/{y}.png',
-        attr='Map tiles by Stamen Design, under CC BY 3.0. Data by OpenStreetMap, under ODbL.',
-        name='Terrain'
-    ).add_to(m)
-    
-    folium.TileLayer(
-        tiles='CartoDB positron',
-        name='CartoDB Light'
-    ).add_to(m)
+    if tile_server_url is None:
+        # Ajouter des tuiles alternatives
+        folium.TileLayer(
+            tiles='https://tiles.stadiamaps.com/tiles/stamen_terrain/{z}/{x}/{y}.png',
+            attr='Map tiles by Stamen Design, under CC BY 3.0. Data by OpenStreetMap, under ODbL.',
+            name='Terrain'
+        ).add_to(m)
+        
+        folium.TileLayer(
+            tiles='CartoDB positron',
+            name='CartoDB Light'
+        ).add_to(m)
+    else:
+        # Fonds de carte servis par le cache local, le premier affiché par défaut
+        for i, source in enumerate(tile_cache.SOURCES):
+            _, attribution, layer_name = tile_cache.SOURCES[source]
+            folium.TileLayer(
+                tiles=tile_cache.local_tile_url(tile_server_url, source),
+                attr=attribution,
+                name=layer_name,
+                show=(i == 0)
+            ).add_to(m)
     
     # Compter les inliers et outliers
     n_inliers = sum(inliers_mask)
     n_outliers = len(observations) - n_inliers
     
     # Ajouter la table d'orientation (marqueur bleu)
-    table_popup_html = f"""
-    <div style="font-family: Arial, sans-serif; min-width: 250px;">
-        <h4 style="margin: 0 0 10px 0; color: #0066cc;">📍 Table d'Orientation</h4>
-        <table style="width: 100%; font-size: 12px;">
-            <tr><td><b>Latitude:</b></td><td>{origin_lat:.6f}°</td></tr>
-            <tr><td><b>Longitude:</b></td><td>{origin_lon:.6f}°</td></tr>
-            <tr><td><b>Orientation φ:</b></td><td>{phi:.2f}°</td></tr>
-            <tr><td><b>Résiduel:</b></td><td>{residual:.3f} m</td></tr>
-            <tr><td><b>Points valides:</b></td><td>{n_inliers}/{len(observations)}</td></tr>
-            {f'<tr><td><b>Outliers éliminés:</b></td><td style="color: red;">{n_outliers}</td></tr>' if n_outliers > 0 else ''}
-        </table>
-        <p style="font-size: 10px; margin-top: 10px; color: #666;">
-            <i>✓ Position estimée par RANSAC</i>
-        </p>
-    </div>
-    """
+    table_popup_html = _TABLE_POPUP.substitute(
+        lat=f"{origin_lat:.6f}", lon=f"{origin_lon:.6f}", phi=f"{phi:.2f}", residual=f"{residual:.3f}",
+        n_inliers=n_inliers, n_obs=len(observations),
+        outliers_row=_TABLE_OUTLIERS_ROW.substitute(n_outliers=n_outliers) if n_outliers > 0 else '',
+    )
     folium.Marker(
         location=[origin_lat, origin_lon],
         popup=folium.Popup(table_popup_html, max_width=300),
@@ -178,160 +514,92 @@ def create_interactive_map(observations: List[Dict],
     # Palette de couleurs pour les curiosités
     colors = ['red', 'darkred', 'orange', 'purple', 'darkpurple', 'pink', 'cadetblue', 'darkgreen']
     
+    # Géométrie des lignes de chaque curiosité (commune aux deux rendus)
+    geometries = observation_geometries(observations, origin, phi, projection)
+    
+    if render_mode == 'auto':
+        render_mode = 'markers' if len(observations) <= MARKERS_LIMIT else 'geojson'
+    layer_scripts: Iterable[str] = ()
+    if render_mode == 'geojson':
+        layer_scripts = _add_geojson_layers(m, obs_latlon, inliers_mask, geometries, origin_lat, origin_lon, colors)
+    elif render_mode != 'markers':
+        raise ValueError(f"Mode de rendu inconnu : {render_mode!r} ('markers', 'geojson' ou 'auto')")
+    
     # Pour chaque observation
-    for i, obs in enumerate(obs_latlon):
+    for i, obs in enumerate(obs_latlon if render_mode == 'markers' else []):
         is_inlier = inliers_mask[i] if inliers_mask else True
         color = colors[i % len(colors)] if is_inlier else 'gray'
-        
-        # Distance calculée de la table à la curiosité
-        if not use_latlon and 'original_x' in obs and 'original_y' in obs:
-            dist = math.sqrt((obs['original_x'] - origin[0])**2 + (obs['original_y'] - origin[1])**2)
-        else:
-            # Approximation Haversine simplifiée
-            dist = math.sqrt((obs['lon'] - origin_lon)**2 + (obs['lat'] - origin_lat)**2) * 111000
+        geo = geometries[i]
+        dist = geo['dist']
+        # Nom fourni par l'utilisateur : échappé pour tous les popups et infobulles
+        name = html.escape(str(obs['name']))
         
         # Marqueur de la curiosité
-        curiosity_popup_html = f"""
-        <div style="font-family: Arial, sans-serif; min-width: 250px;">
-            <h4 style="margin: 0 0 10px 0; color: {'#666' if not is_inlier else '#cc0000'};">🏔️ {obs['name']}</h4>
-            <table style="width: 100%; font-size: 12px;">
-                <tr><td><b>Point #:</b></td><td>{i+1}</td></tr>
-                <tr><td><b>Latitude:</b></td><td>{obs['lat']:.6f}°</td></tr>
-                <tr><td><b>Longitude:</b></td><td>{obs['lon']:.6f}°</td></tr>
-                <tr><td><b>Azimut gravé:</b></td><td>{obs['azimuth_deg']:.1f}°</td></tr>
-                <tr><td><b>Azimut corrigé:</b></td><td>{normalize_deg(obs['azimuth_deg'] + phi):.1f}°</td></tr>
-                <tr><td><b>Distance table:</b></td><td>{dist:.0f} m</td></tr>
-                <tr><td><b>Statut:</b></td><td style="color: {'green' if is_inlier else 'red'};">
-                    {'✓ Inlier (valide)' if is_inlier else '✗ Outlier (éliminé)'}
-                </td></tr>
-            </table>
-        </div>
-        """
+        curiosity_popup_html = _CURIOSITY_POPUP.substitute(
+            title_color='#cc0000' if is_inlier else '#666',
+            name=name,
+            num=i + 1,
+            lat=f"{obs['lat']:.6f}", lon=f"{obs['lon']:.6f}",
+            azimuth=f"{obs['azimuth_deg']:.1f}", corrected=f"{geo['azimuth_corrected']:.1f}",
+            dist=f"{dist:.0f}",
+            status_color='green' if is_inlier else 'red',
+            status='✓ Inlier (valide)' if is_inlier else '✗ Outlier (éliminé)',
+        )
         
         # Créer un marqueur numéroté personnalisé
-        icon_html = f"""
-        <div style="font-size: 14px; font-weight: bold; 
-                    color: white; background-color: {color if is_inlier else '#999'}; 
-                    border-radius: 50%; width: 30px; height: 30px; 
-                    display: flex; align-items: center; justify-content: center;
-                    border: 3px solid white; box-shadow: 0 0 5px rgba(0,0,0,0.5);">
-            {i+1}
-        </div>
-        """
+        icon_html = _CURIOSITY_ICON.substitute(color=color if is_inlier else '#999', num=i + 1)
         
         folium.Marker(
             location=[obs['lat'], obs['lon']],
             popup=folium.Popup(curiosity_popup_html, max_width=300),
-            tooltip=f"#{i+1} {obs['name']} {'✓' if is_inlier else '✗'}",
+            tooltip=f"#{i+1} {name} {'✓' if is_inlier else '✗'}",
             icon=folium.DivIcon(html=icon_html)
         ).add_to(m)
         
         # Ligne de visée depuis la table vers la curiosité (vert)
-        azimuth_corrected = normalize_deg(obs['azimuth_deg'] + phi)
-        direction = line_dir_from_angle_deg(azimuth_corrected)
-        
-        # Calculer un point loin dans cette direction
-        distance_km = 5.0  # 5 km de ligne
-        end_point = project_point(
-            (origin_lon, origin_lat),
-            (meters_to_degrees(direction[0] * distance_km * 1000, origin_lat),
-             meters_to_degrees(direction[1] * distance_km * 1000, origin_lat)),
-            1.0
-        )
+        azimuth_corrected = geo['azimuth_corrected']
+        end_lat, end_lon = geo['sight_end']
         
         # Ne dessiner les lignes que pour les inliers
         if is_inlier:
             folium.PolyLine(
-                locations=[[origin_lat, origin_lon], [end_point[1], end_point[0]]],
+                locations=[[origin_lat, origin_lon], [end_lat, end_lon]],
                 color='green',
                 weight=2.5,
                 opacity=0.7,
-                popup=f"Ligne de visée vers {obs['name']} (azimut {azimuth_corrected:.1f}°)",
-                tooltip=f"Visée → {obs['name']}"
+                popup=f"Ligne de visée vers {name} (azimut {azimuth_corrected:.1f}°)",
+                tooltip=f"Visée → {name}"
             ).add_to(m)
         else:
             # Lignes en gris pour les outliers
             folium.PolyLine(
-                locations=[[origin_lat, origin_lon], [end_point[1], end_point[0]]],
+                locations=[[origin_lat, origin_lon], [end_lat, end_lon]],
                 color='gray',
                 weight=1,
                 opacity=0.3,
                 dash_array='5, 5',
-                popup=f"⚠️ Outlier: {obs['name']} (azimut {azimuth_corrected:.1f}°)",
-                tooltip=f"✗ Outlier: {obs['name']}"
+                popup=f"⚠️ Outlier: {name} (azimut {azimuth_corrected:.1f}°)",
+                tooltip=f"✗ Outlier: {name}"
             ).add_to(m)
         
         # Rétro-azimut depuis la curiosité vers la table (orange)
-        back_bearing = normalize_deg(obs['azimuth_deg'] + phi + 180.0)
-        back_direction = line_dir_from_angle_deg(back_bearing)
-        
-        # Point loin dans la direction opposée
-        back_end_point = project_point(
-            (obs['lon'], obs['lat']),
-            (meters_to_degrees(back_direction[0] * distance_km * 1000, obs['lat']),
-             meters_to_degrees(back_direction[1] * distance_km * 1000, obs['lat'])),
-            1.0
-        )
+        back_bearing = geo['back_bearing']
+        back_lat, back_lon = geo['back_end']
         
         # Rétro-azimuts seulement pour les inliers
         if is_inlier:
             folium.PolyLine(
-                locations=[[obs['lat'], obs['lon']], [back_end_point[1], back_end_point[0]]],
+                locations=[[obs['lat'], obs['lon']], [back_lat, back_lon]],
                 color='orange',
                 weight=2,
                 opacity=0.6,
                 dash_array='10, 5',
-                popup=f"Rétro-azimut depuis {obs['name']} (azimut {back_bearing:.1f}°)",
-                tooltip=f"Rétro ← {obs['name']}"
+                popup=f"Rétro-azimut depuis {name} (azimut {back_bearing:.1f}°)",
+                tooltip=f"Rétro ← {name}"
             ).add_to(m)
     
-    # Créer un tableau de données interactif
-    data_table_html = f"""
-    <div style="position: fixed; top: 70px; right: 10px; width: 350px; 
-                background-color: white; border: 2px solid #0066cc; z-index: 9999; 
-                font-size: 12px; padding: 15px; border-radius: 8px; 
-                box-shadow: 0 4px 6px rgba(0,0,0,0.1); max-height: 80vh; overflow-y: auto;">
-        <h4 style="margin: 0 0 10px 0; color: #0066cc;">📊 Données de Triangulation</h4>
-        <table style="width: 100%; border-collapse: collapse; font-size: 11px;">
-            <thead>
-                <tr style="background-color: #f0f0f0; border-bottom: 2px solid #0066cc;">
-                    <th style="padding: 5px; text-align: center;">#</th>
-                    <th style="padding: 5px;">Nom</th>
-                    <th style="padding: 5px; text-align: right;">Azimut</th>
-                    <th style="padding: 5px; text-align: center;">Statut</th>
-                </tr>
-            </thead>
-            <tbody>
-    """
-    
-    for i, obs in enumerate(obs_latlon):
-        is_inlier = inliers_mask[i] if inliers_mask else True
-        status_icon = '✓' if is_inlier else '✗'
-        status_color = 'green' if is_inlier else 'red'
-        row_color = '#fff' if is_inlier else '#f9f9f9'
-        
-        data_table_html += f"""
-                <tr style="background-color: {row_color}; border-bottom: 1px solid #ddd;">
-                    <td style="padding: 5px; text-align: center; font-weight: bold;">{i+1}</td>
-                    <td style="padding: 5px;">{obs['name']}</td>
-                    <td style="padding: 5px; text-align: right;">{obs['azimuth_deg']:.1f}°</td>
-                    <td style="padding: 5px; text-align: center; color: {status_color}; font-weight: bold;">{status_icon}</td>
-                </tr>
-        """
-    
-    data_table_html += f"""
-            </tbody>
-        </table>
-        <div style="margin-top: 10px; padding: 8px; background-color: #e6f2ff; border-radius: 4px;">
-            <p style="margin: 3px 0; font-size: 11px;"><b>Position Table:</b> ({origin[0]:.1f}, {origin[1]:.1f})</p>
-            <p style="margin: 3px 0; font-size: 11px;"><b>Orientation φ:</b> {phi:.2f}°</p>
-            <p style="margin: 3px 0; font-size: 11px;"><b>Résiduel:</b> {residual:.3f} m</p>
-            <p style="margin: 3px 0; font-size: 11px; color: green;"><b>Inliers:</b> {n_inliers}/{len(observations)}</p>
-            {f'<p style="margin: 3px 0; font-size: 11px; color: red;"><b>Outliers éliminés:</b> {n_outliers}</p>' if n_outliers > 0 else ''}
-        </div>
-    </div>
-    """
-    m.get_root().html.add_child(folium.Element(data_table_html))
+    # Tableau de données interactif : écrit ligne par ligne à la sauvegarde
+    m.get_root().html.add_child(folium.Element(_PANEL_PLACEHOLDER))
     
     # Ajouter une légende améliorée
     legend_html = f'''
@@ -378,7 +646,14 @@ def create_interactive_map(observations: List[Dict],
     ).add_to(m)
     
     # Ajouter un mini-map
-    minimap = plugins.MiniMap(toggle_display=True, position='bottomright')
+    if tile_server_url is None:
+        minimap = plugins.MiniMap(toggle_display=True, position='bottomright')
+    else:
+        minimap = plugins.MiniMap(
+            tile_layer=folium.TileLayer(tiles=tile_cache.local_tile_url(tile_server_url, 'osm'),
+                                        attr=tile_cache.SOURCES['osm'][1]),
+            toggle_display=True, position='bottomright'
+        )
     m.add_child(minimap)
     
     # Ajouter des coordonnées de souris
@@ -410,21 +685,16 @@ def create_interactive_map(observations: List[Dict],
     m.get_root().html.add_child(folium.Element(title_html))
     
     # Sauvegarder la carte
-    m.save(output_file)
-    print(f"✅ Carte sauvegardée dans : {output_file}")
-    print(f"📂 Ouvre ce fichier dans ton navigateur pour voir la carte interactive !")
-    print(f"\n{'='*60}")
-    print(f"📊 Résumé de la carte:")
-    print(f"   • {len(observations)} observations totales")
-    print(f"   • {n_inliers} points valides (inliers)")
-    print(f"   • {n_outliers} outliers éliminés")
-    print(f"   • Résiduel final: {residual:.3f} m")
-    print(f"{'='*60}\n")
+    save_streamed(m, output_file, _PANEL_PLACEHOLDER,
+                  iter_data_panel(obs_latlon, inliers_mask, origin, phi, residual), layer_scripts)
+    logger.info("✅ Carte sauvegardée dans : %s", output_file)
+    logger.info("📊 %d observations, %d inliers, %d outliers éliminés, résiduel final %.3f m",
+                len(observations), n_inliers, n_outliers, residual)
     
     return output_file
 
 
-if __name__ == "__main__":
+def _demo(render_mode: str = 'auto', tile_server_url: Optional[str] = None):
     # Exemple d'utilisation avec données fictives
     observations = [
         {'x': 2900.0, 'y': 200.0, 'azimuth_deg': 360.0, 'name': 'Mont Nord'},
@@ -439,14 +709,34 @@ if __name__ == "__main__":
     
     # Créer la carte (coordonnées en mètres, converties en lat/lon)
     # Centre approximatif : Grenoble, France
-    create_interactive_map(
+    output_file = create_interactive_map(
         observations,
         use_latlon=False,
         center_lat=45.1885,  # Grenoble
         center_lon=5.7245,
-        output_file="table_orientation_map.html"
+        output_file="table_orientation_map.html",
+        render_mode=render_mode,
+        tile_server_url=tile_server_url
     )
+    print(f"\n📂 Ouvre {output_file} dans ton navigateur pour voir la carte interactive !")
     
     print("="*60)
     print("Visualisation terminée !")
     print("="*60)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Visualisation interactive avec OpenStreetMap")
+    parser.add_argument('--profile', metavar='FICHIER', default=None,
+                        help="Profile l'exécution avec cProfile et enregistre le rapport (.prof)")
+    parser.add_argument('--render-mode', default='auto', choices=['auto', 'markers', 'geojson'],
+                        help="Rendu des curiosités (geojson pour les grandes cartes)")
+    parser.add_argument('--tile-server', metavar='URL', default=None,
+                        help="Serveur de tuiles local (python tile_cache.py serve), ex. http://127.0.0.1:8766")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if args.profile:
+        instrumentation.run_profiled(lambda: _demo(args.render_mode, args.tile_server), args.profile)
+    else:
+        _demo(args.render_mode, args.tile_server)